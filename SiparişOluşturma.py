@@ -1,16 +1,29 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
+import os
+import time
+import shutil
 import datetime
+import gzip
+import tempfile
 import numpy as np
 from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 import xlsxwriter
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
 from functools import lru_cache
 import re
+import json
+import hashlib
 from difflib import SequenceMatcher
+from types import SimpleNamespace
+
+import onbellek
+import olcum
+import kod_eslemeleri
+import tedarikci_delta
+import sema_kaydi
+from paralel_okuma import parse_excel_files, prefetch_excel, prefetch_status, take_prefetched
 
 # Cache temizleme fonksiyonu
 def clear_all_caches():
@@ -19,12 +32,21 @@ def clear_all_caches():
         # Cache temizleme
         st.cache_data.clear()
         st.cache_resource.clear()
+        onbellek.clear()
+        tedarikci_delta.clear()
+        shutil.rmtree(parts_root(), ignore_errors=True)
         
         # Session state temizleme
         if 'processed_data' in st.session_state:
             del st.session_state.processed_data
+        if 'processed_key' in st.session_state:
+            del st.session_state.processed_key
+        if 'parca_manifest' in st.session_state:
+            del st.session_state.parca_manifest
         if 'brand_data_cache' in st.session_state:
             del st.session_state.brand_data_cache
+        if 'on_okuma_hatalari' in st.session_state:
+            del st.session_state.on_okuma_hatalari
         
         return True
     except Exception as e:
@@ -52,35 +74,6 @@ def clean_product_code(code):
     
     return code_str
 
-def find_best_match(product_code, target_codes, threshold=0.8):
-    """En iyi eşleşmeyi bul (fuzzy matching)"""
-    from difflib import SequenceMatcher
-    
-    if not product_code:
-        return None, 0
-    
-    best_match = None
-    best_ratio = 0
-    
-    for target_code in target_codes:
-        if pd.isna(target_code):
-            continue
-            
-        target_str = str(target_code).strip()
-        
-        # Tam eşleşme kontrolü
-        if clean_product_code(product_code) == clean_product_code(target_str):
-            return target_code, 1.0
-        
-        # Fuzzy matching
-        ratio = SequenceMatcher(None, clean_product_code(product_code), clean_product_code(target_str)).ratio()
-        
-        if ratio > best_ratio and ratio >= threshold:
-            best_ratio = ratio
-            best_match = target_code
-    
-    return best_match, best_ratio
-
 def process_schaeffler_codes(catalogue_number):
     """Schaeffler ürün kodlarını işle"""
     if pd.isna(catalogue_number):
@@ -120,89 +113,1097 @@ def process_valeo_codes(valeo_ref):
     
     # 2. Boşlukları ve özel karakterleri temizle
     code_str = clean_product_code(code_str)
-    
+
     return code_str
 
-# Sayfa ayarları
-st.set_page_config(
-    page_title="Excel Dönüştürme Aracı (Ultra Hızlı)",
-    page_icon="⚡",
-    layout="wide",
-    initial_sidebar_state="expanded"
+# Vektörel kod normalizasyonu - eşleştirme indeksi için
+def clean_product_code_series(codes):
+    """clean_product_code'un vektörel karşılığı (astype(str) sonrası)"""
+    codes = codes.astype(str).str.strip()
+    codes = codes.str.replace(r'[ \-_]', '', regex=True).str.upper()
+    return codes.str.replace(r'[^A-Z0-9.]', '', regex=True)
+
+def upper_code_series(codes, strip=False):
+    """Kodları boşluksuz büyük harfe çevir (ZF, Delphi, Mann/Filtron kuralı)"""
+    codes = codes.astype(str)
+    if strip:
+        codes = codes.str.strip()
+    return codes.str.replace(' ', '', regex=False).str.upper()
+
+# Normalizasyon adı -> vektörel fonksiyon
+CODE_NORMALIZERS = {
+    'temiz': clean_product_code_series,
+    'buyuk': upper_code_series,
+    'buyuk_strip': lambda codes: upper_code_series(codes, strip=True),
+}
+
+def build_code_index(result_df, key_spec):
+    """Normalize edilmiş kod -> satır pozisyonu indeksini oluştur
+
+    key_spec: ((kolon, normalizasyon), ...) - her çalıştırmada bir kez hesaplanır
+    """
+    parts = []
+    for col, normalizer in key_spec:
+        if col not in result_df.columns:
+            continue
+        keys = CODE_NORMALIZERS[normalizer](result_df[col])
+        parts.append(pd.DataFrame({
+            'kod': keys.to_numpy(dtype=object),
+            'satir': np.arange(len(result_df))
+        }))
+
+    if not parts:
+        return pd.DataFrame({'kod': pd.Series(dtype=object), 'satir': pd.Series(dtype=np.int64)})
+
+    # Aynı satır iki kolondan da eşleşirse tek sayılır (URUNKODU | Düzenlenmiş)
+    return pd.concat(parts, ignore_index=True).drop_duplicates(ignore_index=True)
+
+def get_code_index(result_df, index_cache, key_spec):
+    """Çalıştırma içi indeks önbelleği - aynı anahtar seti tekrar hesaplanmaz"""
+    if key_spec not in index_cache:
+        index_cache[key_spec] = build_code_index(result_df, key_spec)
+    return index_cache[key_spec]
+
+def _code_ngrams(code, n=3):
+    """Kodun n-gram kümesi (kısa kodlar için sınır işaretleri eklenir)"""
+    padded = f"^{code}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def build_fuzzy_index(target_codes, ngram=3):
+    """Temizlenmiş katalog kodları için trigram ters indeksi (çalıştırma başına bir kez)"""
+    # Benzersiz temiz kodlar - ilk görülme sırası korunur (eşit oranda ilk görülen kod kazanır)
+    codes = list(dict.fromkeys(clean_product_code_series(pd.Series(target_codes, dtype=object))))
+
+    postings = {}
+    for code_id, code in enumerate(codes):
+        for gram in _code_ngrams(code, ngram):
+            postings.setdefault(gram, []).append(code_id)
+
+    return {
+        'codes': codes,
+        'lengths': np.array([len(code) for code in codes], dtype=np.int64),
+        'postings': {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()},
+        'ngram': ngram,
+    }
+
+def find_best_matches(product_codes, fuzzy_index, threshold=0.85, max_candidates=25):
+    """Toplu fuzzy eşleştirme - trigram aday listesi + uzunluk filtresi + SequenceMatcher
+
+    Dönüş: {temiz kod: (en iyi temiz katalog kodu, oran)}; eşleşmeyenler dahil edilmez.
+    """
+    codes = fuzzy_index['codes']
+    lengths = fuzzy_index['lengths']
+    postings = fuzzy_index['postings']
+
+    # oran = 2*M / (la + lb) >= threshold olabilmesi için gereken uzunluk aralığı
+    min_ratio = threshold / (2 - threshold)
+
+    matches = {}
+    for product_code in dict.fromkeys(product_codes):
+        query = clean_product_code(product_code)
+        if not query:
+            continue
+
+        gram_ids = [postings[gram] for gram in _code_ngrams(query, fuzzy_index['ngram']) if gram in postings]
+        if not gram_ids:
+            continue
+
+        candidate_ids, shared = np.unique(np.concatenate(gram_ids), return_counts=True)
+
+        # Uzunluk filtresi
+        query_len = len(query)
+        candidate_lengths = lengths[candidate_ids]
+        length_ok = (candidate_lengths >= query_len * min_ratio) & (candidate_lengths * min_ratio <= query_len)
+        candidate_ids, shared = candidate_ids[length_ok], shared[length_ok]
+        if len(candidate_ids) == 0:
+            continue
+
+        # En çok ortak n-gram'a sahip adaylar - sınırdaki sayıya eşit olanların hepsi kalır
+        # (keyfi bir alt küme seçilirse eşit oranda ilk görülen kod elenebilir)
+        if len(candidate_ids) > max_candidates:
+            cutoff = np.partition(shared, len(shared) - max_candidates)[len(shared) - max_candidates]
+            candidate_ids = candidate_ids[shared >= cutoff]
+
+        best_match = None
+        best_ratio = 0
+        for code_id in np.sort(candidate_ids):
+            matcher = SequenceMatcher(None, query, codes[code_id])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio and ratio >= threshold:
+                best_ratio = ratio
+                best_match = codes[code_id]
+
+        if best_match:
+            matches[product_code] = (best_match, best_ratio)
+
+    return matches
+
+def resolve_fuzzy_codes(lookup_codes, code_index, fuzzy_index, threshold=0.85, scores=None, alias_brand=None):
+    """Tam eşleşmeyen kodları en yakın katalog kodunun indeks anahtarına çevir (toplu)
+
+    fuzzy_index: indeks, indeksi üreten fonksiyon (sadece gerekirse çağrılır) veya None (fuzzy yok).
+    alias_brand verilirse önce öğrenilmiş eşlemeler (kod_eslemeleri) denenir; yeni fuzzy
+    eşleşmeler bu markaya kaydedilir. Hedefi ana tabloda olmayan eşlemeler yok sayılır.
+    Dönüş: {kod: indeks anahtarı}; scores sözlüğü verilirse eşleme/fuzzy oranları yazılır
+    """
+    scores = {} if scores is None else scores
+    known_codes = set(code_index['kod'])
+    lookup_codes = list(dict.fromkeys(lookup_codes))
+    unmatched = [code for code in lookup_codes if code not in known_codes]
+    resolved = {code: code for code in lookup_codes}
+
+    # Öğrenilmiş eşlemeler - indeksli sorgu, fuzzy puanlamadan önce
+    if alias_brand is not None and unmatched:
+        for code, (target, ratio) in kod_eslemeleri.lookup(alias_brand, unmatched).items():
+            if target in known_codes:
+                resolved[code] = target
+                scores[code] = np.nan if ratio is None else ratio
+        unmatched = [code for code in unmatched if resolved[code] == code]
+
+    if fuzzy_index is None or not unmatched:
+        return resolved
+
+    if callable(fuzzy_index):
+        fuzzy_index = fuzzy_index()
+    fuzzy_matches = find_best_matches(unmatched, fuzzy_index, threshold=threshold)
+
+    for code, (best_match, ratio) in fuzzy_matches.items():
+        resolved[code] = best_match
+        scores[code] = ratio
+    if alias_brand is not None:
+        kod_eslemeleri.store_fuzzy(alias_brand, fuzzy_matches)
+    return resolved
+
+# Şube yönlendirme kuralları - sıralı (desenler, şube) tabloları, ilk eşleşen kazanır
+PO_BRANCH_RULES = (
+    (('IME', '285'), 'İmes'),
+    (('ANK', '321'), 'Ankara'),
+    (('322',), 'Bolu'),
+    (('323',), 'Maslak'),
+    (('IKI', '324'), 'İkitelli'),
 )
 
-# Başlık
-st.title("⚡ Ultra Hızlı Excel Dönüştürücü")
-st.caption("100.000+ satırlık dosyalar için optimize edilmiş versiyon - Maksimum Hız Modu")
+# ZF dosyalarında İstanbul kodları da İmes'e gider
+ZF_BRANCH_RULES = (
+    (('IME', '285', 'İST', 'IST'), 'İmes'),
+) + PO_BRANCH_RULES[1:]
+
+DELPHI_BRANCH_RULES = (
+    (('Teknik Dizel-Bolu',), 'Bolu'),
+    (('Teknik Dizel-Ümraniye',), 'İmes'),
+    (('Teknik Dizel-Maslak',), 'Maslak'),
+    (('Teknik Dizel-Ankara',), 'Ankara'),
+    (('Teknik Dizel-İkitelli',), 'İkitelli'),
+)
+
+MANN_FILTRON_BRANCH_RULES = (
+    (('AAS',), 'Ankara'),
+    (('DAS',), 'İmes'),
+    (('BAS',), 'Bolu'),
+    (('MAS',), 'Maslak'),
+    (('EAS',), 'İkitelli'),
+)
+
+@lru_cache(maxsize=None)
+def compile_branch_rules(rules):
+    """Kural tablosunu (regex, şube) listesine derle - tablo başına bir kez"""
+    return tuple(
+        ('|'.join(re.escape(pattern) for pattern in patterns), branch)
+        for patterns, branch in rules
+    )
+
+def route_branches(values, rules, default='Diğer'):
+    """Şube kodu kolonunu kural tablosuna göre vektörel olarak sınıflandır"""
+    compiled = compile_branch_rules(rules)
+
+    # Tekrarlanan PO/şube değerleri bir kez sınıflandırılır
+    codes, uniques = pd.factorize(values.astype(str), use_na_sentinel=False)
+    uniques = pd.Series(uniques, dtype=object)
+
+    masks = [uniques.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool) for pattern, _ in compiled]
+    branches = [branch for _, branch in compiled]
+    unique_branches = np.select(masks, branches, default=default) if masks else np.full(len(uniques), default, dtype=object)
+
+    return pd.Series(np.asarray(unique_branches, dtype=object)[codes], index=values.index, dtype=object)
+
+# Tedarikçi şubeleri - bakiye kolonları bu sırayla işlenir
+TEDARIKCI_SUBELERI = ('İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli')
+TEDARIKCI_BAKIYE_COLS = [f'{sube} Tedarikçi Bakiye' for sube in TEDARIKCI_SUBELERI]
+
+def process_zf_material_codes(codes):
+    """ZF İthal Material kodlarını işle (vektörel)
+
+    LF:/SX: ile başlıyorsa ':' sonrası boşluksuz, diğerlerinde ':' öncesi,
+    ':' yoksa boşlukları silinmiş kod kullanılır.
+    """
+    codes = codes.astype(str)
+    parts = codes.str.split(':')
+    has_colon = codes.str.contains(':', regex=False, na=False)
+    prefixed = codes.str.startswith(('LF:', 'SX:'), na=False)
+
+    result = codes.str.replace(' ', '', regex=False)
+    result = result.where(~has_colon, parts.str[0].str.strip())
+    return result.where(~(has_colon & prefixed), parts.str[1].str.replace(' ', '', regex=False))
+
+def strip_code_series(codes):
+    """Kodların baş/son boşluklarını temizle"""
+    return codes.astype(str).str.strip()
+
+# Marka adaptörleri - her tedarikçi dosyası için kolonlar, kurallar ve eşleştirme anahtarları
+# code_columns: ilk bulunan kolon kullanılır
+# main_keys: ana tabloda eşleştirilecek (kolon, normalizasyon) çiftleri
+# cat4_filter: eşleşen satırları bu CAT4 markalarıyla sınırla
+BRAND_ADAPTERS = {
+    'SCHAEFFLER LUK': {
+        'excel_key': 'excel1',
+        'label': 'Schaeffler',
+        'cat4_terms': ['SCHAEFFLER LUK'],  # CAT4'teki tam değer
+        'code_columns': ['Catalogue number'],
+        'code_normalizer': lambda codes: codes.apply(process_schaeffler_codes),
+        'routing_column': 'PO Number(L)',
+        'routing_rules': PO_BRANCH_RULES,
+        'quantity_columns': ['Ordered quantity'],
+        'main_keys': (('URUNKODU', 'temiz'), ('Düzenlenmiş Ürün Kodu', 'temiz')),
+        'lookup_normalizer': 'temiz',
+        'cat4_filter': None,
+        'fuzzy': True,
+    },
+    'ZF İTHAL': {
+        'excel_key': 'excel2',
+        'label': 'ZF İthal',
+        'cat4_terms': ['ZF İTHAL', 'LEMFÖRDER', 'TRW', 'SACHS', 'LEMFORDER'],
+        'code_columns': ['Material'],
+        'code_normalizer': process_zf_material_codes,
+        'routing_column': 'Purchase order no.',
+        'routing_rules': ZF_BRANCH_RULES,
+        'quantity_columns': ['Qty.in Del.', 'Open quantity'],
+        'main_keys': (('URUNKODU', 'buyuk_strip'), ('Düzenlenmiş Ürün Kodu', 'buyuk')),
+        'lookup_normalizer': 'buyuk',
+        'cat4_filter': ('LEMFÖRDER', 'TRW', 'SACHS'),
+        'fuzzy': False,
+    },
+    'DELPHI': {
+        'excel_key': 'excel3',
+        'label': 'Delphi',
+        'cat4_terms': ['DELPHI'],  # CAT4'teki tam değer
+        'code_columns': ['Material'],
+        'code_normalizer': strip_code_series,
+        'routing_column': 'Şube',
+        'routing_rules': DELPHI_BRANCH_RULES,
+        'quantity_columns': ['Cum.qty'],
+        'main_keys': (('URUNKODU', 'buyuk_strip'), ('Düzenlenmiş Ürün Kodu', 'buyuk_strip')),
+        'lookup_normalizer': 'buyuk',
+        'cat4_filter': None,
+        'fuzzy': False,
+    },
+    'ZF YERLİ': {
+        'excel_key': 'excel4',
+        'label': 'ZF Yerli',
+        'cat4_terms': ['ZF YERLİ', 'LEMFÖRDER', 'TRW', 'SACHS', 'LEMFORDER'],
+        'code_columns': ['Basic No.'],
+        'code_normalizer': strip_code_series,
+        'routing_column': 'Ship-to Name',
+        'routing_rules': ZF_BRANCH_RULES,
+        'quantity_columns': ['Outstanding Quantity'],
+        'main_keys': (('Düzenlenmiş Ürün Kodu', 'buyuk_strip'),),
+        'lookup_normalizer': 'buyuk',
+        'cat4_filter': ('LEMFÖRDER', 'TRW', 'SACHS'),
+        'fuzzy': False,
+    },
+    'VALEO': {
+        'excel_key': 'excel5',
+        'label': 'Valeo',
+        'cat4_terms': ['VALEO'],
+        'code_columns': ['Valeo Ref.'],
+        'code_normalizer': lambda codes: codes.apply(process_valeo_codes),
+        'routing_column': 'Müşteri P/O No.',
+        'routing_rules': PO_BRANCH_RULES,
+        'quantity_columns': ['Sipariş Adeti'],
+        'main_keys': (('URUNKODU', 'temiz'), ('Düzenlenmiş Ürün Kodu', 'temiz')),
+        'lookup_normalizer': 'temiz',
+        'cat4_filter': None,
+        'fuzzy': True,
+    },
+    'FILTRON': {
+        'excel_key': 'excel6',
+        'label': 'FILTRON',
+        'cat4_terms': ['FILTRON'],
+        'code_columns': ['Material Adı', 'Material', 'Material Name', 'Ürün Kodu', 'Product Code', 'Material Kodu', 'Malzeme Kodu', 'Malzeme Adı'],
+        'code_normalizer': strip_code_series,
+        'routing_column': 'Müşteri SatınAlma No',
+        'routing_rules': MANN_FILTRON_BRANCH_RULES,
+        'quantity_columns': ['Açık Sipariş Adedi'],
+        'main_keys': (('URUNKODU', 'buyuk_strip'), ('Düzenlenmiş Ürün Kodu', 'buyuk')),
+        'lookup_normalizer': 'buyuk',
+        'cat4_filter': None,
+        'fuzzy': False,
+    },
+}
+
+# Schaflerr için alternatif isim - aynı dosya, farklı CAT4 değeri
+BRAND_ADAPTERS['SCHAFLERR'] = dict(BRAND_ADAPTERS['SCHAEFFLER LUK'], cat4_terms=['SCHAFLERR'])
+
+# Mann, Filtron ile aynı dosya formatını kullanır
+BRAND_ADAPTERS['MANN'] = dict(
+    BRAND_ADAPTERS['FILTRON'],
+    excel_key='excel7',
+    label='MANN',
+    cat4_terms=['MANN', 'MANN FILTER', 'MANN-FILTER', 'MANNFILTER']
+)
+
+# Orijinal işlem sırası
+BRAND_ADAPTERS = {
+    brand: BRAND_ADAPTERS[brand]
+    for brand in ['SCHAEFFLER LUK', 'SCHAFLERR', 'ZF İTHAL', 'DELPHI', 'ZF YERLİ', 'VALEO', 'FILTRON', 'MANN']
+}
+
+def get_fuzzy_index(result_df, index_cache):
+    """Ana tablonun fuzzy indeksi - çalıştırma başına bir kez"""
+    if 'fuzzy' not in index_cache:
+        index_cache['fuzzy'] = build_fuzzy_index(
+            result_df['URUNKODU'].astype(str).tolist() + result_df['Düzenlenmiş Ürün Kodu'].astype(str).tolist()
+        )
+    return index_cache['fuzzy']
+
+def get_cat4_filter(result_df, index_cache, terms):
+    """CAT4 marka kısıtı maskesi (büyük/küçük harf duyarsız)"""
+    key = ('cat4', terms)
+    if key not in index_cache:
+        mask = np.zeros(len(result_df), dtype=bool)
+        for term in terms:
+            mask |= result_df['CAT4'].str.contains(term, case=False, na=False).to_numpy(dtype=bool)
+        index_cache[key] = mask
+    return index_cache[key]
+
+# Tedarikçi dosyasında kod kolonunun mantıksal adı - adaptörün code_columns adaylarından çözülür
+TEDARIKCI_KOD_KOLONU = 'Kod'
+
+def adapter_schema(adapter):
+    """Adaptörün kolon şeması (bkz. sema_kaydi) - kod, yönlendirme ve miktar kolonları"""
+    schema = {TEDARIKCI_KOD_KOLONU: tuple(adapter['code_columns'])}
+    schema[adapter['routing_column']] = (adapter['routing_column'],)
+    for col in adapter['quantity_columns']:
+        schema[col] = (col,)
+    return schema
+
+def brand_columns(brand_df, adapter):
+    """Adaptörün kolonlarını mantıksal adlarla seç; gerekli kolonlardan biri eksikse uyarı verip None döndür
+
+    Başlıklar şema kaydıyla çözülür - büyük/küçük harf ve Türkçe karakter farkları tolere edilir.
+    """
+    schema = adapter_schema(adapter)
+    positions = sema_kaydi.resolve(brand_df.columns, schema)
+    missing_cols = [logical for logical in schema if logical not in positions]
+    if missing_cols:
+        st.warning(f"⚠️ {adapter['label']} dosyasında '{schema[missing_cols[0]][0]}' kolonu bulunamadı")
+        return None
+    return sema_kaydi.select_columns(brand_df, schema)
+
+def resolve_brand_codes(result_df, codes, adapter, index_cache):
+    """Normalize tedarikçi kodlarını ana tablo anahtarlarına çevir - dönüş: (aranan kod, fuzzy oran)"""
+    code_index = get_code_index(result_df, index_cache, adapter['main_keys'])
+    lookup_codes = CODE_NORMALIZERS[adapter['lookup_normalizer']](codes)
+    # Öğrenilmiş eşlemeler (tüm markalar) + fuzzy (sadece fuzzy adaptörler); indeks sadece gerekirse kurulur
+    fuzzy_scores = {}
+    fuzzy_map = resolve_fuzzy_codes(
+        lookup_codes, code_index,
+        (lambda: get_fuzzy_index(result_df, index_cache)) if adapter['fuzzy'] else None,
+        threshold=0.85, scores=fuzzy_scores, alias_brand=adapter['label']
+    )
+    fuzzy_ratios = lookup_codes.map(fuzzy_scores).astype(float)
+    return lookup_codes.map(fuzzy_map), fuzzy_ratios
+
+def accumulate_contribution(result_df, adapter, index_cache, branches, lookup_codes, quantity, presence=None):
+    """(şube, aranan kod, miktar) satırlarını ana tabloya join'le ve satır × şube katkısını hesapla
+
+    Dönüş: (katkı matrisi, şube başına join sayısı, girdi satırı başına eşleşen ana satır sayısı).
+    presence verilirse şube join sayıları bu ağırlıklarla sayılır (delta modunda +1 / -1 / 0).
+    """
+    code_index = get_code_index(result_df, index_cache, adapter['main_keys'])
+
+    # Tek join ile satır pozisyonlarını bul
+    branch_pos = {sube: i for i, sube in enumerate(TEDARIKCI_SUBELERI)}
+    joined = pd.DataFrame({
+        'grup': np.arange(len(lookup_codes)),
+        'kod': lookup_codes.to_numpy(dtype=object),
+        'sube': branches.map(branch_pos).to_numpy(dtype=np.int64),
+        'miktar': quantity.to_numpy()
+    }).merge(code_index, on='kod', how='inner', sort=False)
+
+    if adapter['cat4_filter'] and len(joined) > 0:
+        row_filter = get_cat4_filter(result_df, index_cache, adapter['cat4_filter'])
+        joined = joined[row_filter[joined['satir'].to_numpy()]]
+
+    values = joined['miktar'].to_numpy()
+    if values.dtype.kind not in 'iuf':
+        values = values.astype(float)
+
+    # Satır × şube birikimi
+    contribution = np.zeros((len(result_df), len(TEDARIKCI_SUBELERI)), dtype=values.dtype)
+    np.add.at(contribution, (joined['satir'].to_numpy(), joined['sube'].to_numpy()), values)
+
+    groups = joined['grup'].to_numpy()
+    weights = None if presence is None else np.asarray(presence, dtype=np.int64)[groups]
+    branch_counts = np.bincount(
+        joined['sube'].to_numpy(), weights=weights, minlength=len(TEDARIKCI_SUBELERI)
+    ).astype(np.int64)
+    return contribution, branch_counts, np.bincount(groups, minlength=len(lookup_codes))
+
+def brand_diagnostics(brand, branches, codes, lookup_codes, fuzzy_ratios, quantity, matched_rows):
+    """Tanılama tablosu - tedarikçi satırı (şube, kod) başına bir satır (render_match_diagnostics)"""
+    return pd.DataFrame({
+        'Marka': brand,
+        'Şube': np.asarray(branches, dtype=object),
+        'Tedarikçi Kodu': np.asarray(codes, dtype=object),
+        'Aranan Kod': np.asarray(lookup_codes, dtype=object),
+        'Fuzzy Oran': np.asarray(fuzzy_ratios, dtype=float),
+        'Miktar': np.asarray(quantity),
+        'Eşleşen Satır': np.asarray(matched_rows),
+    })
+
+def compute_brand_contribution(result_df, brand, brand_df, adapter, index_cache):
+    """Marka dosyasının tedarikçi bakiye katkısını hesapla - tüm markalar için ortak motor
+
+    Dönüş: (satır × şube katkı matrisi, şube bazında eşleşme var mı, tanılama tablosu) veya
+    eksik kolonda None. Tanılama tablosu tedarikçi satırı (şube, kod) başına bir satırdır.
+    """
+    brand_df = brand_columns(brand_df, adapter)
+    if brand_df is None:
+        return None
+    code_col = TEDARIKCI_KOD_KOLONU
+
+    quantity_cols = adapter['quantity_columns']
+
+    # Kod normalizasyonu ve şube yönlendirme - sadece gerekli kolonlar
+    lines = pd.DataFrame({
+        'kod': adapter['code_normalizer'](brand_df[code_col]),
+        'Tedarikçi': route_branches(brand_df[adapter['routing_column']], adapter['routing_rules'])
+    })
+    for col in quantity_cols:
+        lines[col] = brand_df[col]
+    lines = lines[lines['Tedarikçi'].isin(TEDARIKCI_SUBELERI)]
+
+    # Tedarikçi ve kod bazında topla
+    grouped = lines.groupby(['Tedarikçi', 'kod'])[quantity_cols].sum().reset_index()
+    quantity = grouped[quantity_cols[0]]
+    for col in quantity_cols[1:]:
+        quantity = quantity + grouped[col]
+
+    # Ana tablo anahtarlarına çevir (tam eşleşmeyenler için fuzzy) ve tek join ile birikim
+    lookup_codes, fuzzy_ratios = resolve_brand_codes(result_df, grouped['kod'], adapter, index_cache)
+    contribution, branch_counts, matched_rows = accumulate_contribution(
+        result_df, adapter, index_cache, grouped['Tedarikçi'], lookup_codes, quantity
+    )
+
+    diagnostics = brand_diagnostics(
+        brand, grouped['Tedarikçi'], grouped['kod'], lookup_codes, fuzzy_ratios, quantity, matched_rows
+    )
+    return contribution, branch_counts > 0, diagnostics
+
+# Delta modunda saklanan satır kolonları - (PO, Ham Kod) satır anahtarıdır
+DELTA_KEY_COLS = ['PO', 'Ham Kod']
+DELTA_LINE_COLS = DELTA_KEY_COLS + ['miktar', 'kod', 'Tedarikçi', 'Aranan Kod', 'Fuzzy Oran', 'Eşleşen Satır']
+
+def brand_line_totals(brand_df, adapter, code_col):
+    """Tedarikçi dosyasını (PO, ham kod) bazında topla - delta karşılaştırmasının girdisi
+
+    Normalizasyon yapılmaz; her anahtarın ilk satır pozisyonu sadece yeni satırları
+    normalize etmek için tutulur ('_ilk').
+    """
+    lines = pd.DataFrame({
+        'PO': brand_df[adapter['routing_column']].astype(str).to_numpy(dtype=object),
+        'Ham Kod': brand_df[code_col].astype(str).to_numpy(dtype=object),
+        'miktar': brand_df[adapter['quantity_columns']].sum(axis=1).to_numpy(),
+        '_ilk': np.arange(len(brand_df)),
+    })
+    return lines.groupby(DELTA_KEY_COLS, sort=False, dropna=False).agg(
+        miktar=('miktar', 'sum'), _ilk=('_ilk', 'first')
+    ).reset_index()
+
+def compute_brand_contribution_delta(result_df, brand, brand_df, adapter, index_cache, main_key):
+    """Delta modu - önceki dosyanın satırlarıyla fark al, sadece değişen satırları işle
+
+    Satırlar (PO, ham kod) anahtarıyla karşılaştırılır. Sadece yeni satırlar normalize edilip
+    yönlendirilir. Durum (marka, ana tablo) başına tutulur: bu ana tablo (main_key) için kayıt
+    varsa katkı matrisi eklenen/silinen/değişen satırların işaretli miktar farklarıyla güncellenir;
+    yoksa markanın son durumunun normalizasyonuyla tüm satırlar yeniden çözülüp join'lenir.
+    Dönüş compute_brand_contribution ile aynıdır.
+    """
+    brand_df = brand_columns(brand_df, adapter)
+    if brand_df is None:
+        return None
+    code_col = TEDARIKCI_KOD_KOLONU
+
+    today = brand_line_totals(brand_df, adapter, code_col)
+    state = tedarikci_delta.load_state(brand, main_key)
+    incremental = (
+        state is not None
+        and state['ana_anahtar'] == main_key
+        and state['katki'].shape == (len(result_df), len(TEDARIKCI_SUBELERI))
+    )
+    if state is not None and not incremental:
+        st.info(f"ℹ️ {brand}: bu ana tablo için delta durumu yok - tüm satırlar yeniden eşleştiriliyor")
+    previous = state['satirlar'] if state is not None else pd.DataFrame(columns=DELTA_LINE_COLS)
+
+    merged = today.merge(
+        previous, on=DELTA_KEY_COLS, how='outer', suffixes=('', '_onceki'), indicator=True, sort=False
+    )
+    added = (merged['_merge'] == 'left_only').to_numpy()
+    removed = (merged['_merge'] == 'right_only').to_numpy()
+    kept = (merged['_merge'] == 'both').to_numpy()
+    current = ~removed
+
+    # Sadece yeni satırlar normalize edilir - mevcut satırların kodu ve şubesi durumdan gelir
+    kod = merged['kod'].to_numpy(dtype=object).copy()
+    branches = merged['Tedarikçi'].to_numpy(dtype=object).copy()
+    if added.any():
+        first_rows = merged.loc[added, '_ilk'].to_numpy(dtype=np.int64)
+        kod[added] = adapter['code_normalizer'](brand_df[code_col].iloc[first_rows]).to_numpy(dtype=object)
+        branches[added] = route_branches(
+            brand_df[adapter['routing_column']].iloc[first_rows], adapter['routing_rules']
+        ).to_numpy(dtype=object)
+    in_branch = pd.Series(branches, dtype=object).isin(TEDARIKCI_SUBELERI).to_numpy()
+
+    # Ana tablo aynıysa sadece yeni satırlar çözülür; değiştiyse tüm satırlar (eşlemeler kayıtlı)
+    lookup = merged['Aranan Kod'].to_numpy(dtype=object).copy()
+    ratios = merged['Fuzzy Oran'].to_numpy(dtype=float).copy()
+    matched_rows = merged['Eşleşen Satır'].fillna(0).to_numpy(dtype=np.int64).copy()
+    resolve = (added if incremental else current) & in_branch
+    if resolve.any():
+        resolved, resolved_ratios = resolve_brand_codes(
+            result_df, pd.Series(kod[resolve], dtype=object), adapter, index_cache
+        )
+        lookup[resolve] = resolved.to_numpy(dtype=object)
+        ratios[resolve] = resolved_ratios.to_numpy(dtype=float)
+
+    # Dış birleştirmede eksik taraf NaN olur; tam sayı miktarlar sonuçta tam sayıya geri çevrilir
+    quantity = merged['miktar'].to_numpy(dtype=float)
+    previous_quantity = merged['miktar_onceki'].to_numpy(dtype=float)
+    integer_quantity = today['miktar'].dtype.kind in 'iu' and (state is None or previous['miktar'].dtype.kind in 'iu')
+    if incremental:
+        # Eklenen +miktar, silinen -önceki miktar, değişen fark; şube join sayısı +1 / -1 / 0
+        changed = kept & (quantity != previous_quantity)
+        delta_rows = (added | removed | changed) & in_branch
+        delta = np.where(added, quantity, np.where(removed, -previous_quantity, quantity - previous_quantity))
+        presence = np.where(added, 1, np.where(removed, -1, 0))
+        rows = np.flatnonzero(delta_rows)
+    else:
+        rows = np.flatnonzero(current & in_branch)
+        delta = quantity
+        presence = None
+
+    values = delta[rows].astype(np.int64) if integer_quantity else delta[rows]
+    contribution, branch_counts, delta_matched = accumulate_contribution(
+        result_df, adapter, index_cache,
+        pd.Series(branches[rows], dtype=object), pd.Series(lookup[rows], dtype=object),
+        pd.Series(values), None if presence is None else presence[rows]
+    )
+    if incremental:
+        contribution = state['katki'] + contribution
+        branch_counts = state['sube_eslesme'] + branch_counts
+        resolved_rows = rows[added[rows]]
+        matched_rows[resolved_rows] = delta_matched[added[rows]]
+    else:
+        matched_rows[rows] = delta_matched
+
+    lines = pd.DataFrame({
+        'PO': merged['PO'], 'Ham Kod': merged['Ham Kod'],
+        'miktar': np.nan_to_num(quantity).astype(np.int64) if integer_quantity else quantity,
+        'kod': kod, 'Tedarikçi': branches, 'Aranan Kod': lookup,
+        'Fuzzy Oran': ratios, 'Eşleşen Satır': matched_rows,
+    })[current]
+    tedarikci_delta.save_state(brand, lines, contribution, branch_counts, main_key)
+
+    # Tanılama normal moddaki gibi (şube, kod) başına - satırlar vektörel toplanır
+    grouped = lines[lines['Tedarikçi'].isin(TEDARIKCI_SUBELERI)].groupby(['Tedarikçi', 'kod']).agg(
+        aranan=('Aranan Kod', 'first'), oran=('Fuzzy Oran', 'first'),
+        miktar=('miktar', 'sum'), eslesen=('Eşleşen Satır', 'first'),
+    ).reset_index()
+    diagnostics = brand_diagnostics(
+        brand, grouped['Tedarikçi'], grouped['kod'], grouped['aranan'], grouped['oran'],
+        grouped['miktar'], grouped['eslesen']
+    )
+    return contribution, branch_counts > 0, diagnostics
+
+# Eşleştirmenin ana tablodan okuduğu kolonlar - katkı önbelleği anahtarı bunlardan üretilir
+MATCH_KEY_COLS = ['URUNKODU', 'Düzenlenmiş Ürün Kodu', 'CAT4']
+
+def match_key_fingerprint(df):
+    """Ana tablonun eşleştirme kolonlarının özeti (bakiye kolonları anahtara girmez)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(df)).encode())
+    for col in MATCH_KEY_COLS:
+        if col in df.columns:
+            digest.update(col.encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(df[col], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+@st.cache_data(max_entries=64, ttl=3600, show_spinner=False)
+def cached_brand_contribution(main_key, brand, file_key, _result_df, _brand_df, _index_cache, delta=False):
+    """Markanın katkı matrisi - ana tablo özeti ve marka dosyası özetiyle önbelleklenir
+
+    Alt çizgili parametreler hash'lenmez; tek tedarikçi dosyası değişince sadece o marka hesaplanır.
+    delta: önceki dosyanın satırlarıyla fark alınır (compute_brand_contribution_delta).
+    """
+    if delta:
+        return compute_brand_contribution_delta(
+            _result_df, brand, _brand_df, BRAND_ADAPTERS[brand], _index_cache, main_key
+        )
+    return compute_brand_contribution(_result_df, brand, _brand_df, BRAND_ADAPTERS[brand], _index_cache)
+
+def add_brand_contribution(totals, contribution, matched):
+    """Markanın katkı matrisini şube toplamlarına ekle (sadece eşleşen şubeler)
+
+    Eşleşmeyen şubeler toplama girmez - kolon tipleri markalar tek tek eklenmiş gibi kalır.
+    """
+    for i in range(len(TEDARIKCI_SUBELERI)):
+        if matched[i]:
+            totals[i] = contribution[:, i].copy() if totals[i] is None else totals[i] + contribution[:, i]
+
+def apply_contribution_totals(result_df, totals, offset=0):
+    """Şube toplamlarını tedarikçi bakiye kolonlarına ekle
+
+    offset: parçalı modda parçanın tüm tablodaki ilk satırı. Toplamlar kolonların dar tipinde
+    (compact_numeric) tutulur - katkılar int64/float64 gelse de tablo genişlemez.
+    """
+    if all(total is None for total in totals):
+        return
+    for i, col in enumerate(TEDARIKCI_BAKIYE_COLS):
+        if col not in result_df.columns:
+            result_df[col] = 0
+        if totals[i] is not None:
+            result_df[col] = compact_numeric(pd.Series(
+                result_df[col].to_numpy() + totals[i][offset:offset + len(result_df)], index=result_df.index
+            ))
+
+ALIAS_IMPORT_COLS = ['Marka', 'Tedarikçi Kodu', 'Ana Kod']
+
+def import_alias_rows(alias_df):
+    """Kullanıcı eşlemelerini (Marka, Tedarikçi Kodu, Ana Kod) markanın normalizasyonuyla kaydet
 
-# Uygulama başlangıç mesajı kaldırıldı - daha temiz arayüz
+    Marka, adaptör etiketi veya marka adı olabilir (büyük/küçük harf duyarsız); tedarikçi kodu
+    dosyadaki ham haliyle verilir. Dönüş: (kaydedilen satır, markası tanınmayan satır)
+    """
+    missing_cols = [col for col in ALIAS_IMPORT_COLS if col not in alias_df.columns]
+    if missing_cols:
+        raise ValueError(f"Eşleme dosyasında '{missing_cols[0]}' kolonu bulunamadı")
 
-# Global değişkenler
-if 'processed_data' not in st.session_state:
-    st.session_state.processed_data = None
-if 'brand_data_cache' not in st.session_state:
-    st.session_state.brand_data_cache = {}
-if 'app_restart_count' not in st.session_state:
-    st.session_state.app_restart_count = 0
+    adapters = {}
+    for brand, adapter in BRAND_ADAPTERS.items():
+        adapters.setdefault(brand.casefold(), adapter)
+        adapters.setdefault(adapter['label'].casefold(), adapter)
+
+    alias_df = alias_df.dropna(subset=ALIAS_IMPORT_COLS)
+    rows = []
+    unknown = 0
+    for brand_name, group in alias_df.groupby(alias_df['Marka'].astype(str).str.strip(), sort=False):
+        adapter = adapters.get(brand_name.casefold())
+        if adapter is None:
+            unknown += len(group)
+            continue
+        normalize = CODE_NORMALIZERS[adapter['lookup_normalizer']]
+        codes = normalize(adapter['code_normalizer'](group['Tedarikçi Kodu'].reset_index(drop=True)))
+        targets = normalize(group['Ana Kod'].reset_index(drop=True))
+        rows.extend((adapter['label'], code, target) for code, target in zip(codes, targets) if code and target)
+
+    return kod_eslemeleri.store_confirmed(rows), unknown
+
+# Sayfa ayarları - sadece Streamlit arayüzünde çağrılır (modül komut satırından da içe aktarılabilir)
+def setup_page():
+    st.set_page_config(
+        page_title="Excel Dönüştürme Aracı (Ultra Hızlı)",
+        page_icon="⚡",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
+    # Başlık
+    st.title("⚡ Ultra Hızlı Excel Dönüştürücü")
+    st.caption("100.000+ satırlık dosyalar için optimize edilmiş versiyon - Maksimum Hız Modu")
+    
+    # Uygulama başlangıç mesajı kaldırıldı - daha temiz arayüz
+    
+    # Global değişkenler
+    if 'processed_data' not in st.session_state:
+        st.session_state.processed_data = None
+        st.session_state.processed_key = None
+    if 'brand_data_cache' not in st.session_state:
+        st.session_state.brand_data_cache = {}
+    if 'app_restart_count' not in st.session_state:
+        st.session_state.app_restart_count = 0
 
 # Ultra hızlı önbellek fonksiyonları
+# Dönüşümün kullandığı ana dosya kolonları
+TRANSFORM_ESSENTIAL_COLS = [
+    'URUNKODU', 'ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD',
+    'TOPL.FAT.ADT', 'MÜŞT.SAY.', 'SATıŞ FIYATı', 'DÖVIZ CINSI (S)'
+] + [f'CAT{i}' for i in range(1, 8)]
+DEPO_PREFIXES = ['02-', '04-', 'D01-', 'A01-', 'TD-E01-']
+DEPO_COL_TYPES = ['DEVIR', 'ALIS', 'STOK', 'SATIS']
+
+# Okuma şeması - mantıksal kolon -> başlık adayları (sema_kaydi); okuyucu sadece çözülen kolonları
+# oluşturur ve mantıksal adlarla verir. İKİTELLİ için E01- önceliklidir (eski dönüşümde TD-E01-'in
+# üzerine yazılıyordu); ikisi de yoksa adında İKİTELLİ ve kolon tipi geçen başlık kullanılır.
+TRANSFORM_INPUT_SCHEMA = {
+    **{col: (col,) for col in TRANSFORM_ESSENTIAL_COLS},
+    **{f"{prefix}{col_type}": (f"{prefix}{col_type}",) for prefix in DEPO_PREFIXES for col_type in DEPO_COL_TYPES},
+    **{
+        f"TD-E01-{col_type}": (f"E01-{col_type}", f"TD-E01-{col_type}", sema_kaydi.IceriyorKurali(('IKITELLI',), col_type))
+        for col_type in DEPO_COL_TYPES
+    },
+}
+
+# Dönüştürülmüş tablonun tip planı - az sayıda farklı değerli kolonlar kategori,
+# bakiye/sipariş kolonları dar tamsayı, ürün kodları Arrow string olarak tutulur
+CATEGORY_COLS = [f'CAT{i}' for i in range(1, 8)] + ['DÖVIZ CINSI (S)']
+CODE_COLS = ['URUNKODU', 'Düzenlenmiş Ürün Kodu', 'URUNKODU_3']
+BALANCE_COL_KEYWORDS = ('Depo Bakiye', 'Tedarikçi Bakiye', 'Sipariş', 'Paket Adetleri')
+
+try:
+    import pyarrow  # noqa: F401
+    CODE_DTYPE = 'string[pyarrow]'
+    PARQUET_AVAILABLE = True
+except ImportError:
+    CODE_DTYPE = 'string'
+    PARQUET_AVAILABLE = False
+
+def compact_numeric(values):
+    """Kolonu sayıya çevir ("-", boş, metin -> 0) ve kayıpsız en dar tipe indir
+
+    Tamsayılar int32, float32'ye kayıpsız sığan değerler float32, diğerleri float64 olur.
+    """
+    array = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    array = np.where(np.isnan(array), 0.0, array)
+
+    int32_info = np.iinfo(np.int32)
+    if np.all(array == np.trunc(array)) and (len(array) == 0 or (array.min() >= int32_info.min and array.max() <= int32_info.max)):
+        return pd.Series(array.astype(np.int32), index=values.index)
+
+    as_float32 = array.astype(np.float32)
+    if np.array_equal(as_float32.astype(np.float64), array):
+        return pd.Series(as_float32, index=values.index)
+    return pd.Series(array, index=values.index)
+
+def apply_dtype_plan(df):
+    """Dönüştürülmüş tabloya kompakt tip planını uygula (depo kolonları dönüşümde sayısallaşır)"""
+    for col in dict.fromkeys(df.columns):
+        if isinstance(df[col], pd.DataFrame):
+            continue  # tekrarlı başlıklar (not, Kampanya Tipi...) planda yok
+        if col in CODE_COLS:
+            df[col] = df[col].astype(CODE_DTYPE)
+        elif col in CATEGORY_COLS:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = df[col].astype('category')
+        elif any(keyword in col for keyword in BALANCE_COL_KEYWORDS):
+            df[col] = compact_numeric(df[col])
+    return df
+
+def _excel_cell_value(value):
+    """Hücre değerini pandas openpyxl okuyucusuyla aynı şekilde çevir (na_filter=False)"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _column_buffers_to_frame(selected, buffers, dtype):
+    """Kolon tamponlarından DataFrame - tipler tampon bazında çıkarılır"""
+    dtype = dtype or {}
+    data = {}
+    for col, buffer in zip(selected, buffers):
+        series = pd.Series(buffer, dtype=object).infer_objects()
+        if col in dtype:
+            series = series.astype(dtype[col])
+        data[col] = series
+    return pd.DataFrame(data, columns=selected)
+
+def iter_excel_column_chunks(excel_file, columns, chunk_size=None, dtype=None):
+    """Excel'i read_only modda satır satır oku, istenen kolonları chunk_size satırlık parçalar halinde ver
+
+    columns: kolon adları veya şema ({mantıksal kolon: adaylar}, bkz. sema_kaydi) - kolonlar
+    başlık satırından çözülür ve mantıksal adlarla verilir. chunk_size None ise tüm dosya tek
+    parçadır. Dosya boşsa da (sadece başlık) bir boş parça verilir.
+    """
+    from openpyxl import load_workbook
+
+    if hasattr(excel_file, 'seek'):
+        excel_file.seek(0)
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        worksheet.reset_dimensions()
+        rows = worksheet.iter_rows(values_only=True)
+
+        # Başlık satırı - mantıksal kolonların pozisyonları, aynı başlıklı dosyalar için kayıttan
+        header = next(rows, ())
+        schema = columns if isinstance(columns, dict) else {col: (col,) for col in columns}
+        positions = sema_kaydi.resolve(header, schema)
+        selected = sorted(positions, key=positions.get)  # dosyadaki kolon sırası
+        selected_pos = [positions[col] for col in selected]
+
+        buffers = [[] for _ in selected]
+        buffered = 0
+        emitted = False
+        for row in rows:
+            # Tamamen boş satırlar atlanır (pandas ile aynı)
+            if not any(value is not None for value in row):
+                continue
+            row_len = len(row)
+            for buffer, pos in zip(buffers, selected_pos):
+                buffer.append(_excel_cell_value(row[pos]) if pos < row_len else '')
+            buffered += 1
+            if chunk_size and buffered >= chunk_size:
+                yield _column_buffers_to_frame(selected, buffers, dtype)
+                buffers = [[] for _ in selected]
+                buffered = 0
+                emitted = True
+
+        if buffered or not emitted:
+            yield _column_buffers_to_frame(selected, buffers, dtype)
+    finally:
+        workbook.close()
+
+def read_excel_columns(excel_file, columns, dtype=None):
+    """Excel'i read_only modda satır satır oku, sadece istenen kolonları topla
+
+    Diğer kolonlar hiç DataFrame'e dönüştürülmez; kolon tamponları en sonda tiplenir.
+    """
+    chunks = iter_excel_column_chunks(excel_file, columns, dtype=dtype)
+    try:
+        return next(chunks)
+    finally:
+        chunks.close()
+
+def read_file_bytes(uploaded_file):
+    """Yüklenen dosyanın (UploadedFile, BytesIO, bytes veya yol) içeriği"""
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        return bytes(uploaded_file)
+    if hasattr(uploaded_file, 'getvalue'):
+        return uploaded_file.getvalue()
+    with open(uploaded_file, 'rb') as f:
+        return f.read()
+
+# Aşama önbellekleri DataFrame yerine parmak iziyle anahtarlanır: yüklenen dosyanın içerik
+# özeti + aşama parametreleri. Streamlit her yeniden çalıştırmada büyük tabloları hash'lemez.
+def file_fingerprint(uploaded_file):
+    """Dosyanın içerik özeti - Streamlit yüklemelerinde file_id başına bir kez hesaplanır"""
+    file_id = getattr(uploaded_file, 'file_id', None)
+    if file_id is None:
+        return onbellek.content_key(read_file_bytes(uploaded_file))
+    fingerprints = st.session_state.setdefault('dosya_ozetleri', {})
+    if file_id not in fingerprints:
+        fingerprints[file_id] = onbellek.content_key(read_file_bytes(uploaded_file))
+    return fingerprints[file_id]
+
+def stage_key(parent_key, *params):
+    """Aşama çıktısının parmak izi: girdinin parmak izi + aşama adı/parametreleri"""
+    return onbellek.content_key(parent_key.encode(), *params)
+
+def supplier_read_columns(excel_key):
+    """Tedarikçi dosyasından okunacak normalize başlıklar - dosyayı kullanan adaptörlerin şemalarından
+
+    Dosya okunurken sadece bu kolonlar oluşturulur (sema_kaydi.candidate_names); None ise tümü.
+    """
+    return sema_kaydi.candidate_names(
+        adapter_schema(adapter) for adapter in BRAND_ADAPTERS.values() if adapter['excel_key'] == excel_key
+    )
+
+def brand_file_key(file, excel_key):
+    """Tedarikçi dosyasının disk önbelleği ve ön okuma anahtarı - okunan kolon kümesi dahil"""
+    columns = supplier_read_columns(excel_key)
+    return stage_key(file_fingerprint(file), 'marka', None if columns is None else sorted(columns))
+
+def supplier_files_key(uploaded_files):
+    """Yüklenen tedarikçi dosyalarının birleşik parmak izi"""
+    return tuple(sorted(
+        (key, file_fingerprint(file)) for key, file in uploaded_files.items() if file is not None
+    ))
+
 @st.cache_data(max_entries=5, show_spinner="Dosya okunuyor...", ttl=3600)
-def load_data_ultra_fast(uploaded_file):
-    """Maksimum hızlı dosya okuma"""
+def load_data_ultra_fast(data_key, _uploaded_file, columns=None):
+    """Maksimum hızlı dosya okuma
+
+    data_key: stage_key(file_fingerprint(dosya), 'ana', columns) - disk önbelleği anahtarı da budur.
+    columns verilirse dosya akış modunda okunur ve sadece bu kolonlar oluşturulur.
+    Aynı içerik daha önce okunduysa disk önbelleğinden yüklenir.
+    """
     try:
-        # Maksimum hız için minimal ayarlar
-        df = pd.read_excel(
-            uploaded_file,
-            engine='openpyxl',
-            # dtype belirtme - sadece kritik sütunlar
-            dtype={
-                'URUNKODU': 'string'
-            },
-            # NaN kontrolü tamamen devre dışı
-            na_filter=False,
-            keep_default_na=False,
-            # Ek hızlandırma
-            header=0,
-            skiprows=None,
-            nrows=None  # Tüm satırları oku
-        )
+        # Disk önbelleği - aynı dosya tekrar yüklendiyse Excel hiç açılmaz
+        df = onbellek.load_frame(data_key)
+        if df is not None:
+            return df
+        
+        file_bytes = read_file_bytes(_uploaded_file)
+        
+        df = None
+        if columns is not None:
+            try:
+                df = read_excel_columns(BytesIO(file_bytes), columns, dtype={'URUNKODU': 'string'})
+            except Exception:
+                # Akış modu desteklenmiyorsa (örn. .xls) tam okumaya dön
+                df = None
+        
+        if df is None:
+            # Maksimum hız için minimal ayarlar
+            df = pd.read_excel(
+                BytesIO(file_bytes),
+                engine='openpyxl',
+                # dtype belirtme - sadece kritik sütunlar
+                dtype={
+                    'URUNKODU': 'string'
+                },
+                # NaN kontrolü tamamen devre dışı
+                na_filter=False,
+                keep_default_na=False,
+                # Ek hızlandırma
+                header=0,
+                skiprows=None,
+                nrows=None  # Tüm satırları oku
+            )
+            if columns is not None:
+                df = sema_kaydi.select_columns(df, columns if isinstance(columns, dict) else {col: (col,) for col in columns})
         
+        onbellek.store_frame(data_key, df)
         return df
     except Exception as e:
         st.error(f"Dosya okuma hatası: {str(e)}")
         return pd.DataFrame()
 
 @st.cache_data(show_spinner="Marka verisi okunuyor...", ttl=1800)
-def load_brand_data_parallel(excel_file, brand_name):
-    """Maksimum hızlı marka verisi okuma"""
-    try:
-        # Maksimum hız için minimal ayarlar
-        df = pd.read_excel(
-            excel_file,
-            engine='openpyxl',
-            na_filter=False,
-            keep_default_na=False
-        )
-        
-        return brand_name, df
-    except Exception as e:
-        return brand_name, pd.DataFrame()
+def load_brand_data_parallel(files_key, _excel_files):
+    """Marka dosyalarını süreç havuzunda oku - her farklı dosya tam bir kez
+
+    files_key: supplier_files_key(_excel_files) - dosya baytları her çağrıda tekrar özetlenmez.
+    _excel_files: {excel anahtarı: dosya} -> {excel anahtarı: DataFrame}
+    Disk önbelleğinde bulunan dosyalar hiç ayrıştırılmaz; yüklenirken arka planda
+    okunmaya başlanan dosyaların (prefetch_brand_files) sonucu beklenir.
+    """
+    excel_files = _excel_files
+    brand_frames = {}
+    pending = {}
+    prefetched = {}
+    cache_keys = {}
+    for key, file in excel_files.items():
+        cache_keys[key] = brand_file_key(file, key)
+        cached = onbellek.load_frame(cache_keys[key])
+        if cached is not None:
+            brand_frames[key] = cached
+            continue
+        future = take_prefetched(cache_keys[key])
+        if future is not None:
+            prefetched[key] = future
+        else:
+            pending[key] = read_file_bytes(file)
+    
+    # Önbellekte olmayanları paralel ayrıştır ve sakla
+    read_columns = {key: supplier_read_columns(key) for key in pending}
+    for key, df in parse_excel_files(pending, read_columns).items():
+        onbellek.store_frame(cache_keys[key], df)
+        brand_frames[key] = df
+    
+    # Arka plan işleri bitmiş ya da bitmek üzere - sonuç disk önbelleğine iş içinde yazıldı
+    for key, future in prefetched.items():
+        try:
+            brand_frames[key] = future.result()
+        except Exception:
+            brand_frames[key] = parse_excel_files(
+                {key: read_file_bytes(excel_files[key])}, {key: supplier_read_columns(key)}
+            )[key]
+    
+    return brand_frames
+
+def prefetch_brand_files(uploaded_files):
+    """Yüklenen tedarikçi dosyalarını arka planda ayrıştırmaya başlat
+
+    Dönüş: {excel anahtarı: 'hazir' | 'okunuyor' | 'hata'} - disk önbelleğindekiler hazırdır.
+    Okunamayan dosyalar oturumda kaydedilir; yenilemelerde ve yeniden çalıştırmalarda tekrar
+    kuyruğa alınmaz (ön okuma işi kayıttan çıksa da).
+    """
+    failed = st.session_state.setdefault('on_okuma_hatalari', set())
+    statuses = {}
+    for excel_key, file in uploaded_files.items():
+        if file is None:
+            continue
+        cache_key = brand_file_key(file, excel_key)
+        if cache_key in failed:
+            statuses[excel_key] = 'hata'
+            continue
+        status = prefetch_status(cache_key)
+        if status is None:
+            if onbellek.has_frame(cache_key):
+                status = 'hazir'
+            else:
+                prefetch_excel(
+                    cache_key, read_file_bytes(file), lambda df, key=cache_key: onbellek.store_frame(key, df),
+                    columns=supplier_read_columns(excel_key)
+                )
+                status = prefetch_status(cache_key)
+        if status == 'hata':
+            failed.add(cache_key)
+        statuses[excel_key] = status
+    return statuses
+
+# Durum göstergesi - okunan dosya varken her saniye yenilenir, hepsi bitince sayfa bir kez yenilenir
+PREFETCH_STATUS_LABELS = {
+    'okunuyor': '⏳ Arka planda okunuyor...',
+    'hazir': '✅ Okundu, eşleştirmeye hazır',
+    'hata': '❌ Dosya okunamadı',
+}
+
+def render_prefetch_status(uploaded_files):
+    """Tedarikçi dosyalarının ön okuma durumu (dosya başına bir satır)"""
+    labels = {}
+    for adapter in BRAND_ADAPTERS.values():
+        labels.setdefault(adapter['excel_key'], adapter['label'])
+
+    def draw(statuses):
+        for excel_key, status in statuses.items():
+            st.caption(f"{labels.get(excel_key, excel_key)}: {PREFETCH_STATUS_LABELS[status]}")
+
+    statuses = prefetch_brand_files(uploaded_files)
+    if 'okunuyor' not in statuses.values():
+        draw(statuses)
+        return
+
+    @st.fragment(run_every=1)
+    def poll():
+        current = prefetch_brand_files(uploaded_files)
+        draw(current)
+        if 'okunuyor' not in current.values():
+            st.rerun()
+
+    poll()
+
+# Parçalı dönüşümde bilgi mesajları sadece ilk parça için gösterilir
+_SESSIZ_UI = SimpleNamespace(
+    info=lambda *args, **kwargs: None,
+    success=lambda *args, **kwargs: None,
+    warning=lambda *args, **kwargs: None,
+)
 
 @st.cache_data(show_spinner="Veri dönüştürülüyor...", ttl=3600)
-def transform_data_ultra_fast(df):
-    """Maksimum hızlı veri dönüştürme"""
+def transform_data_ultra_fast(data_key, _df, forecast=None):
+    """Maksimum hızlı veri dönüştürme - data_key: ana tablonun parmak izi, forecast: tahmin ayarları"""
+    return transform_frame(_df, forecast=forecast)
+
+def transform_frame(df, notify=True, forecast=None):
+    """Ana tablo dönüşümü (önbelleksiz) - notify=False ise bilgi/uyarı mesajı gösterilmez
+
+    forecast verilirse ay kolonları talep tahminiyle doldurulur (apply_demand_forecast), yoksa 0 kalır.
+    """
+    ui = st if notify else _SESSIZ_UI
     try:
         # Sadece gerekli sütunları al - bellek tasarrufu
-        essential_cols = [
-            'URUNKODU', 'ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD',
-            'TOPL.FAT.ADT', 'MÜŞT.SAY.', 'SATıŞ FIYATı', 'DÖVIZ CINSI (S)'
-        ] + [f'CAT{i}' for i in range(1, 8)]
+        essential_cols = TRANSFORM_ESSENTIAL_COLS
         
         # Depo sütunları - sadece mevcut olanları al
-        depo_prefixes = ['02-', '04-', 'D01-', 'A01-', 'TD-E01-', 'E01-']
         depo_cols = []
-        for prefix in depo_prefixes:
-            for col_type in ['DEVIR', 'ALIS', 'STOK', 'SATIS']:
+        for prefix in DEPO_PREFIXES:
+            for col_type in DEPO_COL_TYPES:
                 col_name = f"{prefix}{col_type}"
                 if col_name in df.columns:
                     depo_cols.append(col_name)
@@ -236,8 +1237,7 @@ def transform_data_ultra_fast(df):
         depo_mapping = {
             '02-': 'MASLAK',
             'D01-': 'İMES',
-            'TD-E01-': 'İKİTELLİ',
-            'E01-': 'İKİTELLİ',
+            'TD-E01-': 'İKİTELLİ',  # E01- ve adında İKİTELLİ geçen kolonlar okurken bu ada çevrilir
             '04-': 'BOLU',
             'A01-': 'ANKARA'
         }
@@ -247,62 +1247,24 @@ def transform_data_ultra_fast(df):
         if ikitelli_related_cols:
             pass
         else:
-            st.warning("⚠️ İKİTELLİ ile ilgili kolon bulunamadı!")
-            st.info(f"🔍 Mevcut tüm kolonlar: {list(df_filtered.columns)}")
+            ui.warning("⚠️ İKİTELLİ ile ilgili kolon bulunamadı!")
+            ui.info(f"🔍 Mevcut tüm kolonlar: {list(df_filtered.columns)}")
         
+        missing_depo_cols = set()
         for old_prefix, new_name in depo_mapping.items():
             for col_type, new_type in zip(['DEVIR', 'ALIS', 'SATIS', 'STOK'],
                                          ['DEVIR', 'ALIŞ', 'SATIS', 'STOK']):
                 old_col = f"{old_prefix}{col_type}"
                 if old_col in df_filtered.columns:
-                    # Vektörel işlem - boş satırlara 0 değeri ata
-                    col_data = df_filtered[old_col].fillna(0)
-                    if pd.api.types.is_numeric_dtype(col_data):
-                        col_data = col_data.astype(float)
-                    else:
-                        col_data = col_data.astype(str)
-                    new_df[f"{new_name} {new_type}"] = col_data.astype('string')
+                    # Vektörel işlem - boş satırlara ve "-" değerlerine 0 ata, dar sayısal tip
+                    new_df[f"{new_name} {new_type}"] = compact_numeric(df_filtered[old_col].fillna(0))
                 else:
                     # Eksik sütun için 0 değeri
-                    new_df[f"{new_name} {new_type}"] = '0'
+                    new_df[f"{new_name} {new_type}"] = np.zeros(len(new_df), dtype=np.int32)
+                    missing_depo_cols.add(f"{new_name} {new_type}")
                     # Debug: Show which columns are missing
                     if new_name == 'İKİTELLİ':
-                        st.warning(f"⚠️ İKİTELLİ kolonu bulunamadı: {old_col}")
-        
-        # İKİTELLİ için alternatif kolon arama - daha esnek yaklaşım
-        if 'İKİTELLİ DEVIR' in new_df.columns and new_df['İKİTELLİ DEVIR'].iloc[0] == '0':
-            st.info("🔍 İKİTELLİ kolonları için alternatif arama yapılıyor...")
-            
-            # Farklı kolon isimlendirme kalıplarını dene
-            alternative_patterns = [
-                'IKITELLI', 'IKI', 'IKIT', 'IKITELLI', 'IKITELLİ',
-                'TD-E01', 'E01', 'TD-E', 'E-', 'TD-', 'E-01'
-            ]
-            
-            for pattern in alternative_patterns:
-                pattern_cols = [col for col in df_filtered.columns if pattern.upper() in col.upper()]
-                if pattern_cols:
-                    # Pattern ile bulunan kolonlar - debug mesajları kaldırıldı
-                    
-                    # Bu kolonları İKİTELLİ kolonlarına eşleştirmeye çalış
-                    for col in pattern_cols:
-                        col_upper = col.upper()
-                        if 'DEVIR' in col_upper or 'DEVİR' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ DEVIR'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ DEVIR için {col} kullanıldı")
-                        elif 'ALIS' in col_upper or 'ALIŞ' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ ALIŞ'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ ALIŞ için {col} kullanıldı")
-                        elif 'SATIS' in col_upper or 'SATIŞ' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ SATIS'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ SATIS için {col} kullanıldı")
-                        elif 'STOK' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ STOK'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ STOK için {col} kullanıldı")
+                        ui.warning(f"⚠️ İKİTELLİ kolonu bulunamadı: {old_col}")
         
         # 10. Tedarikçi bakiye kolonları - vektörel
         tedarikci_cols = [
@@ -446,765 +1408,137 @@ def transform_data_ultra_fast(df):
             # Toplam hesapla
             new_df['Toplam Depo Bakiye'] = new_df[available_depo_cols].sum(axis=1)
         
+        # Talep tahmini - SATIS ve TOPL.FAT.ADT kolonlarından, tüm ürünler için tek seferde
+        if forecast is not None:
+            apply_demand_forecast(new_df, (first_next_month_name, second_next_month_name), forecast)
+        
         # İKİTELLİ kolonlarının son durumunu kontrol et
         ikitelli_cols = ['İKİTELLİ DEVIR', 'İKİTELLİ ALIŞ', 'İKİTELLİ SATIS', 'İKİTELLİ STOK']
-        empty_ikitelli_cols = []
-        for col in ikitelli_cols:
-            if col in new_df.columns:
-                if new_df[col].iloc[0] == '0' and new_df[col].nunique() == 1:
-                    empty_ikitelli_cols.append(col)
+        empty_ikitelli_cols = [col for col in ikitelli_cols if col in missing_depo_cols]
         
         if empty_ikitelli_cols:
-            st.warning(f"⚠️ Boş kalan İKİTELLİ kolonları: {empty_ikitelli_cols}")
+            ui.warning(f"⚠️ Boş kalan İKİTELLİ kolonları: {empty_ikitelli_cols}")
 
         else:
-            st.success("✅ İKİTELLİ kolonları başarıyla dolduruldu!")
+            ui.success("✅ İKİTELLİ kolonları başarıyla dolduruldu!")
         
-        return new_df
+        # Kompakt tip planı - kategori, dar tamsayı ve Arrow string kolonlar
+        return apply_dtype_plan(new_df)
     
     except Exception as e:
         st.error(f"Dönüşüm hatası: {str(e)}")
         return pd.DataFrame()
 
+def collect_brand_contributions(main_df, uploaded_files, delta=False):
+    """Markaların katkılarını şube bazında topla - ana tablo değiştirilmez
+
+    main_df'ten sadece eşleştirme kolonları (MATCH_KEY_COLS) okunur; parçalı modda
+    tüm tablo yerine bu kolonlar verilebilir. Dönüş: (şube başına toplam katkı dizisi
+    (eşleşme yoksa None) listesi, tanılama tablosu); CAT4 kolonu yoksa (None, boş tablo).
+    delta: tedarikçi dosyalarında sadece değişen satırlar işlenir (compute_brand_contribution_delta).
+    """
+    # Marka-Excel eşleştirme sözlüğü - adaptör kaydından
+    brand_excel_mapping = {brand: adapter['excel_key'] for brand, adapter in BRAND_ADAPTERS.items()}
+    
+    # Kod indeksleri - çalıştırma başına bir kez oluşturulur
+    code_index_cache = {}
+    
+    # CAT4 kolonunu kontrol et
+    if 'CAT4' not in main_df.columns:
+        st.warning("CAT4 kolonu bulunamadı!")
+        return None, pd.DataFrame()
+    
+    # Yüklenen farklı dosyalar (Schaeffler Luk ve Schaflerr aynı dosyayı kullanır)
+    excel_files = {
+        excel_key: uploaded_files[excel_key]
+        for excel_key in dict.fromkeys(brand_excel_mapping.values())
+        if uploaded_files.get(excel_key) is not None
+    }
+    
+    # Paralel marka verisi okuma - süreç havuzu, dosya başına tek okuma
+    with olcum.stage("Marka dosyaları okuma", rows_in=len(excel_files)) as kayit:
+        parsed_files = load_brand_data_parallel(supplier_files_key(excel_files), excel_files)
+        kayit['satir_cikis'] = sum(len(df) for df in parsed_files.values())
+    brand_data = {
+        brand: parsed_files[excel_key]
+        for brand, excel_key in brand_excel_mapping.items()
+        if excel_key in parsed_files
+    }
+    
+    # Katkı önbelleği anahtarları - ana tablo eşleştirme kolonları + dosya içeriği
+    main_key = match_key_fingerprint(main_df)
+    file_keys = {
+        excel_key: brand_file_key(file, excel_key)
+        for excel_key, file in excel_files.items()
+    }
+    
+    totals = [None] * len(TEDARIKCI_SUBELERI)
+    diagnostics = []
+    
+    # Her marka için işlem yap - adaptör kayıt sırasıyla
+    for brand, adapter in BRAND_ADAPTERS.items():
+        brand_df = brand_data.get(brand)
+        if brand_df is not None and len(brand_df) > 0:
+            # CAT4'te bu markayı ara (esnek arama)
+            search_terms = adapter['cat4_terms']
+            
+            # Debug: Arama terimlerini göster
+            st.info(f"🔍 {brand} için arama terimleri: {search_terms}")
+            
+            # Tüm arama terimlerini dene
+            brand_mask = pd.Series([False] * len(main_df))
+            for search_term in search_terms:
+                temp_mask = main_df['CAT4'].str.contains(search_term, case=False, na=False)
+                brand_mask = brand_mask | temp_mask
+            
+            brand_count = brand_mask.sum()
+            
+            if brand_count == 0:
+                # CAT4'te tam eşleşme ara
+                exact_matches = main_df[main_df['CAT4'] == search_terms[0]]
+                if len(exact_matches) > 0:
+                    st.success(f"✅ Tam eşleşme bulundu: {search_terms[0]} - {len(exact_matches)} satır")
+                    brand_mask = main_df['CAT4'] == search_terms[0]
+                    brand_count = brand_mask.sum()
+            else:
+                st.success(f"✅ {brand} markası {brand_count} ürün için bulundu")
+                
+                # Tedarikçi bakiye işlemi - ortak motor
+                try:
+                    with olcum.stage(f"Eşleştirme: {brand}", rows_in=len(brand_df)) as kayit:
+                        contribution = cached_brand_contribution(
+                            main_key, brand, file_keys[adapter['excel_key']], main_df, brand_df, code_index_cache, delta
+                        )
+                        if contribution is not None:
+                            add_brand_contribution(totals, contribution[0], contribution[1])
+                            diagnostics.append(contribution[2])
+                            if kayit:  # eşleşen satır sayımı sadece ölçüm açıkken
+                                kayit['satir_cikis'] = int(contribution[0].any(axis=1).sum())
+                except Exception as e:
+                    st.error(f"❌ {adapter['label']} veri işleme hatası: {str(e)}")
+            
+            if brand_count == 0:
+                st.warning(f"⚠️ {brand} markası CAT4 kolonunda bulunamadı")
+    
+    return totals, pd.concat(diagnostics, ignore_index=True) if diagnostics else pd.DataFrame()
+
 @st.cache_data(show_spinner="Marka eşleştirme yapılıyor...", ttl=3600)
-def match_brands_parallel(main_df, uploaded_files):
-    """Paralel marka eşleştirme"""
+def match_brands_parallel(data_key, _main_df, files_key, _uploaded_files, delta=False):
+    """Paralel marka eşleştirme
+
+    data_key: dönüştürülmüş tablonun, files_key: tedarikçi dosyalarının parmak izi (supplier_files_key)
+    delta: tedarikçi dosyaları önceki çalıştırmanın satırlarıyla karşılaştırılır
+    Dönüş: (eşleştirilmiş tablo, tanılama tablosu)
+    """
+    main_df = _main_df
     try:
-        # Marka-Excel eşleştirme sözlüğü
-        brand_excel_mapping = {
-            'SCHAEFFLER LUK': 'excel1',
-            'SCHAFLERR': 'excel1',  # Schaflerr için alternatif isim
-            'ZF İTHAL': 'excel2', 
-            'DELPHI': 'excel3',
-            'ZF YERLİ': 'excel4',
-            'VALEO': 'excel5',
-            'FILTRON': 'excel6',
-            'MANN': 'excel7'
-        }
+        totals, diagnostics = collect_brand_contributions(main_df, _uploaded_files, delta)
+        if totals is None:
+            return main_df, diagnostics
         
-        # Ana DataFrame'i kopyala
+        # Ana DataFrame'i kopyala ve katkıları ekle
         result_df = main_df.copy()
-        
-        # CAT4 kolonunu kontrol et
-        if 'CAT4' not in main_df.columns:
-            st.warning("CAT4 kolonu bulunamadı!")
-            return main_df
-        
-        # Paralel işleme için marka verilerini topla
-        brand_tasks = []
-        for brand, excel_key in brand_excel_mapping.items():
-            if excel_key in uploaded_files and uploaded_files[excel_key] is not None:
-                brand_tasks.append((brand, uploaded_files[excel_key]))
-        
-        # Paralel marka verisi okuma
-        brand_data = {}
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            future_to_brand = {
-                executor.submit(load_brand_data_parallel, file, brand): brand 
-                for brand, file in brand_tasks
-            }
-            
-            for future in as_completed(future_to_brand):
-                brand_name, brand_df = future.result()
-                brand_data[brand_name] = brand_df
-
-        
-        # Her marka için işlem yap
-        for brand, brand_df in brand_data.items():
-            if len(brand_df) > 0:
-                # CAT4'te bu markayı ara (esnek arama)
-                search_terms = [brand]
-                
-                # Schaeffler için özel arama terimleri - CAT4'teki tam değere göre
-                if 'Schaeffler' in brand or 'Schaflerr' in brand:
-                    search_terms = ['SCHAEFFLER LUK']  # CAT4'teki tam değer
-                
-                # Delphi için özel arama terimleri - CAT4'teki tam değere göre
-                if 'DELPHI' in brand:
-                    search_terms = ['DELPHI']  # CAT4'teki tam değer
-                
-                # ZF için özel arama terimleri
-                if 'ZF' in brand:
-                    search_terms.extend(['LEMFÖRDER', 'TRW', 'SACHS', 'LEMFORDER', 'TRW', 'SACHS'])
-                
-                # Mann için özel arama terimleri
-                if 'MANN' in brand:
-                    search_terms.extend(['MANN', 'MANN FILTER', 'MANN-FILTER', 'MANNFILTER'])
-                
-                # Filtron için özel arama terimleri
-                if 'FILTRON' in brand:
-                    search_terms.extend(['FILTRON'])
-                
-                # Debug: Arama terimlerini göster
-                st.info(f"🔍 {brand} için arama terimleri: {search_terms}")
-                
-                # Tüm arama terimlerini dene
-                brand_mask = pd.Series([False] * len(main_df))
-                for search_term in search_terms:
-                    temp_mask = main_df['CAT4'].str.contains(search_term, case=False, na=False)
-                    brand_mask = brand_mask | temp_mask
-                
-                brand_count = brand_mask.sum()
-                
-                # CAT4 kontrolü - debug mesajları kaldırıldı
-                if brand_count == 0:
-                    unique_cat4 = main_df['CAT4'].dropna().unique()
-
-                    
-                    # CAT4'te tam eşleşme ara
-                    exact_matches = main_df[main_df['CAT4'] == search_terms[0]]
-                    if len(exact_matches) > 0:
-                        st.success(f"✅ Tam eşleşme bulundu: {search_terms[0]} - {len(exact_matches)} satır")
-                        brand_mask = main_df['CAT4'] == search_terms[0]
-                        brand_count = brand_mask.sum()
-                else:
-                    st.success(f"✅ {brand} markası {brand_count} ürün için bulundu")
-                    
-                    # Bulunan ürün örnekleri - debug mesajları kaldırıldı
-                    found_products = main_df[brand_mask]['CAT4'].head(5).tolist()
-                    
-                    # Mann ve Filtron için normal işlem (CAT4'te bulundu)
-                    if ('MANN' in brand or 'FILTRON' in brand) and brand_count > 0:
-                        # Normal işlem - debug mesajları kaldırıldı
-                        pass
-                    
-                    # Delphi ve Schaflerr için işlem yapılması gereken koşul
-                    if ('DELPHI' in brand or 'SCHAEFFLER LUK' in brand or 'SCHAFLERR' in brand) and brand_count > 0:
-                        # Tedarikçi bakiye işlemi - debug mesajları kaldırıldı
-                        pass
-                    
-                    # Schaeffler Luk için tedarikçi bakiye işlemi
-                    if 'SCHAEFFLER LUK' in brand or 'SCHAFLERR' in brand:
-                        try:
-                            # Tedarikçi bakiye kolonlarını oluştur
-                            if 'İmes Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İmes Tedarikçi Bakiye'] = 0
-                            if 'Ankara Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Ankara Tedarikçi Bakiye'] = 0
-                            if 'Bolu Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Bolu Tedarikçi Bakiye'] = 0
-                            if 'Maslak Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Maslak Tedarikçi Bakiye'] = 0
-                            if 'İkitelli Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İkitelli Tedarikçi Bakiye'] = 0
-                            
-                            # Schaeffler verilerini işle
-                            schaeffler_df = brand_df.copy()
-                            
-                            # PO Number(L) kolonunu kontrol et
-                            if 'PO Number(L)' in schaeffler_df.columns:
-                                # Tedarikçi kodlarını belirle
-                                schaeffler_df['Tedarikçi'] = schaeffler_df['PO Number(L)'].astype(str).apply(
-                                    lambda x: 'İmes' if 'IME' in x or '285' in x
-                                    else 'Ankara' if 'ANK' in x or '321' in x
-                                    else 'Bolu' if '322' in x
-                                    else 'Maslak' if '323' in x
-                                    else 'İkitelli' if 'IKI' in x or '324' in x
-                                    else 'Diğer'
-                                )
-                                
-                                # Catalogue Number işleme - Geliştirilmiş
-                                if 'Catalogue number' in schaeffler_df.columns:
-                                    # Geliştirilmiş Schaeffler kod işleme
-                                    schaeffler_df['Catalogue_clean'] = schaeffler_df['Catalogue number'].apply(process_schaeffler_codes)
-                                    
-                                    # Catalogue number kodlarını temizle - debug mesajları kaldırıldı
-                                    total_codes = len(schaeffler_df['Catalogue_clean'])
-                                    unique_codes = schaeffler_df['Catalogue_clean'].nunique()
-                                
-                                # Ordered Quantity kontrolü
-                                if 'Ordered quantity' in schaeffler_df.columns:
-                                    # Tedarikçi bazında grupla ve topla
-                                    for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
-                                        tedarikci_data = schaeffler_df[schaeffler_df['Tedarikçi'] == tedarikci]
-                                        
-                                        if len(tedarikci_data) > 0:
-                                            # Catalogue number bazında topla
-                                            grouped = tedarikci_data.groupby('Catalogue_clean')['Ordered quantity'].sum().reset_index()
-                                            
-                                            # Ana DataFrame ile eşleştir - Geliştirilmiş
-                                            for _, row in grouped.iterrows():
-                                                catalogue_num = row['Catalogue_clean']
-                                                quantity = row['Ordered quantity']
-                                                
-                                                # Geliştirilmiş eşleştirme: Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile
-                                                urunkodu_codes = result_df['URUNKODU'].astype(str).tolist()
-                                                duzenlenmis_codes = result_df['Düzenlenmiş Ürün Kodu'].astype(str).tolist()
-                                                
-                                                # Tam eşleşme kontrolü
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).apply(clean_product_code)
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).apply(clean_product_code)
-                                                catalogue_clean = clean_product_code(catalogue_num)
-                                                
-                                                # Tam eşleşme
-                                                match_mask_urun = urunkodu_clean == catalogue_clean
-                                                match_mask_duzen = duzenlenmis_clean == catalogue_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
-                                                
-                                                # Eğer tam eşleşme yoksa, fuzzy matching dene
-                                                if not match_mask.any():
-                                                    best_match, best_ratio = find_best_match(catalogue_num, urunkodu_codes + duzenlenmis_codes, threshold=0.85)
-                                                    if best_match and best_ratio >= 0.85:
-                                                        # Fuzzy match bulundu, en yakın eşleşmeyi bul
-                                                        fuzzy_match_mask = (urunkodu_clean == clean_product_code(best_match)) | (duzenlenmis_clean == clean_product_code(best_match))
-                                                        if fuzzy_match_mask.any():
-                                                            match_mask = fuzzy_match_mask
-                                
-                                                # Eşleştirme işlemi - debug mesajları kaldırıldı
-                                
-                                                if match_mask.sum() > 0:
-                                                    # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-                                                # Eşleşme bulunamadı - sessiz devam
-                                
-
-                            else:
-                                st.warning("⚠️ Schaeffler dosyasında 'PO Number(L)' kolonu bulunamadı")
-                                
-                        except Exception as e:
-                            st.error(f"❌ Schaeffler veri işleme hatası: {str(e)}")
-                    
-                    # ZF İthal için tedarikçi bakiye işlemi
-                    elif 'ZF İTHAL' in brand:
-                        try:
-                            # Tedarikçi bakiye kolonlarını oluştur
-                            if 'İmes Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İmes Tedarikçi Bakiye'] = 0
-                            if 'Ankara Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Ankara Tedarikçi Bakiye'] = 0
-                            if 'Bolu Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Bolu Tedarikçi Bakiye'] = 0
-                            if 'Maslak Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Maslak Tedarikçi Bakiye'] = 0
-                            if 'İkitelli Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İkitelli Tedarikçi Bakiye'] = 0
-                            
-                            # ZF İthal verilerini işle
-                            zf_ithal_df = brand_df.copy()
-                            
-                            # Material kolonunu kontrol et
-                            if 'Material' in zf_ithal_df.columns:
-                                # Material kodunu işle - düzeltilmiş kural
-                                zf_ithal_df['Material_clean'] = zf_ithal_df['Material'].astype(str).apply(
-                                    lambda x: x.split(':')[1].replace(' ', '') if ':' in x and (x.startswith('LF:') or x.startswith('SX:'))  # LF: veya SX: ile başlıyorsa : sonrasını al
-                                    else x.split(':')[0].strip() if ':' in x and not (x.startswith('LF:') or x.startswith('SX:'))  # Diğerlerinde : öncesini al
-                                    else x.replace(' ', '')  # : yoksa boşlukları sil
-                                )
-                                
-                                # Material kodlarını temizle - debug mesajları kaldırıldı
-                                
-                                # Purchase order no. kolonunu kontrol et
-                                if 'Purchase order no.' in zf_ithal_df.columns:
-                                    # Tedarikçi kodlarını belirle
-                                    zf_ithal_df['Tedarikçi'] = zf_ithal_df['Purchase order no.'].astype(str).apply(
-                                        lambda x: 'İmes' if 'IME' in x or '285' in x or 'İST' in x or 'IST' in x
-                                        else 'Ankara' if 'ANK' in x or '321' in x
-                                        else 'Bolu' if '322' in x
-                                        else 'Maslak' if '323' in x
-                                        else 'İkitelli' if 'IKI' in x or '324' in x
-                                        else 'Diğer'
-                                    )
-                                    
-                                    # Tedarikçi dağılımı hesapla - debug mesajları kaldırıldı
-                                    tedarikci_counts = zf_ithal_df['Tedarikçi'].value_counts()
-                                
-                                # Qty.in Del. ve Open quantity kolonlarını kontrol et
-                                if 'Qty.in Del.' in zf_ithal_df.columns and 'Open quantity' in zf_ithal_df.columns:
-                                    # Tedarikçi bazında grupla ve topla
-                                    for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
-                                        tedarikci_data = zf_ithal_df[zf_ithal_df['Tedarikçi'] == tedarikci]
-                                        
-                                        if len(tedarikci_data) > 0:
-                                            # Material_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Material_clean').agg({
-                                                'Qty.in Del.': 'sum',
-                                                'Open quantity': 'sum'
-                                            }).reset_index()
-                                            
-                                            # Ana DataFrame ile eşleştir (LPR, Lemforder, TRW markaları)
-                                            for _, row in grouped.iterrows():
-                                                material_num = row['Material_clean']
-                                                qty_del = row['Qty.in Del.']
-                                                open_qty = row['Open quantity']
-                                                total_qty = qty_del + open_qty
-                                                
-                                                # LEMFÖRDER, TRW, SACHS markalarını ara
-                                                lemforder_mask = result_df['CAT4'].str.contains('LEMFÖRDER', case=False, na=False)
-                                                trw_mask = result_df['CAT4'].str.contains('TRW', case=False, na=False)
-                                                sachs_mask = result_df['CAT4'].str.contains('SACHS', case=False, na=False)
-                                                
-                                                # Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile tam eşleştir (case-insensitive)
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.replace(' ', '', regex=False).str.upper()
-                                                material_clean = material_num.replace(' ', '').upper()
-                                                
-                                                # Tam eşleştirme yap (case-insensitive)
-                                                match_mask_urun = urunkodu_clean == material_clean
-                                                match_mask_duzen = duzenlenmis_clean == material_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
-                                                
-                                                # LEMFÖRDER, TRW, SACHS markaları ile birleştir
-                                                final_mask = match_mask & (lemforder_mask | trw_mask | sachs_mask)
-                                                
-                                                if final_mask.sum() > 0:
-                                                    # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[final_mask, 'İmes Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[final_mask, 'Ankara Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[final_mask, 'Bolu Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[final_mask, 'Maslak Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[final_mask, 'İkitelli Tedarikçi Bakiye'] += total_qty
-
-                                                    
-
-                                                else:
-                                                    # Eşleşme bulunamadığında detaylı debug bilgisi
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
-                                
-
-                            else:
-                                st.warning("⚠️ ZF İthal dosyasında 'Material' kolonu bulunamadı")
-                                
-                        except Exception as e:
-                            st.error(f"❌ ZF İthal veri işleme hatası: {str(e)}")
-                
-                    # ZF Yerli için tedarikçi bakiye işlemi
-                    elif 'ZF YERLİ' in brand:
-                        try:
-                            # Tedarikçi bakiye kolonlarını oluştur
-                            if 'İmes Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İmes Tedarikçi Bakiye'] = 0
-                            if 'Ankara Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Ankara Tedarikçi Bakiye'] = 0
-                            if 'Bolu Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Bolu Tedarikçi Bakiye'] = 0
-                            if 'Maslak Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Maslak Tedarikçi Bakiye'] = 0
-                            if 'İkitelli Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İkitelli Tedarikçi Bakiye'] = 0
-                            
-                            # ZF Yerli verilerini işle
-                            zf_yerli_df = brand_df.copy()
-                            
-                            # Basic No. kolonunu kontrol et
-                            if 'Basic No.' in zf_yerli_df.columns:
-                                # Basic No. kodunu temizle
-                                zf_yerli_df['Basic_clean'] = zf_yerli_df['Basic No.'].astype(str).str.strip()
-                                
-                                # Ship-to Name kolonunu kontrol et
-                                if 'Ship-to Name' in zf_yerli_df.columns:
-                                    # Tedarikçi kodlarını belirle
-                                    zf_yerli_df['Tedarikçi'] = zf_yerli_df['Ship-to Name'].astype(str).apply(
-                                        lambda x: 'İmes' if 'IME' in x or '285' in x or 'IST' in x or 'İST' in x
-                                        else 'Ankara' if 'ANK' in x or '321' in x
-                                        else 'Bolu' if '322' in x
-                                        else 'Maslak' if '323' in x
-                                        else 'İkitelli' if 'IKI' in x or '324' in x
-                                        else 'Diğer'
-                                    )
-                                    
-                                    # Tedarikçi dağılımı hesapla - debug mesajları kaldırıldı
-                                    tedarikci_counts = zf_yerli_df['Tedarikçi'].value_counts()
-                                
-                                # Outstanding Quantity kolonunu kontrol et
-                                if 'Outstanding Quantity' in zf_yerli_df.columns:
-                                    # Tedarikçi bazında grupla ve topla
-                                    for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
-                                        tedarikci_data = zf_yerli_df[zf_yerli_df['Tedarikçi'] == tedarikci]
-                                        
-                                        if len(tedarikci_data) > 0:
-                                            # Basic_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Basic_clean')['Outstanding Quantity'].sum().reset_index()
-                                            
-                                            # Ana DataFrame ile eşleştir (Düzenlenmiş Ürün Kodu ile)
-                                            for _, row in grouped.iterrows():
-                                                basic_num = row['Basic_clean']
-                                                quantity = row['Outstanding Quantity']
-                                                
-                                                # LEMFÖRDER, TRW, SACHS markalarını ara
-                                                lemforder_mask = result_df['CAT4'].str.contains('LEMFÖRDER', case=False, na=False)
-                                                trw_mask = result_df['CAT4'].str.contains('TRW', case=False, na=False)
-                                                sachs_mask = result_df['CAT4'].str.contains('SACHS', case=False, na=False)
-                                                
-                                                # Düzenlenmiş Ürün Kodu ile tam eşleştir (case-insensitive, boşlukları temizle)
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                basic_clean = basic_num.replace(' ', '').upper()
-                                                match_mask = duzenlenmis_clean == basic_clean
-                                                
-                                                # LEMFÖRDER, TRW, SACHS markaları ile birleştir
-                                                final_mask = match_mask & (lemforder_mask | trw_mask | sachs_mask)
-                                                
-                                                if final_mask.sum() > 0:
-                                                    # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[final_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[final_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[final_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[final_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[final_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
-                                
-
-                            else:
-                                st.warning("⚠️ ZF Yerli dosyasında 'Basic No.' kolonu bulunamadı")
-                                
-                        except Exception as e:
-                            st.error(f"❌ ZF Yerli veri işleme hatası: {str(e)}")
-                
-                    # Valeo için tedarikçi bakiye işlemi
-                    elif 'VALEO' in brand:
-                        try:
-                            # Tedarikçi bakiye kolonlarını oluştur
-                            if 'İmes Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İmes Tedarikçi Bakiye'] = 0
-                            if 'Ankara Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Ankara Tedarikçi Bakiye'] = 0
-                            if 'Bolu Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Bolu Tedarikçi Bakiye'] = 0
-                            if 'Maslak Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Maslak Tedarikçi Bakiye'] = 0
-                            if 'İkitelli Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İkitelli Tedarikçi Bakiye'] = 0
-                            
-                            # Valeo verilerini işle
-                            valeo_df = brand_df.copy()
-                            
-                            # Müşteri P/O No. kolonunu kontrol et
-                            if 'Müşteri P/O No.' in valeo_df.columns:
-                                # Tedarikçi kodlarını belirle
-                                valeo_df['Tedarikçi'] = valeo_df['Müşteri P/O No.'].astype(str).apply(
-                                    lambda x: 'İmes' if 'IME' in x or '285' in x
-                                    else 'Ankara' if 'ANK' in x or '321' in x
-                                    else 'Bolu' if '322' in x
-                                    else 'Maslak' if '323' in x
-                                    else 'İkitelli' if 'IKI' in x or '324' in x
-                                    else 'Diğer'
-                                )
-                                
-                                # Valeo Ref. kolonunu kontrol et - Geliştirilmiş
-                                if 'Valeo Ref.' in valeo_df.columns:
-                                    # Geliştirilmiş Valeo kod işleme
-                                    valeo_df['Valeo_clean'] = valeo_df['Valeo Ref.'].apply(process_valeo_codes)
-                                    
-                                    # Valeo Ref. kodlarını temizle - debug mesajları kaldırıldı
-                                    total_codes = len(valeo_df['Valeo_clean'])
-                                    unique_codes = valeo_df['Valeo_clean'].nunique()
-                                
-                                # Sipariş Adeti kolonunu kontrol et
-                                if 'Sipariş Adeti' in valeo_df.columns:
-                                    # Tedarikçi bazında grupla ve topla
-                                    for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
-                                        tedarikci_data = valeo_df[valeo_df['Tedarikçi'] == tedarikci]
-                                        
-                                        if len(tedarikci_data) > 0:
-                                            # Valeo_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Valeo_clean')['Sipariş Adeti'].sum().reset_index()
-                                            
-                                            # Ana DataFrame ile eşleştir - Geliştirilmiş
-                                            for _, row in grouped.iterrows():
-                                                valeo_ref = row['Valeo_clean']
-                                                quantity = row['Sipariş Adeti']
-                                                
-                                                # Geliştirilmiş eşleştirme: Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile
-                                                urunkodu_codes = result_df['URUNKODU'].astype(str).tolist()
-                                                duzenlenmis_codes = result_df['Düzenlenmiş Ürün Kodu'].astype(str).tolist()
-                                                
-                                                # Tam eşleşme kontrolü
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).apply(clean_product_code)
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).apply(clean_product_code)
-                                                valeo_clean = clean_product_code(valeo_ref)
-                                                
-                                                # Tam eşleşme
-                                                match_mask_urun = urunkodu_clean == valeo_clean
-                                                match_mask_duzen = duzenlenmis_clean == valeo_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
-                                                
-                                                # Eğer tam eşleşme yoksa, fuzzy matching dene
-                                                if not match_mask.any():
-                                                    best_match, best_ratio = find_best_match(valeo_ref, urunkodu_codes + duzenlenmis_codes, threshold=0.85)
-                                                    if best_match and best_ratio >= 0.85:
-                                                        # Fuzzy match bulundu, en yakın eşleşmeyi bul
-                                                        fuzzy_match_mask = (urunkodu_clean == clean_product_code(best_match)) | (duzenlenmis_clean == clean_product_code(best_match))
-                                                        if fuzzy_match_mask.any():
-                                                            match_mask = fuzzy_match_mask
-
-                                
-                                                # Eşleştirme işlemi - debug mesajları kaldırıldı
-                                
-                                                if match_mask.sum() > 0:
-                                                    # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
-                                                else:
-                                                    # Eşleşme bulunamadığında detaylı debug bilgisi
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
-                                
-
-                            else:
-                                st.warning("⚠️ Valeo dosyasında 'Müşteri P/O No.' kolonu bulunamadı")
-                                
-                        except Exception as e:
-                            st.error(f"❌ Valeo veri işleme hatası: {str(e)}")
-                
-                    # Delphi için tedarikçi bakiye işlemi
-                    elif 'DELPHI' in brand:
-                        try:
-                            # Tedarikçi bakiye kolonlarını oluştur
-                            if 'İmes Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İmes Tedarikçi Bakiye'] = 0
-                            if 'Ankara Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Ankara Tedarikçi Bakiye'] = 0
-                            if 'Bolu Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Bolu Tedarikçi Bakiye'] = 0
-                            if 'Maslak Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Maslak Tedarikçi Bakiye'] = 0
-                            if 'İkitelli Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İkitelli Tedarikçi Bakiye'] = 0
-                            
-                            # Delphi verilerini işle
-                            delphi_df = brand_df.copy()
-                            
-                            # Şube kolonunu kontrol et
-                            if 'Şube' in delphi_df.columns:
-                                # Tedarikçi kodlarını belirle
-                                delphi_df['Tedarikçi'] = delphi_df['Şube'].astype(str).apply(
-                                    lambda x: 'Bolu' if 'Teknik Dizel-Bolu' in x
-                                    else 'İmes' if 'Teknik Dizel-Ümraniye' in x
-                                    else 'Maslak' if 'Teknik Dizel-Maslak' in x
-                                    else 'Ankara' if 'Teknik Dizel-Ankara' in x
-                                    else 'İkitelli' if 'Teknik Dizel-İkitelli' in x
-                                    else 'Diğer'
-                                )
-                                
-                                # Material kolonunu kontrol et
-                                if 'Material' in delphi_df.columns:
-                                    # Material kodunu temizle
-                                    delphi_df['Material_clean'] = delphi_df['Material'].astype(str).str.strip()
-                                    
-                                    # Debug: Material kolonu işleme örnekleri göster
-                                    # Delphi Material kodlarını temizle - debug mesajları kaldırıldı
-                                
-                                # Cum.qty kolonunu kontrol et
-                                if 'Cum.qty' in delphi_df.columns:
-                                    # Tedarikçi bazında grupla ve topla
-                                    for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
-                                        tedarikci_data = delphi_df[delphi_df['Tedarikçi'] == tedarikci]
-                                        
-                                        if len(tedarikci_data) > 0:
-                                            # Material_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Material_clean')['Cum.qty'].sum().reset_index()
-                                            
-                                            # Ana DataFrame ile eşleştir
-                                            for _, row in grouped.iterrows():
-                                                material_num = row['Material_clean']
-                                                quantity = row['Cum.qty']
-                                                
-                                                # Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile eşleştir
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                material_clean = material_num.replace(' ', '').upper()
-                                                
-                                                # Her iki kolonla da eşleştir
-                                                match_mask_urun = urunkodu_clean == material_clean
-                                                match_mask_duzen = duzenlenmis_clean == material_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
-                                                
-                                                # Debug: İlk 5 eşleştirme örneği göster
-                                                if _ < 5:
-                                                    match_count = match_mask.sum()
-                                                    match_count_urun = match_mask_urun.sum()
-                                                    match_count_duzen = match_mask_duzen.sum()
-                                                    st.info(f"🔍 Delphi eşleştirme: {material_num} → {match_count} eşleşme (URUNKODU: {match_count_urun}, Düzenlenmiş: {match_count_duzen})")
-                                                
-                                                if match_mask.sum() > 0:
-                                                    # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
-                                                else:
-                                                    # Eşleşme bulunamadığında debug bilgisi
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
-                                
-
-                            else:
-                                st.warning("⚠️ Delphi dosyasında 'Şube' kolonu bulunamadı")
-                                
-                        except Exception as e:
-                            st.error(f"❌ Delphi veri işleme hatası: {str(e)}")
-                
-                    # Mann ve Filtron için tedarikçi bakiye işlemi
-                    if 'MANN' in brand or 'FILTRON' in brand:
-                        try:
-                            # Tedarikçi bakiye kolonlarını oluştur
-                            if 'İmes Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İmes Tedarikçi Bakiye'] = 0
-                            if 'Ankara Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Ankara Tedarikçi Bakiye'] = 0
-                            if 'Bolu Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Bolu Tedarikçi Bakiye'] = 0
-                            if 'Maslak Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['Maslak Tedarikçi Bakiye'] = 0
-                            if 'İkitelli Tedarikçi Bakiye' not in result_df.columns:
-                                result_df['İkitelli Tedarikçi Bakiye'] = 0
-                            
-                            # Mann/Filtron verilerini işle
-                            brand_df_processed = brand_df.copy()
-                            
-                            # Material Adı kolonunu kontrol et (farklı isimler için)
-                            material_col = None
-                            for col_name in ['Material Adı', 'Material', 'Material Name', 'Ürün Kodu', 'Product Code', 'Material Kodu', 'Malzeme Kodu', 'Malzeme Adı']:
-                                if col_name in brand_df_processed.columns:
-                                    material_col = col_name
-                                    break
-                            
-                            if material_col:
-                                # Material kolonu bulundu - debug mesajları kaldırıldı
-                                
-                                # Kolonlar listelendi - debug mesajları kaldırıldı
-                                
-                                # Önemli kolonlar kontrol edildi - debug mesajları kaldırıldı
-                                important_cols = ['Müşteri SatınAlma No', 'Açık Sipariş Adedi', 'Material Kodu', 'Material Adı']
-                                
-                                # Material kodunu temizle (bulunan kolon adını kullan)
-                                brand_df_processed['Material_clean'] = brand_df_processed[material_col].astype(str).str.strip()
-                                
-                                # Material örnekleri - debug mesajları kaldırıldı
-                                sample_materials = brand_df_processed[material_col].head(10).tolist()
-                                sample_cleaned = brand_df_processed['Material_clean'].head(10).tolist()
-                                
-                                # Müşteri SatınAlma No kolonunu kontrol et
-                                if 'Müşteri SatınAlma No' in brand_df_processed.columns:
-                                    # Müşteri SatınAlma No örnekleri - debug mesajları kaldırıldı
-                                    sample_codes = brand_df_processed['Müşteri SatınAlma No'].head(10).tolist()
-                                    
-                                    # Tedarikçi kodlarını belirle
-                                    brand_df_processed['Tedarikçi'] = brand_df_processed['Müşteri SatınAlma No'].astype(str).apply(
-                                        lambda x: 'Ankara' if 'AAS' in x
-                                        else 'İmes' if 'DAS' in x
-                                        else 'Bolu' if 'BAS' in x
-                                        else 'Maslak' if 'MAS' in x
-                                        else 'İkitelli' if 'EAS' in x
-                                        else 'Diğer'
-                                    )
-                                    
-                                    # Tedarikçi dağılımı hesapla - debug mesajları kaldırıldı
-                                    tedarikci_dist = brand_df_processed['Tedarikçi'].value_counts()
-                                
-                                # Açık Sipariş Adedi kolonunu kontrol et
-                                if 'Açık Sipariş Adedi' in brand_df_processed.columns:
-                                    # Tedarikçi bazında grupla ve topla
-                                    for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
-                                        tedarikci_data = brand_df_processed[brand_df_processed['Tedarikçi'] == tedarikci]
-                                        
-                                        if len(tedarikci_data) > 0:
-                                            # Material_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Material_clean')['Açık Sipariş Adedi'].sum().reset_index()
-                                            
-                                            # Ana DataFrame ile eşleştir
-                                            for _, row in grouped.iterrows():
-                                                material_num = row['Material_clean']
-                                                quantity = row['Açık Sipariş Adedi']
-                                                
-                                                # Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile tam eşleştir (case-insensitive)
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.replace(' ', '', regex=False).str.upper()
-                                                material_clean_no_space = material_num.replace(' ', '').upper()
-                                                
-                                                # Tam eşleştirme yap (case-insensitive)
-                                                match_mask_urun = urunkodu_clean == material_clean_no_space
-                                                match_mask_duzen = duzenlenmis_clean == material_clean_no_space
-                                                match_mask = match_mask_urun | match_mask_duzen
-                                                
-                                                # Debug: Eşleştirme detayları
-                                                st.info(f"🔍 {brand} tam eşleştirme (case-insensitive): {material_num} → {material_clean_no_space}")
-                                                st.info(f"  URUNKODU tam eşleşme: {match_mask_urun.sum()} adet")
-                                                st.info(f"  Düzenlenmiş Ürün Kodu tam eşleşme: {match_mask_duzen.sum()} adet")
-                                                st.info(f"  Toplam tam eşleşme: {match_mask.sum()} adet")
-                                                
-                                                if match_mask.sum() > 0:
-                                                    # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
-                                                else:
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
-
-                                
-                                # Sonuç kontrolü - debug mesajları kaldırıldı
-                            else:
-                                pass
-                                
-                        except Exception as e:
-                            st.error(f"❌ {brand} veri işleme hatası: {str(e)}")
-                
-                if brand_count == 0:
-                    st.warning(f"⚠️ {brand} markası CAT4 kolonunda bulunamadı")
+        apply_contribution_totals(result_df, totals)
         
         # Marka eşleştirme sonrası toplam depo bakiyesi güncelleme
         depo_bakiye_cols = ['Maslak Depo Bakiye', 'Bolu Depo Bakiye', 'İmes Depo Bakiye', 'Ankara Depo Bakiye', 'İkitelli Depo Bakiye']
@@ -1216,7 +1550,7 @@ def match_brands_parallel(main_df, uploaded_files):
                 result_df[col] = pd.to_numeric(result_df[col], errors='coerce').fillna(0)
             
             # Toplam hesapla
-            result_df['Toplam Depo Bakiye'] = result_df[available_depo_cols].sum(axis=1)
+            result_df['Toplam Depo Bakiye'] = compact_numeric(result_df[available_depo_cols].sum(axis=1))
             
             st.success(f"✅ Toplam Depo Bakiye hesaplandı: {len(available_depo_cols)} depo kolonu toplandı")
         
@@ -1230,35 +1564,514 @@ def match_brands_parallel(main_df, uploaded_files):
                 total = result_df[col].sum()
                 st.write(f"  {col}: {total:,.0f} adet")
         
-        return result_df
+        return result_df, diagnostics
         
     except Exception as e:
         st.error(f"Marka eşleştirme hatası: {str(e)}")
-        return main_df
+        return main_df, pd.DataFrame()
 
-@st.cache_data(show_spinner="Excel oluşturuluyor...", ttl=1800)
-def format_excel_ultra_fast(df):
-    """Ultra hızlı Excel oluşturma - performans odaklı"""
+def summarize_match_diagnostics(diagnostics):
+    """Marka × şube özeti: tedarikçi kodu, eşleşen/eşleşmeyen kod, fuzzy eşleşme ve miktar sayıları"""
+    if diagnostics.empty:
+        return pd.DataFrame()
+    eslesen = diagnostics['Eşleşen Satır'] > 0
+    return diagnostics.assign(
+        eslesen_kod=eslesen,
+        eslesmeyen_kod=~eslesen,
+        fuzzy=diagnostics['Fuzzy Oran'].notna(),
+        eslesmeyen_miktar=diagnostics['Miktar'].where(~eslesen, 0),
+    ).groupby(['Marka', 'Şube'], sort=False).agg(**{
+        'Tedarikçi Kodu': ('Tedarikçi Kodu', 'size'),
+        'Eşleşen Kod': ('eslesen_kod', 'sum'),
+        'Eşleşmeyen Kod': ('eslesmeyen_kod', 'sum'),
+        'Fuzzy Eşleşme': ('fuzzy', 'sum'),
+        'Ort. Fuzzy Oran': ('Fuzzy Oran', 'mean'),
+        'Eşleşen Ana Satır': ('Eşleşen Satır', 'sum'),
+        'Toplam Miktar': ('Miktar', 'sum'),
+        'Eşleşmeyen Miktar': ('eslesmeyen_miktar', 'sum'),
+    }).reset_index()
+
+def render_match_diagnostics(diagnostics, file_prefix):
+    """Eşleştirme tanılaması - tek özet tablo ve indirilebilir detay (kod başına satır, CSV)"""
+    if diagnostics is None or diagnostics.empty:
+        return
+    
+    with st.expander("🔍 Eşleştirme Tanılama", expanded=False):
+        st.dataframe(summarize_match_diagnostics(diagnostics), hide_index=True)
+        st.download_button(
+            label=f"📥 Tanılama Detayı (CSV, {len(diagnostics):,} kod)",
+            data=diagnostics.to_csv(index=False).encode('utf-8-sig'),
+            file_name=f"{file_prefix}_tanilama_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+            mime="text/csv",
+            key=f"{file_prefix}_tanilama"
+        )
+
+# Talep tahmini - ay kolonlarının _1.._5 sırası Sipariş kolonlarıyla aynı (İmes, İkitelli, Ankara, Maslak, Bolu)
+TAHMIN_SUBELERI = ('İMES', 'İKİTELLİ', 'ANKARA', 'MASLAK', 'BOLU')
+TAHMIN_MODELLERI = {
+    'ortalama': 'Hareketli ortalama (dönem satışı)',
+    'ustel': 'Üstel düzeltme (dönem satışı + toplam fatura)',
+}
+TAHMIN_FATURA_AY = 12   # TOPL.FAT.ADT kolonunun kapsadığı dönem (ay)
+TAHMIN_ALFA = 0.5       # Üstel düzeltmede son dönemin ağırlığı
+
+def forecast_demand(sales, invoiced, model, sales_months, invoice_months=TAHMIN_FATURA_AY, alpha=TAHMIN_ALFA):
+    """SKU × şube aylık talep tahmini - tüm ürünler tek matris işlemiyle
+
+    ortalama: şubenin dönem satışının aylık ortalaması.
+    ustel: uzun dönem seviyesi (TOPL.FAT.ADT, şubelere satış payıyla dağıtılır) son dönemin
+    aylık satışıyla düzeltilir: alpha × dönem + (1 - alpha) × uzun dönem.
+    """
+    sales = np.maximum(np.asarray(sales, dtype=float), 0.0)
+    current = sales / sales_months
+    if model == 'ortalama':
+        return current
+
+    # Satışı olmayan ürünlerde fatura şubelere eşit dağıtılır
+    total = sales.sum(axis=1, keepdims=True)
+    share = np.divide(sales, total, out=np.full_like(sales, 1.0 / sales.shape[1]), where=total > 0)
+    long_run = np.maximum(np.asarray(invoiced, dtype=float), 0.0)[:, None] / invoice_months * share
+    return alpha * current + (1.0 - alpha) * long_run
+
+def apply_demand_forecast(df, month_names, forecast):
+    """Ay kolonlarını ({ay}_1.._5) tahminle doldur (yerinde) - iki ay için aynı aylık seviye
+
+    forecast: {'model', 'satis_ay', 'fatura_ay', 'alfa'}
+    """
+    sales = _numeric_matrix(df, [f"{sube} SATIS" for sube in TAHMIN_SUBELERI])
+    invoiced = _numeric_matrix(df, ['TOPL.FAT.ADT'])[:, 0]
+    monthly = np.rint(forecast_demand(
+        sales, invoiced, forecast['model'], forecast['satis_ay'], forecast['fatura_ay'], forecast['alfa']
+    )).astype(np.int64)
+    for month in month_names:
+        for i in range(len(TAHMIN_SUBELERI)):
+            col = f'{month}_{i + 1}'
+            if col in df.columns:
+                df[col] = compact_numeric(pd.Series(monthly[:, i], index=df.index))
+
+def forecast_settings():
+    """Kenar çubuğundaki tahmin ayarları; model seçilmediyse None"""
+    model = st.session_state.get('tahmin_modeli')
+    if model not in TAHMIN_MODELLERI:
+        return None
+    return {
+        'model': model,
+        'satis_ay': st.session_state.get('tahmin_satis_ay', SIPARIS_SATIS_AY),
+        'fatura_ay': st.session_state.get('tahmin_fatura_ay', TAHMIN_FATURA_AY),
+        'alfa': st.session_state.get('tahmin_alfa', TAHMIN_ALFA),
+    }
+
+def transform_key(main_key, forecast=None):
+    """Dönüştürülmüş tablonun parmak izi - tahmin ayarları anahtara girer"""
+    if forecast is None:
+        return stage_key(main_key, 'donusum')
+    return stage_key(main_key, 'donusum', forecast)
+
+# Sipariş önerisi - şube sırası TEDARIKCI_SUBELERI ile aynı; depo kolonları dönüşümdeki büyük harfli adlarla
+SIPARIS_DEPO_ADLARI = {'İmes': 'İMES', 'Ankara': 'ANKARA', 'Bolu': 'BOLU', 'Maslak': 'MASLAK', 'İkitelli': 'İKİTELLİ'}
+SIPARIS_COLS = [f'{sube} Sipariş' for sube in TEDARIKCI_SUBELERI]
+SIPARIS_SATIS_AY = 12     # STOK/SATIS kolonlarının kapsadığı dönem (ay)
+SIPARIS_KAPSAMA_AY = 2    # Hedef stok: kaç aylık satış (önümüzdeki 2 ay kolonlarıyla aynı)
+
+# Paket adetleri dosyasında aranan kolonlar - ilk bulunan kullanılır
+PAKET_KOD_KOLONLARI = ('URUNKODU', 'Ürün Kodu', 'Düzenlenmiş Ürün Kodu', 'Kod')
+PAKET_ADET_KOLONLARI = ('Paket Adetleri', 'Paket Adedi', 'Paket', 'Koli Adedi')
+
+def read_pack_sizes(pack_df):
+    """Paket adetleri tablosunu {ürün kodu: paket adedi} serisine çevir (geçersiz/0 adetler atılır)"""
+    code_col = next((col for col in PAKET_KOD_KOLONLARI if col in pack_df.columns), None)
+    size_col = next((col for col in PAKET_ADET_KOLONLARI if col in pack_df.columns), None)
+    if code_col is None or size_col is None:
+        raise ValueError(
+            f"Paket dosyasında '{PAKET_KOD_KOLONLARI[0]}' ve '{PAKET_ADET_KOLONLARI[0]}' kolonları bulunamadı"
+        )
+    sizes = pd.Series(
+        pd.to_numeric(pack_df[size_col], errors='coerce').to_numpy(dtype=float),
+        index=pack_df[code_col].astype(str).str.strip().to_numpy(dtype=object)
+    )
+    sizes = sizes[(sizes > 0) & (sizes == np.floor(sizes))]
+    return sizes[~sizes.index.duplicated(keep='first')].astype(np.int64)
+
+def read_pack_file(pack_file, file_name):
+    """Paket adetleri dosyasını (CSV/Excel; yol, bayt veya yükleme) oku - dönüş: read_pack_sizes"""
+    data = BytesIO(read_file_bytes(pack_file))
+    if file_name.lower().endswith('.csv'):
+        pack_df = pd.read_csv(data, dtype=str, encoding='utf-8-sig')
+    else:
+        pack_df = pd.read_excel(data, dtype=str)
+    return read_pack_sizes(pack_df)
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def load_pack_sizes(pack_key, _pack_file, file_name):
+    """Yüklenen paket adetleri dosyası - pack_key: dosya parmak izi"""
+    return read_pack_file(_pack_file, file_name)
+
+def pack_size_array(df, pack_sizes):
+    """Satır başına paket adedi - önce URUNKODU, bulunamazsa Düzenlenmiş Ürün Kodu; yoksa 0"""
+    sizes = np.zeros(len(df), dtype=np.int64)
+    if pack_sizes is None or len(pack_sizes) == 0:
+        return sizes
+    for col in ('Düzenlenmiş Ürün Kodu', 'URUNKODU'):  # sonraki öncelikli - üzerine yazar
+        if col in df.columns:
+            found = df[col].astype(str).map(pack_sizes).to_numpy(dtype=float, na_value=np.nan)
+            sizes = np.where(np.isnan(found), sizes, found).astype(np.int64)
+    return sizes
+
+def suggest_orders(stock, sales, open_orders, pack, sales_months=SIPARIS_SATIS_AY, cover_months=SIPARIS_KAPSAMA_AY):
+    """SKU × şube matrisleri üzerinde sipariş önerisi
+
+    Hedef stok = aylık satış × kapsama ayı; öneri = hedef - (stok + açık tedarikçi siparişi),
+    negatifse 0, paket adedinin (0 = bilinmiyor, adet) katına yukarı yuvarlanır.
+    """
+    need = np.asarray(sales, dtype=float) * (cover_months / sales_months) - stock - open_orders
+    need = np.maximum(need, 0.0)
+    multiple = np.where(pack > 0, pack, 1).astype(float)[:, None]
+    # Kayan nokta artığı (2.0000001 paket) bir paket fazla sipariş vermesin
+    return (np.ceil(np.round(need / multiple, 6)) * multiple).astype(np.int64)
+
+def _numeric_matrix(df, columns):
+    """Kolonları satır × kolon float matrisine çevir - eksik kolon ve metin değerler 0"""
+    matrix = np.zeros((len(df), len(columns)), dtype=float)
+    for i, col in enumerate(columns):
+        if col in df.columns:
+            matrix[:, i] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return np.nan_to_num(matrix)
+
+def apply_order_suggestions(df, settings):
+    """Sipariş ve Paket Adetleri kolonlarını hesapla (yerinde) - parçalı modda parça başına çağrılır
+
+    settings: {'satis_ay', 'kapsama_ay', 'paket' (kod -> adet serisi veya None), 'paket_anahtari'}
+    """
+    stock = _numeric_matrix(df, [f"{SIPARIS_DEPO_ADLARI[sube]} STOK" for sube in TEDARIKCI_SUBELERI])
+    sales = _numeric_matrix(df, [f"{SIPARIS_DEPO_ADLARI[sube]} SATIS" for sube in TEDARIKCI_SUBELERI])
+    open_orders = _numeric_matrix(df, TEDARIKCI_BAKIYE_COLS)
+    pack = pack_size_array(df, settings.get('paket'))
+
+    orders = suggest_orders(stock, sales, open_orders, pack, settings['satis_ay'], settings['kapsama_ay'])
+    df['Paket Adetleri'] = compact_numeric(pd.Series(pack, index=df.index))
+    for i, col in enumerate(SIPARIS_COLS):
+        df[col] = compact_numeric(pd.Series(orders[:, i], index=df.index))
+
+def order_settings_key(settings):
+    """Önbellek anahtarına giren ayarlar (paket serisi yerine dosya parmak izi)"""
+    return settings['satis_ay'], settings['kapsama_ay'], settings.get('paket_anahtari')
+
+@st.cache_data(show_spinner="Sipariş önerisi hesaplanıyor...", ttl=3600)
+def order_suggestions(data_key, _df, _settings):
+    """Eşleştirilmiş tabloya sipariş önerisi - data_key: girdi parmak izi + ayarlar (order_settings_key)"""
+    result_df = _df.copy()
+    apply_order_suggestions(result_df, _settings)
+    return result_df
+
+def order_settings():
+    """Kenar çubuğundaki sipariş önerisi ayarları; kapalıysa None"""
+    if not st.session_state.get('siparis_onerisi', False):
+        return None
+    settings = {
+        'satis_ay': st.session_state.get('siparis_satis_ay', SIPARIS_SATIS_AY),
+        'kapsama_ay': st.session_state.get('siparis_kapsama_ay', SIPARIS_KAPSAMA_AY),
+        'paket': None,
+        'paket_anahtari': None,
+    }
+    pack_file = st.session_state.get('paket_dosyasi')
+    if pack_file is not None:
+        try:
+            settings['paket_anahtari'] = file_fingerprint(pack_file)
+            settings['paket'] = load_pack_sizes(settings['paket_anahtari'], pack_file, pack_file.name)
+        except Exception as e:
+            st.error(f"❌ Paket adetleri dosyası okunamadı: {str(e)}")
+    return settings
+
+def render_order_summary(df):
+    """Şube bazında önerilen sipariş toplamları"""
+    available = [col for col in SIPARIS_COLS if col in df.columns]
+    if not available:
+        return
+    ordered = int((df[available].to_numpy() > 0).any(axis=1).sum())
+    st.info(f"🛒 Sipariş önerisi: {ordered:,} ürün")
+    for col in available:
+        st.write(f"  {col}: {df[col].sum():,.0f} adet")
+
+def prepare_export_frame(df):
+    """Çıktı için depo ve tedarikçi bakiye kolonlarını sayısala çevir ("-" -> 0)
+
+    Dönüş: (temizlenmiş kopya, temizlenen kolonlar)
+    """
+    df_clean = df.copy()
+    
+    # Depo ve tedarikçi bakiye kolonlarında "-" değerlerini 0'a çevir
+    depo_cols = [col for col in df_clean.columns if any(keyword in col for keyword in 
+               ['DEVIR', 'ALIŞ', 'SATIS', 'STOK', 'Depo Bakiye', 'Tedarikçi Bakiye'])]
+    
+    for col in depo_cols:
+        if col in df_clean.columns:
+            # Tip planından gelen sayısal kolonlar zaten temiz - metne çevirmeye gerek yok
+            if pd.api.types.is_numeric_dtype(df_clean[col]):
+                df_clean[col] = df_clean[col].fillna(0)
+                continue
+            
+            # Önce string'e çevir, sonra temizlik yap
+            df_clean[col] = df_clean[col].astype(str)
+            df_clean[col] = df_clean[col].replace('-', '0')
+            df_clean[col] = df_clean[col].replace('nan', '0')
+            df_clean[col] = df_clean[col].replace('None', '0')
+            
+            # Sayısal değerlere çevir
+            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+    
+    return df_clean, depo_cols
+
+def unique_column_names(columns):
+    """Tekrarlanan başlıkları pandas kuralıyla adlandır: 'not', 'not.1' (Parquet/Feather için)"""
+    seen = {}
+    names = []
+    for col in columns:
+        col = str(col)
+        names.append(col if col not in seen else f"{col}.{seen[col]}")
+        seen[col] = seen.get(col, 0) + 1
+    return names
+
+def write_csv_chunks(chunks, path, compress=False):
+    """Parçaları sırayla UTF-8 BOM'lu CSV'ye ekle (compress=True ise gzip) - başlık sadece ilk parçada"""
+    raw = gzip.GzipFile(path, 'wb', compresslevel=6, mtime=0) if compress else open(path, 'wb')
+    with raw, TextIOWrapper(raw, encoding='utf-8-sig', newline='') as text:
+        for chunk_num, chunk in enumerate(chunks):
+            chunk.to_csv(text, index=False, header=chunk_num == 0)
+
+def prepare_excel_frame(df, formula_mode='formul'):
+    """Excel çıktısı için temizlik - değer modunda Toplam Depo Bakiye temizlenmiş depo bakiyelerinden yeniden hesaplanır"""
+    df_clean, depo_cols = prepare_export_frame(df)
+    if formula_mode != 'formul' and 'Toplam Depo Bakiye' in df_clean.columns:
+        depo_bakiye_cols = [col for col in dict.fromkeys(df_clean.columns) if 'Depo Bakiye' in col and col != 'Toplam Depo Bakiye']
+        if depo_bakiye_cols:
+            df_clean['Toplam Depo Bakiye'] = df_clean[depo_bakiye_cols].sum(axis=1)
+    return df_clean, depo_cols
+
+def frame_to_parquet_bytes(df):
+    """Parquet çıktısı - tekrarlı başlıklar ve karışık tipli kolonlar düzeltilir"""
+    out = df.copy(deep=False)
+    out.columns = unique_column_names(out.columns)
+
+    # Boş hücreleri 0 olan metin kolonları (örn. ACIKLAMA) Parquet'te tek tipe çevrilir
+    for col in out.columns:
+        values = out[col].cat.categories if isinstance(out[col].dtype, pd.CategoricalDtype) else out[col]
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ('mixed', 'mixed-integer'):
+            out[col] = out[col].astype(str)
+
+    buffer = BytesIO()
+    out.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+# Hızlı çıktılarda CSV'ye tek seferde yazılan satır sayısı - tüm metin bellekte oluşturulmaz
+HIZLI_CIKTI_SATIR = 100_000
+
+def fast_export_path(data_key, extension):
+    """Hızlı çıktının disk önbelleğindeki yolu - tablonun parmak izinden"""
+    digest = hashlib.blake2b(repr(data_key).encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(onbellek.CACHE_DIR, 'cikti', f"{digest}.{extension}")
+
+def write_fast_export(df, path, extension):
+    """Excel dışı hızlı çıktıyı dosyaya yaz: UTF-8 BOM'lu CSV, gzip CSV veya Parquet
+
+    CSV satır dilimleri halinde akıtılır (write_csv_chunks). Önce geçici dosyaya yazılır.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
     try:
-        output = BytesIO()
-        
-        # DataFrame'i kopyala ve "-" değerlerini 0'a çevir
-        df_clean = df.copy()
+        if extension == 'parquet':
+            with open(tmp_path, 'wb') as f:
+                f.write(frame_to_parquet_bytes(prepare_export_frame(df)[0]))
+        else:
+            # Boş tabloda da başlık yazılsın diye en az bir dilim
+            chunks = (
+                prepare_export_frame(df.iloc[start:start + HIZLI_CIKTI_SATIR])[0]
+                for start in range(0, max(len(df), 1), HIZLI_CIKTI_SATIR)
+            )
+            write_csv_chunks(chunks, tmp_path, compress=extension == 'csv.gz')
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+def fast_export_data(data_key, df, extension):
+    """İndirme butonunun veri fonksiyonu - çıktı ilk tıklamada oluşturulur, sonra diskten okunur"""
+    def load():
+        path = fast_export_path(data_key, extension)
+        if not os.path.exists(path):
+            write_fast_export(df, path, extension)
+        with open(path, 'rb') as f:
+            return f.read()
+    return load
+
+def render_fast_downloads(data_key, df, file_prefix):
+    """CSV / gzip CSV / Parquet indirme butonları - her biçim sadece kendi butonuna tıklanınca oluşturulur"""
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M')
+    
+    formats = [
+        ('csv', '📄 CSV (UTF-8)', 'text/csv'),
+        ('csv.gz', '🗜️ CSV (gzip)', 'application/gzip'),
+        ('parquet', '🧱 Parquet', 'application/octet-stream')
+    ]
+    if not PARQUET_AVAILABLE:
+        formats = formats[:-1]
+    columns = st.columns(len(formats))
+    for column, (extension, label, mime) in zip(columns, formats):
+        with column:
+            st.download_button(
+                label=label,
+                data=fast_export_data(data_key, df, extension),
+                file_name=f"{file_prefix}_{timestamp}.{extension}",
+                mime=mime,
+                key=f"{file_prefix}_{extension}"
+            )
+
+def toplam_depo_formula_template(columns):
+    """Toplam Depo Bakiye formül şablonu - kolon harfleri bir kez çözülür
+
+    Dönüş: (Toplam Depo Bakiye kolon indeksi (0 tabanlı), '=SUM(AI{row},AJ{row},...)')
+    Kolonlar yoksa (None, None).
+    """
+    from openpyxl.utils import get_column_letter
+
+    columns = list(columns)
+    if 'Toplam Depo Bakiye' not in columns:
+        return None, None
+
+    # Doğru A1 harfleri (27. kolondan sonrası dahil: AA, AZ, BA...)
+    depo_letters = [
+        get_column_letter(columns.index(col) + 1)
+        for col in dict.fromkeys(columns)
+        if 'Depo Bakiye' in col and col != 'Toplam Depo Bakiye'
+    ]
+    if not depo_letters:
+        return None, None
+
+    toplam_col = len(columns) - 1 - columns[::-1].index('Toplam Depo Bakiye')
+    template = "=SUM(" + ",".join(f"{letter}{{row}}" for letter in depo_letters) + ")"
+    return toplam_col, template
+
+def _excel_column_writers(worksheet, df_clean):
+    """Kolon tipine göre yazıcı - hücre başına tip kontrolünden kaçınmak için"""
+    writers = []
+    for dtype in df_clean.dtypes:
+        if pd.api.types.is_bool_dtype(dtype):
+            writers.append(worksheet.write_boolean)
+        elif pd.api.types.is_numeric_dtype(dtype):
+            writers.append(worksheet.write_number)
+        elif isinstance(dtype, pd.StringDtype):
+            writers.append(worksheet.write_string)
+        elif isinstance(dtype, pd.CategoricalDtype) and pd.api.types.infer_dtype(dtype.categories) == 'string':
+            writers.append(worksheet.write_string)
+        else:
+            writers.append(worksheet.write)
+    return writers
+
+def write_excel_chunks(chunks, output, formula_mode='formul'):
+    """Temizlenmiş parçaları xlsxwriter constant_memory modunda tek sayfaya sırayla yaz
+
+    output: dosya yolu veya BytesIO. Başlık ilk parçanın kolonlarından yazılır; kolon
+    yazıcıları parça başına seçilir (parçalar arasında tip farkı olabilir).
+    """
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss'
+    })
+    try:
+        worksheet = workbook.add_worksheet('Sheet1')
+
+        # Başlık formatı - pandas to_excel ile aynı görünüm
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        text_format = workbook.add_format({'num_format': '@'})
+
+        row_num = 0
+        for df_clean in chunks:
+            if row_num == 0:
+                columns = list(df_clean.columns)
+
+                # Düzenlenmiş Ürün Kodu kolonuna metin formatı (kolon seviyesinde)
+                if 'Düzenlenmiş Ürün Kodu' in columns:
+                    text_col = columns.index('Düzenlenmiş Ürün Kodu')
+                    worksheet.set_column(text_col, text_col, None, text_format)
+
+                # Toplam Depo Bakiye formül şablonu - değer modunda formül yazılmaz
+                toplam_col, formula_template = toplam_depo_formula_template(columns)
+                if formula_mode != 'formul':
+                    formula_template = None
+
+                for col_num, col_name in enumerate(columns):
+                    worksheet.write_string(0, col_num, str(col_name), header_format)
+                row_num = 1
+
+            writers = _excel_column_writers(worksheet, df_clean)
+            for row in df_clean.itertuples(index=False, name=None):
+                for col_num, (writer, value) in enumerate(zip(writers, row)):
+                    # Boş değerler yazılmaz (pandas na_rep='' ile aynı)
+                    if value is None or value is pd.NA or value is pd.NaT or value != value:
+                        continue
+                    writer(row_num, col_num, value)
+
+                if formula_template is not None:
+                    toplam_value = row[toplam_col]
+                    worksheet.write_formula(
+                        row_num, toplam_col, formula_template.format(row=row_num + 1), None,
+                        toplam_value if isinstance(toplam_value, (int, float)) else 0
+                    )
+                row_num += 1
+    finally:
+        workbook.close()
+
+def write_excel_streaming(df_clean, formula_mode='formul'):
+    """xlsxwriter constant_memory modunda satır satır Excel yaz
+
+    Satırlar sırayla diske akıtılır, bellek kullanımı satır sayısından bağımsızdır.
+    Kolon formatları ve Toplam Depo Bakiye formülü veri yazılırken eklenir.
+    """
+    output = BytesIO()
+    write_excel_chunks([df_clean], output, formula_mode)
+    return output.getvalue()
+
+def write_excel_openpyxl(df_out, formula_mode='formul'):
+    """openpyxl ile Excel yaz (yedek yol)"""
+    output = BytesIO()
+
+    # Formüller toplu olarak kolona yerleştirilir, to_excel '=' ile başlayanları formül yazar
+    toplam_col, formula_template = toplam_depo_formula_template(df_out.columns)
+    if formula_mode == 'formul' and formula_template is not None:
+        df_out = df_out.copy()
+        df_out.isetitem(toplam_col, [formula_template.format(row=row_num) for row_num in range(2, len(df_out) + 2)])
+
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df_out.to_excel(writer, index=False, sheet_name='Sheet1')
         
-        # Depo ve tedarikçi bakiye kolonlarında "-" değerlerini 0'a çevir
-        depo_cols = [col for col in df_clean.columns if any(keyword in col for keyword in 
-                   ['DEVIR', 'ALIŞ', 'SATIS', 'STOK', 'Depo Bakiye', 'Tedarikçi Bakiye'])]
+        # Excel workbook ve worksheet'i al
+        worksheet = writer.sheets['Sheet1']
         
-        for col in depo_cols:
-            if col in df_clean.columns:
-                # Önce string'e çevir, sonra temizlik yap
-                df_clean[col] = df_clean[col].astype(str)
-                df_clean[col] = df_clean[col].replace('-', '0')
-                df_clean[col] = df_clean[col].replace('nan', '0')
-                df_clean[col] = df_clean[col].replace('None', '0')
-                
-                # Sayısal değerlere çevir
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+        # Düzenlenmiş Ürün Kodu kolonuna özel format uygula
+        for col_num, col_name in enumerate(df_out.columns, 1):
+            if col_name == 'Düzenlenmiş Ürün Kodu':
+                # Bu kolon için özel format: metin formatı
+                for row_num in range(2, len(df_out) + 2):  # Excel'de satır 1 başlık
+                    cell = worksheet.cell(row=row_num, column=col_num)
+                    cell.number_format = '@'  # Metin formatı
+                break
+
+    output.seek(0)
+    return output.getvalue()
+
+@st.cache_data(show_spinner="Excel oluşturuluyor...", ttl=1800)
+def format_excel_ultra_fast(data_key, _df, engine='xlsxwriter', formula_mode='formul'):
+    """Ultra hızlı Excel oluşturma - performans odaklı
+
+    data_key: tablonun parmak izi (tablo hash'lenmez).
+    formula_mode: 'formul' Toplam Depo Bakiye'yi =SUM formülü olarak, 'deger' ise
+    pandas'ta hesaplanmış toplam olarak yazar (dosya Excel'de daha hızlı açılır).
+    """
+    try:
+        # DataFrame'i kopyala ve "-" değerlerini 0'a çevir
+        df_clean, depo_cols = prepare_excel_frame(_df, formula_mode)
         
         # Debug: Temizlenen kolonları göster
         st.info(f"🔧 Temizlenen kolonlar: {len(depo_cols)} adet")
@@ -1267,112 +2080,195 @@ def format_excel_ultra_fast(df):
         if len(depo_cols) > 5:
             st.write(f"  ... ve {len(depo_cols)-5} kolon daha")
         
-        # Her zaman performans modu kullan - hız için
-        # Excel oluşturma ve özel format uygulama
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_clean.to_excel(writer, index=False, sheet_name='Sheet1')
-            
-            # Excel workbook ve worksheet'i al
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            
-            # Düzenlenmiş Ürün Kodu kolonuna özel format uygula
-            for col_num, col_name in enumerate(df_clean.columns, 1):
-                if col_name == 'Düzenlenmiş Ürün Kodu':
-                    # Bu kolon için özel format: metin formatı
-                    for row_num in range(2, len(df_clean) + 2):  # Excel'de satır 1 başlık
-                        cell = worksheet.cell(row=row_num, column=col_num)
-                        cell.number_format = '@'  # Metin formatı
-                    break
-            
-            # Toplam Depo Bakiye kolonuna formül ekle
-            toplam_depo_col = None
-            depo_bakiye_cols = []
-            
-            # Depo bakiye kolonlarını bul
-            for col_num, col_name in enumerate(df_clean.columns, 1):
-                if 'Depo Bakiye' in col_name and col_name != 'Toplam Depo Bakiye':
-                    depo_bakiye_cols.append(col_name)
-                elif col_name == 'Toplam Depo Bakiye':
-                    toplam_depo_col = col_num
-            
-            # Formül ekle
-            if toplam_depo_col and depo_bakiye_cols:
-                for row_num in range(2, len(df_clean) + 2):  # Excel'de satır 1 başlık
-                    cell = worksheet.cell(row=row_num, column=toplam_depo_col)
-                    
-                    # Formül oluştur: =SUM(Maslak Depo Bakiye:Bolu Depo Bakiye:İmes Depo Bakiye:Ankara Depo Bakiye:İkitelli Depo Bakiye)
-                    formula_parts = []
-                    for depo_col in depo_bakiye_cols:
-                        # Kolon harfini bul
-                        for col_idx, col_name in enumerate(df_clean.columns, 1):
-                            if col_name == depo_col:
-                                col_letter = chr(64 + col_idx)  # A=65, B=66, etc.
-                                if col_idx > 26:
-                                    col_letter = chr(64 + (col_idx // 26)) + chr(64 + (col_idx % 26))
-                                formula_parts.append(f"{col_letter}{row_num}")
-                                break
-                    
-                    if formula_parts:
-                        formula = f"=SUM({','.join(formula_parts)})"
-                        cell.value = formula
+        # Performans modu: xlsxwriter akış yazımı, hata olursa openpyxl ile devam
+        if engine == 'xlsxwriter':
+            try:
+                return write_excel_streaming(df_clean, formula_mode)
+            except Exception as e:
+                st.warning(f"⚠️ Hızlı Excel yazımı başarısız, openpyxl ile devam ediliyor: {str(e)}")
         
-        output.seek(0)
-        return output.getvalue()
+        # Excel oluşturma ve özel format uygulama (openpyxl)
+        return write_excel_openpyxl(df_clean, formula_mode)
     
     except Exception as e:
         # Hata durumunda da Excel oluştur
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-            
-            # Excel workbook ve worksheet'i al
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            
-            # Düzenlenmiş Ürün Kodu kolonuna özel format uygula
-            for col_num, col_name in enumerate(df.columns, 1):
-                if col_name == 'Düzenlenmiş Ürün Kodu':
-                    # Bu kolon için özel format: metin formatı
-                    for row_num in range(2, len(df) + 2):  # Excel'de satır 1 başlık
-                        cell = worksheet.cell(row=row_num, column=col_num)
-                        cell.number_format = '@'  # Metin formatı
-                    break
-            
-            # Toplam Depo Bakiye kolonuna formül ekle (hata durumunda)
-            toplam_depo_col = None
-            depo_bakiye_cols = []
-            
-            # Depo bakiye kolonlarını bul
-            for col_num, col_name in enumerate(df.columns, 1):
-                if 'Depo Bakiye' in col_name and col_name != 'Toplam Depo Bakiye':
-                    depo_bakiye_cols.append(col_name)
-                elif col_name == 'Toplam Depo Bakiye':
-                    toplam_depo_col = col_num
-            
-            # Formül ekle
-            if toplam_depo_col and depo_bakiye_cols:
-                for row_num in range(2, len(df) + 2):  # Excel'de satır 1 başlık
-                    cell = worksheet.cell(row=row_num, column=toplam_depo_col)
-                    
-                    # Formül oluştur
-                    formula_parts = []
-                    for depo_col in depo_bakiye_cols:
-                        # Kolon harfini bul
-                        for col_idx, col_name in enumerate(df.columns, 1):
-                            if col_name == depo_col:
-                                col_letter = chr(64 + col_idx)  # A=65, B=66, etc.
-                                if col_idx > 26:
-                                    col_letter = chr(64 + (col_idx // 26)) + chr(64 + (col_idx % 26))
-                                formula_parts.append(f"{col_letter}{row_num}")
-                                break
-                    
-                    if formula_parts:
-                        formula = f"=SUM({','.join(formula_parts)})"
-                        cell.value = formula
-        
-        output.seek(0)
-        return output.getvalue()
+        return write_excel_openpyxl(_df, formula_mode)
+
+# Parçalı (büyük dosya) modu - ana dosya satır partileri halinde okunur, dönüştürülür ve
+# ara Feather dosyalarına yazılır; bellek kullanımı dosya boyutuyla değil parça boyutuyla sınırlıdır
+PARCA_SATIR = 50_000
+PARCA_OMRU_SN = 6 * 3600
+PARCA_BICIMLERI = ('xlsx', 'csv', 'csv.gz')
+
+def parts_root():
+    """Parça dizinlerinin kökü - disk önbelleği dizini altında"""
+    return os.path.join(onbellek.CACHE_DIR, 'parcalar')
+
+def cleanup_parts(max_age=PARCA_OMRU_SN):
+    """Süresi geçmiş parça dizinlerini sil"""
+    root = parts_root()
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    now = time.time()
+    for name in names:
+        path = os.path.join(root, name)
+        try:
+            if now - os.stat(path).st_mtime > max_age:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+def transform_to_parts(uploaded_file, chunk_size=PARCA_SATIR, forecast=None):
+    """Ana dosyayı parça parça oku, dönüştür ve her parçayı ara dosyaya yaz
+
+    Dönüş: manifest {'dizin', 'parcalar', 'kolonlar', 'satir'} - aynı içerik ve parça
+    boyutu için parçalar tekrar üretilmez. Bilgi mesajları sadece ilk parça için gösterilir.
+    """
+    file_bytes = read_file_bytes(uploaded_file)
+    directory = os.path.join(parts_root(), onbellek.content_key(file_bytes, 'parca', chunk_size, TRANSFORM_INPUT_SCHEMA, forecast))
+    manifest_path = os.path.join(directory, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if all(os.path.exists(path) for path in manifest['parcalar']):
+            os.utime(directory)
+            return manifest
+
+    cleanup_parts()
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+    parts = []
+    columns = None
+    rows = 0
+    chunks = iter_excel_column_chunks(BytesIO(file_bytes), TRANSFORM_INPUT_SCHEMA, chunk_size, dtype={'URUNKODU': 'string'})
+    for chunk_num, chunk in enumerate(chunks):
+        transformed = transform_frame(chunk, notify=chunk_num == 0, forecast=forecast)
+        if len(transformed.columns) == 0:
+            raise ValueError(f"{chunk_num + 1}. parça dönüştürülemedi")
+        if columns is None:
+            columns = [str(col) for col in transformed.columns]
+        elif [str(col) for col in transformed.columns] != columns:
+            raise ValueError(f"{chunk_num + 1}. parçanın kolonları ilk parçadan farklı")
+
+        # Tekrarlı başlıklar (not, Toplam İsk...) Feather'a benzersiz adlarla yazılır, manifestten geri yüklenir
+        transformed.columns = unique_column_names(columns)
+        parts.append(onbellek.write_frame(os.path.join(directory, f'parca_{chunk_num:05d}'), transformed))
+        rows += len(transformed)
+        del chunk, transformed
+
+    manifest = {'dizin': directory, 'parcalar': parts, 'kolonlar': columns, 'satir': rows}
+
+    # Manifest en son yazılır - yarım kalan dizin tekrar kullanılmaz
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+def iter_parts(manifest, totals=None, order_config=None):
+    """Parçaları sırayla oku; totals verilirse tedarikçi bakiye katkıları satır ofsetiyle eklenir
+
+    order_config verilirse sipariş önerisi parça başına hesaplanır (satır bazlı - parçalar bağımsız).
+    """
+    offset = 0
+    for path in manifest['parcalar']:
+        chunk = onbellek.read_frame(path)
+        chunk.columns = manifest['kolonlar']
+        if totals is not None:
+            apply_contribution_totals(chunk, totals, offset)
+        if order_config is not None:
+            apply_order_suggestions(chunk, order_config)
+        offset += len(chunk)
+        yield chunk
+
+def match_parts(manifest, uploaded_files, delta=False):
+    """Parçalı modda marka eşleştirme - sadece eşleştirme kolonları birleştirilir
+
+    Dönüş: (şube başına katkı toplamları (iter_parts / write_parts'a verilir; CAT4 yoksa None), tanılama tablosu)
+    """
+    key_cols = [col for col in MATCH_KEY_COLS if col in manifest['kolonlar']]
+    keys_df = pd.concat(
+        [onbellek.read_frame(path, columns=key_cols) for path in manifest['parcalar']],
+        ignore_index=True
+    )
+    totals, diagnostics = collect_brand_contributions(keys_df, uploaded_files, delta)
+    del keys_df
+    if totals is None:
+        return None, diagnostics
+
+    # Tedarikçi bakiye toplamlarını göster
+    if any(total is not None for total in totals):
+        st.info("🔍 Tedarikçi Bakiye Toplamları:")
+        for col, total in zip(TEDARIKCI_BAKIYE_COLS, totals):
+            st.write(f"  {col}: {0 if total is None else total.sum():,.0f} adet")
+    return totals, diagnostics
+
+def write_parts(manifest, output_path, output_format='xlsx', formula_mode='formul', totals=None, order_config=None):
+    """Parçaları tek çıktı dosyasına sırayla yaz (xlsx, csv, csv.gz)
+
+    Parquet parçalı modda yazılmaz - parçaların kolon tipleri farklı olabilir.
+    """
+    if output_format not in PARCA_BICIMLERI:
+        raise ValueError(f"Parçalı modda {output_format} çıktısı desteklenmiyor ({', '.join(PARCA_BICIMLERI)})")
+
+    # Yarım kalmış dosya bırakmamak için önce geçici dosyaya yaz
+    tmp_path = f"{output_path}.tmp"
+    try:
+        if output_format == 'xlsx':
+            chunks = (prepare_excel_frame(chunk, formula_mode)[0] for chunk in iter_parts(manifest, totals, order_config))
+            write_excel_chunks(chunks, tmp_path, formula_mode)
+        else:
+            chunks = (prepare_export_frame(chunk)[0] for chunk in iter_parts(manifest, totals, order_config))
+            write_csv_chunks(chunks, tmp_path, compress=output_format == 'csv.gz')
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+def part_export_data(manifest, path, output_format, formula_mode, totals=None, order_config=None):
+    """Parçalı indirme butonunun veri fonksiyonu - çıktı ilk tıklamada parça dizinine yazılır"""
+    def load():
+        if not os.path.exists(path):
+            write_parts(manifest, path, output_format, formula_mode, totals, order_config)
+        with open(path, 'rb') as f:
+            return f.read()
+    return load
+
+def render_part_downloads(manifest, file_prefix, totals=None, order_config=None):
+    """Parçalı modda Excel ve gzip CSV indirme butonları - her çıktı sadece kendi butonuna tıklanınca yazılır"""
+    formula_mode = st.session_state.get('toplam_depo_mode', 'formul')
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M')
+
+    # Eşleştirilmiş çıktı adı katkı toplamlarından türetilir - farklı tedarikçi dosyaları ayrı dosyaya yazılır
+    variant = ''
+    if totals is not None:
+        digest = hashlib.blake2b(digest_size=8)
+        for total in totals:
+            digest.update(b'-' if total is None else total.tobytes())
+        if order_config is not None:
+            digest.update(repr(order_settings_key(order_config)).encode())
+        variant = f"_{digest.hexdigest()}"
+
+    formats = [
+        ('xlsx', f"📥 Excel ({manifest['satir']:,} satır)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+        ('csv.gz', '🗜️ CSV (gzip)', 'application/gzip')
+    ]
+    columns = st.columns(len(formats))
+    for column, (extension, label, mime) in zip(columns, formats):
+        mode_suffix = f"_{formula_mode}" if extension == 'xlsx' else ''
+        path = os.path.join(manifest['dizin'], f"{file_prefix}{variant}{mode_suffix}.{extension}")
+        with column:
+            st.download_button(
+                label=label,
+                data=part_export_data(manifest, path, extension, formula_mode, totals, order_config),
+                file_name=f"{file_prefix}_{timestamp}.{extension}",
+                mime=mime,
+                key=f"{file_prefix}_{extension}",
+                type="primary" if extension == 'xlsx' else "secondary"
+            )
 
 # Ana uygulama
 def main():
@@ -1385,6 +2281,12 @@ def main():
         st.success("✅ Sayfa başarıyla yeniden başlatıldı!")
         st.session_state.kerim_restarted = False
     
+    # Aşama ölçümü - kapalıyken olcum.stage blokları maliyetsiz
+    if st.session_state.get('olcum_aktif', False):
+        olcum.start_report()
+    else:
+        olcum.stop_report()
+    
     # Dosya yükleme alanı
     with st.expander("📤 ANA EXCEL DOSYASINI YÜKLEYİN", expanded=True):
         uploaded_file = st.file_uploader(
@@ -1393,22 +2295,58 @@ def main():
             key="main_file"
         )
     
-    if uploaded_file:
+    if uploaded_file and st.session_state.get('parcali_mod', False):
+        try:
+            # Büyük dosya modu - tablo hiçbir zaman tamamen belleğe alınmaz
+            with st.spinner("⚡ Dosya parça parça işleniyor..."):
+                with olcum.stage("Parçalı okuma + dönüşüm") as kayit:
+                    manifest = transform_to_parts(
+                        uploaded_file, st.session_state.get('parca_satir', PARCA_SATIR), forecast_settings()
+                    )
+                    kayit['satir_cikis'] = manifest['satir']
+                st.session_state.processed_data = None
+                st.session_state.processed_key = None
+                st.session_state.parca_manifest = manifest
+                
+                if manifest['satir'] > 0:
+                    st.success(f"✅ {manifest['satir']:,} satır {len(manifest['parcalar'])} parçada dönüştürüldü")
+                    render_part_downloads(manifest, "donusturulmus_veri")
+                else:
+                    st.warning("Dönüştürülecek veri bulunamadı.")
+        except Exception as e:
+            st.error(f"❌ Parçalı işlem hatası: {str(e)}")
+            st.error("💡 Çözüm: Cache temizleyin veya sayfayı yenileyin.")
+    
+    elif uploaded_file:
+        st.session_state.parca_manifest = None
         try:
             # Hızlı işlem akışı
             with st.spinner("⚡ Dosya işleniyor..."):
-                # 1. Hızlı okuma
-                df = load_data_ultra_fast(uploaded_file)
-
+                # 1. Hızlı okuma - sadece dönüşümde kullanılan kolonlar (akış modu)
+                main_key = stage_key(file_fingerprint(uploaded_file), 'ana', TRANSFORM_INPUT_SCHEMA)
+                with olcum.stage("Ana dosya okuma") as kayit:
+                    df = load_data_ultra_fast(main_key, uploaded_file, columns=TRANSFORM_INPUT_SCHEMA)
+                    kayit['satir_cikis'] = len(df)
                 
                 # 2. Hızlı dönüşüm
-                transformed_df = transform_data_ultra_fast(df)
+                with olcum.stage("Dönüşüm", rows_in=len(df)) as kayit:
+                    forecast = forecast_settings()
+                    transformed_df = transform_data_ultra_fast(main_key, df, forecast)
+                    kayit['satir_cikis'] = len(transformed_df)
+                transformed_key = transform_key(main_key, forecast)
                 st.session_state.processed_data = transformed_df
+                st.session_state.processed_key = transformed_key
                 
                 # 3. Hızlı Excel oluşturma
                 if transformed_df is not None and len(transformed_df) > 0:
+                    # Hızlı çıktılar Excel'den önce hazır olur
+                    render_fast_downloads(transformed_key, transformed_df, "donusturulmus_veri")
+                    
                     try:
-                        excel_data = format_excel_ultra_fast(transformed_df)
+                        with olcum.stage("Excel oluşturma", rows_in=len(transformed_df)):
+                            excel_data = format_excel_ultra_fast(
+                                transformed_key, transformed_df, formula_mode=st.session_state.get('toplam_depo_mode', 'formul')
+                            )
                         st.download_button(
                             label=f"📥 Dönüştürülmüş Veriyi İndir ({len(transformed_df):,} satır)",
                             data=excel_data,
@@ -1465,21 +2403,59 @@ def main():
     
     st.write(f"**Yüklenen dosya sayısı:** {uploaded_count}/7")
     
+    # Yüklenen dosyalar kullanıcı eşleştirme butonuna basmadan önce arka planda okunur
+    if uploaded_count > 0:
+        render_prefetch_status(uploaded_files)
+    
     # Güncelle butonu
     if uploaded_count > 0:
         if st.button("🚀 Ultra Hızlı Marka Eşleştirme Yap", type="primary"):
             try:
-                if st.session_state.processed_data is not None:
+                if st.session_state.get('parca_manifest') is not None:
+                    # Parçalı mod - katkılar sadece eşleştirme kolonlarından hesaplanır, çıktıya parça parça eklenir
+                    manifest = st.session_state.parca_manifest
+                    with st.spinner("⚡ Marka eşleştirme yapılıyor..."):
+                        with olcum.stage("Marka eşleştirme (parçalı)", rows_in=manifest['satir']):
+                            totals, diagnostics = match_parts(
+                                manifest, uploaded_files, st.session_state.get('delta_modu', False)
+                            )
+                    render_match_diagnostics(diagnostics, "eslestirilmis_veri")
+                    if totals is not None:
+                        with st.spinner("⚡ Final çıktılar oluşturuluyor..."):
+                            render_part_downloads(manifest, "eslestirilmis_veri", totals, order_settings())
+                elif st.session_state.processed_data is not None:
                     # Paralel marka eşleştirme işlemi
                     with st.spinner("⚡ Marka eşleştirme yapılıyor..."):
-                        final_df = match_brands_parallel(st.session_state.processed_data, uploaded_files)
+                        files_key = supplier_files_key(uploaded_files)
+                        with olcum.stage("Marka eşleştirme", rows_in=len(st.session_state.processed_data)) as kayit:
+                            final_df, diagnostics = match_brands_parallel(
+                                st.session_state.processed_key, st.session_state.processed_data, files_key, uploaded_files,
+                                st.session_state.get('delta_modu', False)
+                            )
+                            kayit['satir_cikis'] = len(final_df)
+                        final_key = stage_key(st.session_state.processed_key, 'eslestirme', files_key)
+                    render_match_diagnostics(diagnostics, "eslestirilmis_veri")
+                    
+                    # Sipariş önerisi - stok, satış ve açık tedarikçi siparişlerinden (kenar çubuğunda açılır)
+                    siparis = order_settings()
+                    if siparis is not None and len(final_df) > 0:
+                        final_key = stage_key(final_key, 'siparis', *order_settings_key(siparis))
+                        with olcum.stage("Sipariş önerisi", rows_in=len(final_df)):
+                            final_df = order_suggestions(final_key, final_df, siparis)
+                        render_order_summary(final_df)
 
                     
                     # Final Excel indirme butonu
                     if len(final_df) > 0:
+                        # Hızlı çıktılar Excel'den önce hazır olur
+                        render_fast_downloads(final_key, final_df, "eslestirilmis_veri")
+                        
                         try:
                             with st.spinner("⚡ Final Excel oluşturuluyor..."):
-                                final_excel_data = format_excel_ultra_fast(final_df)
+                                with olcum.stage("Final Excel oluşturma", rows_in=len(final_df)):
+                                    final_excel_data = format_excel_ultra_fast(
+                                        final_key, final_df, formula_mode=st.session_state.get('toplam_depo_mode', 'formul')
+                                    )
                                 st.download_button(
                                     label=f"📥 Eşleştirilmiş Veriyi İndir ({len(final_df):,} satır)",
                                     data=final_excel_data,
@@ -1536,12 +2512,162 @@ def sidebar():
         else:
             st.sidebar.error("❌ Cache temizleme başarısız!")
     
+    st.sidebar.markdown("---")
+    st.sidebar.header("📊 Excel Çıktısı")
+    st.sidebar.radio(
+        "Toplam Depo Bakiye",
+        options=['formul', 'deger'],
+        format_func=lambda mode: {'formul': 'Formül (=SUM)', 'deger': 'Sadece değer (daha hızlı açılır)'}[mode],
+        key='toplam_depo_mode'
+    )
+    
+    st.sidebar.markdown("---")
+    st.sidebar.header("🧩 Büyük Dosya Modu")
+    parcali = st.sidebar.checkbox(
+        "Parçalı işle",
+        key='parcali_mod',
+        help="Ana dosya satır partileri halinde dönüştürülür ve diske yazılır; bellek kullanımı dosya boyutundan bağımsızdır (Parquet çıktısı yok)"
+    )
+    if parcali:
+        st.sidebar.number_input(
+            "Parça boyutu (satır)", min_value=5_000, step=10_000, value=PARCA_SATIR, key='parca_satir'
+        )
+    
+    st.sidebar.markdown("---")
+    st.sidebar.header("🔁 Delta Modu")
+    st.sidebar.checkbox(
+        "Sadece değişen tedarikçi satırlarını işle",
+        key='delta_modu',
+        help="Tedarikçi dosyaları önceki çalıştırmanın satırlarıyla (PO, kod) karşılaştırılır; "
+             "sadece eklenen, silinen ve değişen satırlar işlenir"
+    )
+    
+    st.sidebar.markdown("---")
+    st.sidebar.header("📈 Talep Tahmini")
+    model = st.sidebar.selectbox(
+        "Ay kolonları için model",
+        [None] + list(TAHMIN_MODELLERI),
+        format_func=lambda model: 'Kapalı (0)' if model is None else TAHMIN_MODELLERI[model],
+        key='tahmin_modeli',
+        help="Önümüzdeki 2 ayın şube kolonları SATIS ve TOPL.FAT.ADT kolonlarından tahmin edilir"
+    )
+    if model is not None:
+        st.sidebar.number_input(
+            "Satış verisinin dönemi (ay)", min_value=1, max_value=36, value=SIPARIS_SATIS_AY, key='tahmin_satis_ay'
+        )
+        if model == 'ustel':
+            st.sidebar.number_input(
+                "TOPL.FAT.ADT dönemi (ay)", min_value=1, max_value=60, value=TAHMIN_FATURA_AY, key='tahmin_fatura_ay'
+            )
+            st.sidebar.slider(
+                "Son dönem ağırlığı (alfa)", min_value=0.05, max_value=1.0, value=TAHMIN_ALFA, step=0.05, key='tahmin_alfa'
+            )
+    
+    st.sidebar.markdown("---")
+    st.sidebar.header("🛒 Sipariş Önerisi")
+    siparis = st.sidebar.checkbox(
+        "Sipariş kolonlarını hesapla",
+        key='siparis_onerisi',
+        help="Şube sipariş önerisi = hedef stok (aylık satış × kapsama) - stok - tedarikçi bakiyesi, paket katına yuvarlanır"
+    )
+    if siparis:
+        st.sidebar.number_input(
+            "Satış verisinin dönemi (ay)", min_value=1, max_value=36, value=SIPARIS_SATIS_AY, key='siparis_satis_ay'
+        )
+        st.sidebar.number_input(
+            "Hedef stok (kaç aylık satış)", min_value=0.5, max_value=24.0, step=0.5,
+            value=float(SIPARIS_KAPSAMA_AY), key='siparis_kapsama_ay'
+        )
+        st.sidebar.file_uploader(
+            "Paket adetleri (URUNKODU, Paket Adedi)",
+            type=['csv', 'xlsx'],
+            key='paket_dosyasi',
+            help="Opsiyonel - bulunmayan ürünler adet bazında yuvarlanır"
+        )
+    
+    st.sidebar.markdown("---")
+    st.sidebar.header("🔗 Kod Eşlemeleri")
+    alias_file = st.sidebar.file_uploader(
+        "Onaylı eşlemeler (Marka, Tedarikçi Kodu, Ana Kod)",
+        type=['csv', 'xlsx'],
+        key='alias_import',
+        help="Fuzzy ile bulunamayan kodlar için elle eşleme; fuzzy sonuçlarından önce kullanılır"
+    )
+    if alias_file is not None and st.session_state.get('alias_import_id') != alias_file.file_id:
+        try:
+            if alias_file.name.lower().endswith('.csv'):
+                alias_df = pd.read_csv(alias_file, dtype=str, encoding='utf-8-sig')
+            else:
+                alias_df = pd.read_excel(alias_file, dtype=str)
+            saved, unknown = import_alias_rows(alias_df)
+            st.session_state.alias_import_id = alias_file.file_id
+            
+            # Eşleme değişti - marka katkıları (ve delta durumundaki çözümler) yeniden hesaplanmalı
+            tedarikci_delta.clear()
+            cached_brand_contribution.clear()
+            match_brands_parallel.clear()
+            st.sidebar.success(f"✅ {saved:,} eşleme kaydedildi")
+            if unknown:
+                st.sidebar.warning(f"⚠️ {unknown:,} satırın markası tanınmadı")
+        except Exception as e:
+            st.sidebar.error(f"❌ Eşleme dosyası okunamadı: {str(e)}")
+    
+    alias_count = kod_eslemeleri.count()
+    st.sidebar.caption(f"{alias_count:,} kayıtlı eşleme (fuzzy aramadan önce kullanılır)")
+    if alias_count:
+        st.sidebar.download_button(
+            label="📥 Eşlemeleri İndir (CSV)",
+            data=kod_eslemeleri.load_all().to_csv(index=False).encode('utf-8-sig'),
+            file_name="kod_eslemeleri.csv",
+            mime="text/csv",
+            key="alias_export"
+        )
+        if st.sidebar.button("Öğrenilmiş (fuzzy) eşlemeleri sil", type="secondary"):
+            kod_eslemeleri.clear(kod_eslemeleri.KAYNAK_FUZZY)
+            tedarikci_delta.clear()
+            st.rerun()
+    
+    st.sidebar.markdown("---")
+    st.sidebar.header("⏱️ Performans")
+    st.sidebar.checkbox(
+        "Aşama ölçümünü aç",
+        key='olcum_aktif',
+        help="Okuma, dönüşüm, marka eşleştirme ve Excel aşamalarının süre ve bellek kullanımını ölçer"
+    )
+    
     st.sidebar.markdown("---")
     st.sidebar.header("📋 Temel Kurallar")
     st.sidebar.write("• Boş satırlara 0 değeri atanır")
     st.sidebar.write("• Depo önekleri dönüştürülür")
     st.sidebar.write("• Kategori sütunları korunur")
 
+# Performans raporu - aşamalar main() içinde ölçüldüğü için en sonda çizilir
+def performance_panel():
+    report = olcum.current_report()
+    if report is None:
+        return
+    
+    with st.sidebar.expander("⏱️ Performans Raporu", expanded=False):
+        if not report['asamalar']:
+            st.write("Bu çalıştırmada ölçülen aşama yok.")
+            return
+        
+        stages_df = pd.DataFrame(report['asamalar']).rename(columns={
+            'asama': 'Aşama', 'sure_sn': 'Süre (sn)', 'cpu_sn': 'CPU (sn)',
+            'tepe_rss_mb': 'Tepe RSS (MB)', 'rss_artis_mb': 'RSS Artış (MB)',
+            'satir_giris': 'Giriş Satır', 'satir_cikis': 'Çıkış Satır', 'hata': 'Hata'
+        })
+        st.dataframe(stages_df, hide_index=True)
+        st.download_button(
+            label="📥 Raporu İndir (JSON)",
+            data=json.dumps(report, ensure_ascii=False, indent=2, default=str),
+            file_name=f"performans_raporu_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.json",
+            mime="application/json",
+            key="olcum_raporu"
+        )
+
 if __name__ == "__main__":
+    setup_page()
     sidebar()
-    main() 
\ No newline at end of file
+    main()
+    performance_panel() 
\ No newline at end of file
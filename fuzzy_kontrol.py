@@ -0,0 +1,103 @@
+"""Fuzzy eşleştirme regresyon kontrolü - trigram adaylı toplu puanlama vs. eski tek tek tarama
+
+Fuzzy adaptörlerin ana tabloda tam karşılığı olmayan kodları hem find_best_matches ile hem
+de eski yöntemle (tüm katalog kodları sırayla SequenceMatcher, eşit oranda ilk görülen kod)
+eşleştirilir. Farklı sonuç veren kodlar listelenir; fark varsa çıkış kodu 1 olur.
+
+Örnek:
+    python sentetik_veri.py --boyut 10k --dizin benchmark_veri
+    python fuzzy_kontrol.py benchmark_veri/10k
+"""
+import os
+import sys
+import argparse
+from difflib import SequenceMatcher
+
+from streamlit import config as st_config, logger as st_logger
+
+# Arayüz dışında Streamlit uyarıları gereksiz (bkz. toplu_islem.py)
+st_config.set_option('global.showWarningOnDirectExecution', False)
+st_logger.set_log_level('error')
+
+import SiparişOluşturma as app  # noqa: E402
+from toplu_islem import detect_supplier_files  # noqa: E402
+
+
+def reference_best_match(query, target_codes, threshold):
+    """Eski puanlama - tüm hedefler sırayla, sadece daha yüksek oran öncekinin yerini alır"""
+    best_match = None
+    best_ratio = 0
+    for target in target_codes:
+        if target == query:
+            return target, 1.0
+        ratio = SequenceMatcher(None, query, target).ratio()
+        if ratio > best_ratio and ratio >= threshold:
+            best_ratio = ratio
+            best_match = target
+    return best_match, best_ratio
+
+
+def unmatched_codes(result_df, brand_df, adapter, index_cache):
+    """Markanın ana tabloda tam karşılığı olmayan aranan kodları (fuzzy aramaya girenler)"""
+    brand_df = app.brand_columns(brand_df, adapter)
+    if brand_df is None:
+        return []
+    codes = adapter['code_normalizer'](brand_df[app.TEDARIKCI_KOD_KOLONU])
+    lookup_codes = app.CODE_NORMALIZERS[adapter['lookup_normalizer']](codes)
+    known_codes = set(app.get_code_index(result_df, index_cache, adapter['main_keys'])['kod'])
+    return [code for code in dict.fromkeys(lookup_codes) if code not in known_codes]
+
+
+def compare_dataset(directory, threshold=0.85):
+    """Veri setindeki fuzzy adaptörler için farklı sonuç veren kodlar: [(marka, kod, yeni, eski)]"""
+    main_bytes = app.read_file_bytes(os.path.join(directory, 'ana.xlsx'))
+    main_key = app.stage_key(app.file_fingerprint(main_bytes), 'ana', app.TRANSFORM_INPUT_SCHEMA)
+    main_df = app.load_data_ultra_fast(main_key, main_bytes, app.TRANSFORM_INPUT_SCHEMA)
+    result_df = app.transform_frame(main_df, notify=False)
+
+    supplier_files = detect_supplier_files(os.path.join(directory, 'tedarikci'))
+    parsed = app.parse_excel_files({key: app.read_file_bytes(path) for key, path in supplier_files.items()})
+
+    index_cache = {}
+    differences = []
+    checked = 0
+    for brand, adapter in app.BRAND_ADAPTERS.items():
+        brand_df = parsed.get(adapter['excel_key'])
+        if not adapter['fuzzy'] or brand_df is None or len(brand_df) == 0:
+            continue
+        codes = unmatched_codes(result_df, brand_df, adapter, index_cache)
+        fuzzy_index = app.get_fuzzy_index(result_df, index_cache)
+        matches = app.find_best_matches(codes, fuzzy_index, threshold=threshold)
+        for code in codes:
+            query = app.clean_product_code(code)
+            if not query:
+                continue
+            expected = reference_best_match(query, fuzzy_index['codes'], threshold)
+            actual = matches.get(code, (None, 0))
+            checked += 1
+            if actual[0] != expected[0]:
+                differences.append((brand, code, actual, expected))
+    return checked, differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzzy eşleştirme sonuçlarını eski puanlamayla karşılaştır.")
+    parser.add_argument('veri_setleri', nargs='+', help="sentetik_veri.py ile üretilen veri seti dizinleri")
+    parser.add_argument('--esik', type=float, default=0.85, help="Fuzzy eşik değeri")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for directory in args.veri_setleri:
+        checked, differences = compare_dataset(directory, args.esik)
+        for brand, code, actual, expected in differences:
+            print(f"❌ {brand} {code}: {actual[0]} ({actual[1]:.4f}) != eski {expected[0]} ({expected[1]:.4f})")
+        if differences:
+            failed = True
+            print(f"❌ {directory}: {len(differences)}/{checked} kod farklı", file=sys.stderr)
+        else:
+            print(f"✅ {directory}: {checked} kod eski puanlamayla aynı", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
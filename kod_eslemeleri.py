@@ -0,0 +1,151 @@
+"""Öğrenilmiş kod eşlemeleri - (marka, tedarikçi kodu) -> ana tablo kodu, yerel SQLite tablosu
+
+Kabul edilen fuzzy eşleşmeler ve kullanıcının onayladığı eşlemeler saklanır; sonraki
+çalıştırmalarda bu kodlar fuzzy aramaya girmeden birincil anahtar indeksinden çözülür.
+Kullanıcı eşlemeleri fuzzy sonuçlarıyla ezilmez. Kodlar markanın normalizasyonuyla saklanır.
+"""
+import os
+import sqlite3
+import datetime
+from contextlib import closing
+
+import pandas as pd
+
+# Veritabanı dosyası - disk önbelleğinin yanında, "Cache Temizle" ile silinmez. None ise yol her
+# çağrıda çözülür (SIPARIS_ALIAS_DB veya varsayılan); ölçüm ve testler geçici bir dosyaya yönlendirir
+DB_PATH = None
+
+
+def db_path():
+    """Eşleme veritabanının yolu - DB_PATH, yoksa SIPARIS_ALIAS_DB, yoksa kullanıcı önbelleği"""
+    if DB_PATH is not None:
+        return DB_PATH
+    return os.environ.get(
+        'SIPARIS_ALIAS_DB',
+        os.path.join(os.path.expanduser('~'), '.cache', 'siparis_olusturma', 'kod_eslemeleri.sqlite')
+    )
+
+KAYNAK_FUZZY = 'fuzzy'
+KAYNAK_KULLANICI = 'kullanici'
+
+# Tek sorguda aranan kod sayısı - SQLite değişken sınırının altında
+LOOKUP_BATCH = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kod_eslemeleri (
+    marka TEXT NOT NULL,
+    tedarikci_kodu TEXT NOT NULL,
+    ana_kod TEXT NOT NULL,
+    oran REAL,
+    kaynak TEXT NOT NULL,
+    guncelleme TEXT NOT NULL,
+    PRIMARY KEY (marka, tedarikci_kodu)
+) WITHOUT ROWID
+"""
+
+# Fuzzy sonucu kullanıcı eşlemesinin üzerine yazılmaz
+_UPSERT_FUZZY = """
+INSERT INTO kod_eslemeleri (marka, tedarikci_kodu, ana_kod, oran, kaynak, guncelleme)
+VALUES (?, ?, ?, ?, 'fuzzy', ?)
+ON CONFLICT (marka, tedarikci_kodu) DO UPDATE SET
+    ana_kod = excluded.ana_kod, oran = excluded.oran, guncelleme = excluded.guncelleme
+WHERE kod_eslemeleri.kaynak != 'kullanici'
+"""
+
+_UPSERT_KULLANICI = """
+INSERT OR REPLACE INTO kod_eslemeleri (marka, tedarikci_kodu, ana_kod, oran, kaynak, guncelleme)
+VALUES (?, ?, ?, NULL, 'kullanici', ?)
+"""
+
+COLUMN_LABELS = {
+    'marka': 'Marka', 'tedarikci_kodu': 'Tedarikçi Kodu', 'ana_kod': 'Ana Kod',
+    'oran': 'Oran', 'kaynak': 'Kaynak', 'guncelleme': 'Güncelleme'
+}
+
+
+def _connect():
+    path = db_path()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+def lookup(brand, codes):
+    """Kodların kayıtlı eşlemeleri: {tedarikçi kodu: (ana kod, oran)}; veritabanı yoksa boş"""
+    codes = list(codes)
+    if not codes or not os.path.exists(db_path()):
+        return {}
+    aliases = {}
+    try:
+        with closing(_connect()) as conn:
+            for start in range(0, len(codes), LOOKUP_BATCH):
+                batch = codes[start:start + LOOKUP_BATCH]
+                rows = conn.execute(
+                    "SELECT tedarikci_kodu, ana_kod, oran FROM kod_eslemeleri "
+                    f"WHERE marka = ? AND tedarikci_kodu IN ({','.join('?' * len(batch))})",
+                    [brand, *batch]
+                )
+                aliases.update((code, (target, ratio)) for code, target, ratio in rows)
+    except sqlite3.Error:
+        # Okunamayan veritabanı eşleştirmeyi durdurmaz - kodlar fuzzy aramaya gider
+        return {}
+    return aliases
+
+
+def store_fuzzy(brand, matches):
+    """Kabul edilen fuzzy eşleşmeleri kaydet - matches: {tedarikçi kodu: (ana kod, oran)}"""
+    if not matches:
+        return
+    now = _now()
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.executemany(
+                _UPSERT_FUZZY,
+                [(brand, code, target, float(ratio), now) for code, (target, ratio) in matches.items()]
+            )
+    except sqlite3.Error:
+        pass
+
+
+def store_confirmed(rows):
+    """Kullanıcı eşlemelerini kaydet - rows: [(marka, tedarikçi kodu, ana kod)]; dönüş: kayıt sayısı"""
+    now = _now()
+    with closing(_connect()) as conn, conn:
+        conn.executemany(_UPSERT_KULLANICI, [(brand, code, target, now) for brand, code, target in rows])
+    return len(rows)
+
+
+def load_all():
+    """Tüm eşlemeler (Türkçe kolon adlarıyla) - indirme ve gösterim için"""
+    if not os.path.exists(db_path()):
+        return pd.DataFrame(columns=list(COLUMN_LABELS.values()))
+    with closing(_connect()) as conn:
+        df = pd.read_sql_query("SELECT * FROM kod_eslemeleri ORDER BY marka, tedarikci_kodu", conn)
+    return df.rename(columns=COLUMN_LABELS)
+
+
+def count():
+    """Kayıtlı eşleme sayısı"""
+    if not os.path.exists(db_path()):
+        return 0
+    try:
+        with closing(_connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM kod_eslemeleri").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+
+
+def clear(source=None):
+    """Eşlemeleri sil - source verilirse sadece o kaynaktakiler ('fuzzy' / 'kullanici')"""
+    if not os.path.exists(db_path()):
+        return
+    with closing(_connect()) as conn, conn:
+        if source is None:
+            conn.execute("DELETE FROM kod_eslemeleri")
+        else:
+            conn.execute("DELETE FROM kod_eslemeleri WHERE kaynak = ?", (source,))
@@ -0,0 +1,107 @@
+"""Aşama bazlı süre ve bellek ölçümü
+
+Çalıştırma başında start_report() çağrılırsa `with stage(...)` blokları rapora
+süre, CPU süresi, tepe RSS ve satır sayılarını yazar. Rapor başlatılmadıysa stage()
+sadece boş bir sözlük verir - ölçüm kapalıyken ek maliyet yoktur.
+"""
+import os
+import sys
+import time
+import datetime
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# RSS örnekleme aralığı (saniye)
+RSS_SAMPLE_INTERVAL = 0.01
+
+# Aktif rapor - Streamlit her oturumun betiğini ayrı iş parçacığında çalıştırır
+_CURRENT_REPORT = contextvars.ContextVar('olcum_raporu', default=None)
+
+
+def current_rss():
+    """Sürecin anlık RSS değeri (bayt); /proc yoksa tepe değer"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _start_peak_sampler():
+    """Arka planda RSS örnekle; dönen fonksiyon örneklemeyi durdurup tepe değeri verir"""
+    peak = [current_rss()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            peak[0] = max(peak[0], current_rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    def stop():
+        done.set()
+        sampler.join()
+        return max(peak[0], current_rss())
+
+    return peak[0], stop
+
+
+@contextmanager
+def measure(name, rows_in=None):
+    """Bloğu ölç - rapordan bağımsız; satir_cikis çağıran tarafından doldurulur"""
+    record = {'asama': name, 'satir_giris': rows_in, 'satir_cikis': None}
+    start_rss, stop_sampler = _start_peak_sampler()
+    started = time.perf_counter()
+    started_cpu = time.process_time()
+    try:
+        yield record
+    except Exception as e:
+        record['hata'] = str(e)
+        raise
+    finally:
+        record['sure_sn'] = round(time.perf_counter() - started, 4)
+        record['cpu_sn'] = round(time.process_time() - started_cpu, 4)
+        peak_rss = stop_sampler()
+        record['tepe_rss_mb'] = round(peak_rss / 2**20, 1)
+        record['rss_artis_mb'] = round((peak_rss - start_rss) / 2**20, 1)
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Rapor aktifse bloğu ölçüp rapora ekle, değilse hiçbir şey yapma"""
+    report = _CURRENT_REPORT.get()
+    if report is None:
+        yield {}
+        return
+
+    record = {}
+    try:
+        with measure(name, rows_in) as record:
+            yield record
+    finally:
+        report['asamalar'].append(record)
+
+
+def start_report():
+    """Bu çalıştırma için yeni rapor başlat"""
+    report = {
+        'baslangic': datetime.datetime.now().isoformat(timespec='seconds'),
+        'cpu': os.cpu_count(),
+        'asamalar': []
+    }
+    _CURRENT_REPORT.set(report)
+    return report
+
+
+def stop_report():
+    """Ölçümü kapat - stage() blokları tekrar maliyetsiz olur"""
+    _CURRENT_REPORT.set(None)
+
+
+def current_report():
+    """Aktif rapor; ölçüm kapalıysa None"""
+    return _CURRENT_REPORT.get()
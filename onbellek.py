@@ -0,0 +1,179 @@
+"""Yüklenen dosyalar için içerik adresli disk önbelleği
+
+Ayrıştırılmış DataFrame'ler, yüklenen baytların özetiyle adlandırılan Feather
+dosyaları olarak saklanır; aynı dosya tekrar yüklendiğinde Excel hiç açılmaz.
+Dizin boyutu sınırlıdır, en uzun süredir kullanılmayan dosyalar silinir (LRU). Sınıra
+aynı dizin altındaki alt ağaçlar da (parcalar/, delta/, sema/) dahildir.
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+
+import pandas as pd
+
+# Önbellek dizini ve boyut sınırı - ortam değişkenleriyle değiştirilebilir
+CACHE_DIR = os.environ.get(
+    'SIPARIS_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'siparis_olusturma')
+)
+CACHE_MAX_BYTES = int(float(os.environ.get('SIPARIS_CACHE_MAX_MB', '2048')) * 1024 * 1024)
+
+# Okuyucu/dönüşüm mantığı değişirse eski kayıtları geçersiz kılmak için artırılır
+CACHE_VERSION = '1'
+
+_EXTENSIONS = ('.feather', '.pkl')
+
+
+def content_key(data, *params):
+    """Dosya baytları ve okuma parametrelerinden önbellek anahtarı üret"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(CACHE_VERSION.encode())
+    for param in params:
+        digest.update(repr(param).encode('utf-8'))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _entry_path(key, extension):
+    return os.path.join(CACHE_DIR, f"{key}{extension}")
+
+
+def write_frame(path_base, df):
+    """DataFrame'i Feather (olmazsa pickle) olarak atomik yaz - dönüş: yazılan dosya yolu
+
+    path_base uzantısız verilir; uzantıyı kullanılan biçim belirler.
+    """
+    directory = os.path.dirname(path_base) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        try:
+            df.reset_index(drop=True).to_feather(tmp_path)
+            extension = '.feather'
+        except Exception:
+            # Karışık tipli / tekrarlı kolon adları Feather'a yazılamaz
+            df.to_pickle(tmp_path)
+            extension = '.pkl'
+        path = path_base + extension
+        os.replace(tmp_path, path)
+        return path
+    finally:
+        _remove(tmp_path)
+
+
+def read_frame(path, columns=None):
+    """write_frame ile yazılmış dosyayı oku (Feather'da sadece istenen kolonlar okunur)"""
+    if path.endswith('.feather'):
+        return pd.read_feather(path, columns=columns)
+    df = pd.read_pickle(path)
+    return df[columns] if columns is not None else df
+
+
+def load_frame(key):
+    """Önbellekteki DataFrame'i oku; yoksa None"""
+    for extension in _EXTENSIONS:
+        path = _entry_path(key, extension)
+        if not os.path.exists(path):
+            continue
+        try:
+            df = read_frame(path)
+        except Exception:
+            # Bozuk kayıt - sil ve yeniden ayrıştırılsın
+            _remove(path)
+            return None
+
+        # LRU için son kullanım zamanını güncelle
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+    return None
+
+
+def has_frame(key):
+    """Anahtar için önbellek kaydı var mı (dosya okunmaz)"""
+    return any(os.path.exists(_entry_path(key, extension)) for extension in _EXTENSIONS)
+
+
+def store_frame(key, df):
+    """DataFrame'i önbelleğe yaz (Feather, olmazsa pickle) ve boyut sınırını uygula"""
+    if df is None or len(df.columns) == 0:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        write_frame(_entry_path(key, ''), df)
+        evict()
+    except OSError:
+        # Önbellek yazılamıyorsa sessizce devam et - işlem sonucu etkilenmez
+        pass
+
+
+def _cache_entries():
+    """Silinebilir kayıtlar: [(son kullanım, boyut, yol)]
+
+    Üst dizinde önbellek dosyaları; alt dizinlerde (parcalar/, delta/, sema/) her dosya ayrı
+    kayıttır, bir alt dizinin içindeki dizin (örn. bir dosyanın parçaları) tek kayıt olarak
+    birlikte silinir. Yazılmakta olan geçici dosyalar (.tmp) atlanır.
+    """
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if os.path.isfile(path):
+            if name.endswith(_EXTENSIONS):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+            continue
+        for child in os.listdir(path):
+            child_path = os.path.join(path, child)
+            if child.endswith('.tmp'):
+                continue
+            stat = os.stat(child_path)
+            if os.path.isdir(child_path):
+                entries.append((stat.st_mtime, _tree_size(child_path), child_path))
+            else:
+                entries.append((stat.st_mtime, stat.st_size, child_path))
+    return entries
+
+
+def _tree_size(directory):
+    total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def evict(max_bytes=None):
+    """Dizin boyutu (alt ağaçlar dahil) sınırı aşıyorsa en eski kullanılan kayıtları sil"""
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        entries = _cache_entries()
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            _remove(path)
+        total -= size
+
+
+def clear():
+    """Tüm disk önbelleğini temizle (alt ağaçlar dahil)"""
+    evict(max_bytes=0)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
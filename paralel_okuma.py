@@ -0,0 +1,185 @@
+"""Tedarikçi Excel dosyalarını süreç havuzunda okuma
+
+Streamlit betiği `__main__` içinde çalıştığı için alt süreçlere gönderilen
+fonksiyonlar ayrı, içe aktarılabilir bir modülde tutulur.
+"""
+import os
+import threading
+import multiprocessing as mp
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from sema_kaydi import normalize_header
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow yoksa DataFrame doğrudan pickle ile döner
+    pa = None
+
+# Uygulama boyunca tek süreç havuzu - her çalıştırmada yeniden başlatılmaz
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# Arka plan ön okuma işleri - anahtar başına tek iş; alınmayan bitmiş işlerden en fazla bu kadarı tutulur
+PREFETCH_MAX_DONE = 16
+_PREFETCH = {}
+_PREFETCH_LOCK = threading.Lock()
+_PREFETCH_EXECUTOR = None
+
+
+def read_excel_bytes(data, columns=None):
+    """Excel içeriğini oku (marka dosyaları için standart ayarlar)
+
+    columns: normalize başlık adları kümesi (sema_kaydi.candidate_names) - verilirse sadece
+    bu başlıklara sahip kolonlar oluşturulur.
+    """
+    return pd.read_excel(
+        BytesIO(data),
+        engine='openpyxl',
+        na_filter=False,
+        keep_default_na=False,
+        usecols=None if columns is None else (lambda name: normalize_header(name) in columns)
+    )
+
+
+def frame_to_payload(df):
+    """DataFrame'i ana sürece aktarılacak biçime çevir (mümkünse Arrow IPC)"""
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return ('arrow', sink.getvalue().to_pybytes())
+        except (pa.ArrowException, TypeError, ValueError):
+            # Karışık tipli kolonlar (örn. boş hücre '' + sayı) Arrow'a çevrilemez
+            pass
+    return ('pandas', df)
+
+
+def frame_from_payload(payload):
+    """frame_to_payload çıktısını DataFrame'e geri çevir"""
+    kind, data = payload
+    if kind == 'arrow':
+        return pa.ipc.open_stream(data).read_all().to_pandas()
+    return data
+
+
+def parse_excel_payload(data, columns=None):
+    """Alt süreç görevi: Excel'i oku ve aktarım biçimine çevir"""
+    try:
+        return frame_to_payload(read_excel_bytes(data, columns))
+    except Exception:
+        return ('pandas', pd.DataFrame())
+
+
+def get_process_pool():
+    """Paylaşılan süreç havuzu - çekirdek sayısı kadar işçi"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: çok iş parçacıklı Streamlit sunucusunda fork güvenli değil
+            _POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=mp.get_context('spawn')
+            )
+        return _POOL
+
+
+def reset_process_pool():
+    """Bozulan havuzu kapat - bir sonraki çağrıda yeniden oluşturulur"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+
+def _prefetch_job(data, on_ready, columns):
+    """Ön okuma işi: çok çekirdekte süreç havuzunda, tek çekirdekte bu iş parçacığında ayrıştır"""
+    payload = None
+    if (os.cpu_count() or 1) > 1:
+        try:
+            payload = get_process_pool().submit(parse_excel_payload, data, columns).result()
+        except BrokenProcessPool:
+            reset_process_pool()
+    if payload is None:
+        payload = parse_excel_payload(data, columns)
+
+    df = frame_from_payload(payload)
+    if on_ready is not None and len(df.columns) > 0:
+        on_ready(df)
+    return df
+
+
+def prefetch_excel(key, data, on_ready=None, columns=None):
+    """Dosyayı arka planda ayrıştırmaya başla - aynı anahtar için iş tekrar başlatılmaz
+
+    on_ready(df) ayrıştırma başarılıysa arka plan iş parçacığında çağrılır (örn. disk önbelleğine yazma).
+    columns: okunacak normalize başlıklar (bkz. read_excel_bytes); anahtar bu kümeyi de içermelidir.
+    Dönüş: Future (sonuç DataFrame; okunamazsa boş DataFrame)
+    """
+    global _PREFETCH_EXECUTOR
+    with _PREFETCH_LOCK:
+        future = _PREFETCH.get(key)
+        if future is not None:
+            return future
+
+        # Alınmayan eski sonuçlar bellekte birikmesin (dict ekleme sırasını korur)
+        done_keys = [done_key for done_key, done in _PREFETCH.items() if done.done()]
+        for done_key in done_keys[:max(0, len(done_keys) - PREFETCH_MAX_DONE + 1)]:
+            del _PREFETCH[done_key]
+
+        if _PREFETCH_EXECUTOR is None:
+            _PREFETCH_EXECUTOR = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1, thread_name_prefix='on_okuma'
+            )
+        future = _PREFETCH_EXECUTOR.submit(_prefetch_job, data, on_ready, columns)
+        _PREFETCH[key] = future
+        return future
+
+
+def prefetch_status(key):
+    """Ön okuma durumu: None (iş yok), 'okunuyor', 'hazir' veya 'hata' (dosya okunamadı)"""
+    with _PREFETCH_LOCK:
+        future = _PREFETCH.get(key)
+    if future is None:
+        return None
+    if not future.done():
+        return 'okunuyor'
+    if future.exception() is not None or len(future.result().columns) == 0:
+        return 'hata'
+    return 'hazir'
+
+
+def take_prefetched(key):
+    """Ön okuma işini kayıttan çıkar ve döndür (Future); iş yoksa None"""
+    with _PREFETCH_LOCK:
+        return _PREFETCH.pop(key, None)
+
+
+def parse_excel_files(files, columns=None):
+    """Her farklı dosyayı tam bir kez, süreç havuzunda paralel oku
+
+    files: {anahtar: bytes} -> {anahtar: DataFrame}
+    columns: {anahtar: okunacak normalize başlıklar} - anahtarı olmayan dosyaların tüm kolonları okunur
+    """
+    if not files:
+        return {}
+    columns = columns or {}
+
+    # Tek dosyada havuz başlatma maliyetine gerek yok
+    if len(files) == 1 or (os.cpu_count() or 1) == 1:
+        return {key: frame_from_payload(parse_excel_payload(data, columns.get(key))) for key, data in files.items()}
+
+    try:
+        pool = get_process_pool()
+        futures = {key: pool.submit(parse_excel_payload, data, columns.get(key)) for key, data in files.items()}
+        return {key: frame_from_payload(future.result()) for key, future in futures.items()}
+    except BrokenProcessPool:
+        # Havuz kullanılamıyorsa aynı süreçte oku
+        reset_process_pool()
+        return {key: frame_from_payload(parse_excel_payload(data, columns.get(key))) for key, data in files.items()}
@@ -0,0 +1,173 @@
+"""Aşama bazlı performans ölçümü - süre, tepe bellek (RSS) ve eşleşme sayıları JSON olarak
+
+Her veri seti için okuma (load_data_ultra_fast), dönüşüm (transform_data_ultra_fast),
+marka eşleştirme (match_brands_parallel - toplam ve marka bazında) ve Excel yazımı
+(format_excel_ultra_fast) ayrı ayrı ölçülür. Önbellekler her aşamadan önce boşaltılır,
+disk önbelleği ve kod eşleme veritabanı geçici bir dizine yönlendirilir (kullanıcının
+eşlemelerine yazılmaz); ölçümler soğuk çalıştırmayı gösterir.
+
+Örnek:
+    python sentetik_veri.py --boyut 10k 100k --dizin benchmark_veri
+    python performans_olcumu.py benchmark_veri/10k benchmark_veri/100k -o sonuc.json
+"""
+import os
+import sys
+import json
+import shutil
+import platform
+import tempfile
+import argparse
+import datetime
+
+import numpy as np
+
+from streamlit import config as st_config, logger as st_logger
+
+# Arayüz dışında Streamlit uyarıları gereksiz (bkz. toplu_islem.py)
+st_config.set_option('global.showWarningOnDirectExecution', False)
+st_logger.set_log_level('error')
+
+import olcum  # noqa: E402
+import onbellek  # noqa: E402
+import kod_eslemeleri  # noqa: E402
+import SiparişOluşturma as app  # noqa: E402
+from toplu_islem import detect_supplier_files  # noqa: E402
+
+
+def measure(stage_fn, *args):
+    """Aşamayı çalıştır; sonucu ve olcum.measure kaydını (süre, CPU, tepe RSS) döndür"""
+    with olcum.measure(getattr(stage_fn, '__name__', str(stage_fn))) as record:
+        result = stage_fn(*args)
+    return result, record
+
+
+def clear_stage_caches():
+    """Aşama önbelleklerini boşalt - her ölçüm soğuk başlasın (disk önbelleği ve eşlemeler geçici dizinde)
+
+    Öğrenilmiş kod eşlemeleri de silinir; marka ölçümleri önceki aşamanın fuzzy sonuçlarıyla ısınmaz.
+    """
+    for fn in (app.load_data_ultra_fast, app.load_brand_data_parallel, app.transform_data_ultra_fast,
+               app.match_brands_parallel, app.cached_brand_contribution, app.format_excel_ultra_fast):
+        fn.clear()
+    onbellek.clear()
+    kod_eslemeleri.clear()
+
+
+def brand_breakdown(result_df, supplier_bytes):
+    """Marka bazında eşleştirme süresi ve eşleşen satır/adet sayıları"""
+    parsed = app.load_brand_data_parallel(app.supplier_files_key(supplier_bytes), supplier_bytes)
+    index_cache = {}
+    brands = {}
+    for brand, adapter in app.BRAND_ADAPTERS.items():
+        brand_df = parsed.get(adapter['excel_key'])
+        if brand_df is None or len(brand_df) == 0:
+            continue
+
+        # match_brands_parallel ile aynı CAT4 kapısı
+        cat4_rows = int(np.logical_or.reduce([
+            result_df['CAT4'].astype(str).str.contains(term, case=False, na=False).to_numpy()
+            for term in adapter['cat4_terms']
+        ]).sum())
+
+        # Her marka öğrenilmiş eşlemeler olmadan ölçülür (aynı dosyayı kullanan markalar ısınmasın)
+        kod_eslemeleri.clear()
+        contribution, stats = measure(
+            app.compute_brand_contribution, result_df, brand, brand_df, adapter, index_cache
+        )
+        if contribution is not None:
+            values = contribution[0]
+            stats['eslesen_satir'] = int((values != 0).any(axis=1).sum())
+            stats['eslesen_adet'] = float(values.sum())
+        stats['tedarikci_satir'] = len(brand_df)
+        stats['cat4_satir'] = cat4_rows
+        brands[brand] = stats
+    return brands
+
+
+def benchmark_dataset(directory, formula_mode='formul'):
+    """Tek veri seti (ana.xlsx + tedarikci/) için aşama ölçümleri
+
+    Disk önbelleği ve kod eşleme veritabanı ölçüm boyunca geçici dizine yönlendirilir -
+    kullanıcının önbelleğine ve eşlemelerine dokunulmaz.
+    """
+    user_cache_dir, user_db_path = onbellek.CACHE_DIR, kod_eslemeleri.DB_PATH
+    onbellek.CACHE_DIR = tempfile.mkdtemp(prefix='siparis_olcum_')
+    kod_eslemeleri.DB_PATH = os.path.join(onbellek.CACHE_DIR, 'kod_eslemeleri.sqlite')
+    try:
+        return _benchmark_dataset(directory, formula_mode)
+    finally:
+        shutil.rmtree(onbellek.CACHE_DIR, ignore_errors=True)
+        onbellek.CACHE_DIR = user_cache_dir
+        kod_eslemeleri.DB_PATH = user_db_path
+
+
+def _benchmark_dataset(directory, formula_mode):
+    main_path = os.path.join(directory, 'ana.xlsx')
+    supplier_files = detect_supplier_files(os.path.join(directory, 'tedarikci'))
+    main_bytes = app.read_file_bytes(main_path)
+    supplier_bytes = {key: app.read_file_bytes(path) for key, path in supplier_files.items()}
+
+    # Aşama önbellek anahtarları - uygulamadaki gibi içerik özeti + aşama parametreleri
+    main_key = app.stage_key(app.file_fingerprint(main_bytes), 'ana', app.TRANSFORM_INPUT_SCHEMA)
+    transformed_key = app.transform_key(main_key)
+    files_key = app.supplier_files_key(supplier_bytes)
+    final_key = app.stage_key(transformed_key, 'eslestirme', files_key)
+
+    stages = {}
+    clear_stage_caches()
+    df, stages['okuma'] = measure(app.load_data_ultra_fast, main_key, main_bytes, app.TRANSFORM_INPUT_SCHEMA)
+    transformed, stages['donusum'] = measure(app.transform_data_ultra_fast, main_key, df)
+    clear_stage_caches()
+    (final_df, _), stages['eslestirme'] = measure(
+        app.match_brands_parallel, transformed_key, transformed, files_key, supplier_bytes
+    )
+    clear_stage_caches()
+    stages['marka'] = brand_breakdown(transformed, supplier_bytes)
+    _, stages['excel'] = measure(app.format_excel_ultra_fast, final_key, final_df, 'xlsxwriter', formula_mode)
+
+    tedarikci_cols = [col for col in app.TEDARIKCI_BAKIYE_COLS if col in final_df.columns]
+    return {
+        'veri_seti': directory,
+        'ana_satir': len(df),
+        'ana_dosya_mb': round(len(main_bytes) / 2**20, 2),
+        'tedarikci_dosyalari': sorted(supplier_files),
+        'asamalar': stages,
+        'tedarikci_bakiye_toplamlari': {col: float(final_df[col].sum()) for col in tedarikci_cols},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aşama bazlı süre ve bellek ölçümü (JSON).")
+    parser.add_argument('veri_setleri', nargs='+', help="sentetik_veri.py ile üretilen veri seti dizinleri")
+    parser.add_argument('-o', '--cikti', help="JSON çıktı dosyası (varsayılan: standart çıktı)")
+    parser.add_argument('--toplam-depo', choices=['formul', 'deger'], default='formul')
+    args = parser.parse_args(argv)
+
+    report = {
+        'tarih': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpu': os.cpu_count(),
+        'sonuclar': [],
+    }
+    for directory in args.veri_setleri:
+        result = benchmark_dataset(directory, args.toplam_depo)
+        report['sonuclar'].append(result)
+        stages = result['asamalar']
+        print(
+            f"✅ {directory}: okuma {stages['okuma']['sure_sn']:.2f} sn, "
+            f"dönüşüm {stages['donusum']['sure_sn']:.2f} sn, "
+            f"eşleştirme {stages['eslestirme']['sure_sn']:.2f} sn, "
+            f"excel {stages['excel']['sure_sn']:.2f} sn",
+            file=sys.stderr
+        )
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.cikti:
+        with open(args.cikti, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
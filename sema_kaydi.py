@@ -0,0 +1,145 @@
+"""Kolon şeması kaydı - başlık satırından mantıksal kolonların dosyadaki pozisyonları
+
+Şema {mantıksal kolon: adaylar} sözlüğüdür. Aday ya başlık adıdır (önce birebir, sonra
+büyük/küçük harf ve Türkçe karakter duyarsız eşleşme) ya da IceriyorKurali (başlık
+desenlerden birini ve anahtar kelimeyi içeriyorsa). Başlık satırı bir kez indekslenir,
+tüm mantıksal kolonlar birlikte çözülür. Sonuç başlık parmak izi + şema özetiyle bellekte
+ve disk önbelleği altında (sema/) JSON olarak saklanır; aynı başlıklı dosyalar sonraki
+çalıştırmalarda tekrar çözülmez.
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import namedtuple
+
+import onbellek
+
+# Başlık, desenlerden herhangi birini ve anahtar kelimeyi içeriyorsa eşleşir (normalize edilmiş)
+IceriyorKurali = namedtuple('IceriyorKurali', ['desenler', 'anahtar'])
+
+# Çözümleme mantığı (_resolve) değişirse eski kayıtları geçersiz kılmak için artırılır
+SEMA_VERSION = '1'
+
+# Türkçe karakterler büyük harfe çevrildikten sonra ASCII karşılıklarına indirgenir
+_TURKCE = str.maketrans('İŞĞÜÖÇ', 'ISGUOC')
+
+# Süreç içi sonuçlar - (şema özeti, başlık parmak izi) -> {mantıksal kolon: pozisyon}
+_MEMO = {}
+_MEMO_LOCK = threading.Lock()
+
+
+def normalize_header(name):
+    """Başlığı karşılaştırma biçimine getir: baş/son boşluksuz, büyük harf, Türkçe karaktersiz"""
+    return str(name).strip().upper().translate(_TURKCE)
+
+
+def header_fingerprint(header):
+    """Başlık satırının özeti - sıra ve adlar (boş hücreler dahil)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in header:
+        digest.update(b'\x1f' + ('' if name is None else str(name)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def schema_key(schema):
+    """Şemanın özeti - adaylar veya SEMA_VERSION değişince kayıtlı eşlemeler kullanılmaz"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(SEMA_VERSION.encode())
+    digest.update(repr(sorted(schema.items())).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _resolve(header, schema):
+    """Tek tarama: başlık indeksleri kurulur, her mantıksal kolon ilk eşleşen adayına çözülür"""
+    exact = {}
+    normalized = {}
+    names = []
+    for pos, name in enumerate(header):
+        if name is None:
+            names.append(None)
+            continue
+        exact.setdefault(str(name), pos)
+        names.append(normalize_header(name))
+        normalized.setdefault(names[-1], pos)
+
+    positions = {}
+    for logical, candidates in schema.items():
+        for candidate in candidates:
+            if isinstance(candidate, IceriyorKurali):
+                pos = next((
+                    pos for pos, name in enumerate(names)
+                    if name is not None and candidate.anahtar in name
+                    and any(pattern in name for pattern in candidate.desenler)
+                ), None)
+            else:
+                pos = exact.get(candidate, normalized.get(normalize_header(candidate)))
+            if pos is not None:
+                positions[logical] = pos
+                break
+    return positions
+
+
+def _registry_path(key, fingerprint):
+    return os.path.join(onbellek.CACHE_DIR, 'sema', f"{key}_{fingerprint}.json")
+
+
+def resolve(header, schema):
+    """Mantıksal kolonların başlıktaki pozisyonları: {mantıksal kolon: pozisyon}; bulunamayanlar yok"""
+    header = list(header)
+    memo_key = (schema_key(schema), header_fingerprint(header))
+    with _MEMO_LOCK:
+        positions = _MEMO.get(memo_key)
+    if positions is not None:
+        return dict(positions)
+
+    path = _registry_path(*memo_key)
+    try:
+        with open(path, encoding='utf-8') as f:
+            positions = json.load(f)
+        os.utime(path)  # disk önbelleğinin LRU sınırı için
+    except (OSError, ValueError):
+        positions = _resolve(header, schema)
+        _write_registry(path, positions)
+
+    with _MEMO_LOCK:
+        _MEMO[memo_key] = positions
+    return dict(positions)
+
+
+def _write_registry(path, positions):
+    """Eşlemeyi atomik yaz - yazılamazsa sadece süreç içinde tutulur"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(positions, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def select_columns(df, schema):
+    """DataFrame'den şemanın kolonlarını seç ve mantıksal adlarla yeniden adlandır (dosya sırasıyla)"""
+    positions = resolve(df.columns, schema)
+    selected = sorted(positions, key=positions.get)
+    result = df.iloc[:, [positions[logical] for logical in selected]]
+    result.columns = selected
+    return result
+
+
+def candidate_names(schemas):
+    """Şemalardaki başlık adaylarının normalize kümesi - okuyucunun kolon filtresi için
+
+    Şemalardan biri IceriyorKurali içeriyorsa None (eşleşecek başlıklar önceden bilinemez,
+    tüm kolonlar okunmalı).
+    """
+    names = set()
+    for schema in schemas:
+        for candidates in schema.values():
+            for candidate in candidates:
+                if isinstance(candidate, IceriyorKurali):
+                    return None
+                names.add(normalize_header(candidate))
+    return frozenset(names)
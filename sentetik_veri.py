@@ -0,0 +1,262 @@
+"""Performans ölçümü için sentetik ana ERP çıktısı ve 7 tedarikçi dosyası üretimi
+
+Ana dosya gerçek çıktının kolonlarını taşır: önekli URUNKODU, CAT1-7 (CAT4 marka),
+depo kolonları (02-, 04-, D01-, A01-, TD-E01-) ve fiyat/döviz bilgileri. Tedarikçi
+dosyaları ana dosyadaki kodlardan örneklenir; PO numaraları, şube kodları ve kod
+yazımları (boşluklu, LF: önekli, VALE- önekli, bir karakteri bozuk) gerçek dosyalardaki
+gibi karışıktır.
+
+Örnek:
+    python sentetik_veri.py --boyut 10k 100k --dizin benchmark_veri
+    -> benchmark_veri/10k/ana.xlsx, benchmark_veri/10k/tedarikci/*.xlsx
+"""
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BOYUTLAR = {'10k': 10_000, '100k': 100_000, '500k': 500_000, '1m': 1_000_000}
+
+# Ana dosyadaki depo önekleri (E01- sadece eski çıktılarda var)
+DEPO_ONEKLERI = ('02-', '04-', 'D01-', 'A01-', 'TD-E01-')
+DEPO_TIPLERI = ('DEVIR', 'ALIS', 'STOK', 'SATIS')
+
+# (CAT4 değeri, URUNKODU öneki, ağırlık) - tedarikçisi olmayan markalar da karışık
+MARKALAR = (
+    ('SCHAEFFLER LUK', 'LUK', 10),
+    ('SCHAFLERR', 'INA', 2),
+    ('LEMFÖRDER', 'LEM', 8),
+    ('TRW', 'TRW', 8),
+    ('SACHS', 'SAC', 6),
+    ('DELPHI', 'DEL', 8),
+    ('VALEO', 'VAL', 8),
+    ('FILTRON', 'FIL', 6),
+    ('MANN', 'MAN', 6),
+    ('BOSCH', 'BOS', 14),
+    ('NGK', 'NGK', 8),
+    ('SKF', 'SKF', 8),
+    ('FEBI', 'FEB', 8),
+)
+
+# Dosya adları toplu_islem.py'nin tedarikçi eşlemesiyle uyumlu
+TEDARIKCI_DOSYALARI = {
+    'excel1': 'schaeffler_luk.xlsx',
+    'excel2': 'zf_ithal.xlsx',
+    'excel3': 'delphi.xlsx',
+    'excel4': 'zf_yerli.xlsx',
+    'excel5': 'valeo.xlsx',
+    'excel6': 'filtron.xlsx',
+    'excel7': 'mann.xlsx',
+}
+
+PO_SUBE_KODLARI = ('285', 'IME', '321', 'ANK', '322', '323', '324', 'IKI', 'STK')
+ZF_SUBE_KODLARI = PO_SUBE_KODLARI + ('İST', 'IST')
+DELPHI_SUBELERI = (
+    'Teknik Dizel-Bolu', 'Teknik Dizel-Ümraniye', 'Teknik Dizel-Maslak',
+    'Teknik Dizel-Ankara', 'Teknik Dizel-İkitelli', 'Teknik Dizel-Merkez',
+)
+MANN_FILTRON_SUBE_KODLARI = ('AAS', 'DAS', 'BAS', 'MAS', 'EAS', 'XAS')
+
+
+def _zfill(values, width):
+    return pd.Series(values).astype(str).str.zfill(width)
+
+
+def brand_codes(brand, ids):
+    """Markaya özgü kod biçimi (Düzenlenmiş Ürün Kodu karşılığı)"""
+    if brand in ('SCHAEFFLER LUK', 'SCHAFLERR'):
+        return '6' + _zfill(ids % 10**8, 8)
+    if brand == 'LEMFÖRDER':
+        return _zfill(ids % 10**7, 7)
+    if brand == 'TRW':
+        return 'GDB' + _zfill(ids, 6)
+    if brand == 'SACHS':
+        return '3000' + _zfill(ids % 10**6, 6)
+    if brand == 'DELPHI':
+        return 'HDB' + _zfill(ids, 6)
+    if brand == 'VALEO':
+        return _zfill(ids, 6)
+    if brand == 'FILTRON':
+        return 'OP' + _zfill(ids, 6)
+    if brand == 'MANN':
+        return 'W' + _zfill(ids, 6)
+    if brand == 'BOSCH':
+        return '0986' + _zfill(ids, 6)
+    return _zfill(ids, 7)
+
+
+def generate_main(n, rng):
+    """Ana ERP çıktısı"""
+    weights = np.array([weight for _, _, weight in MARKALAR], dtype=float)
+    brand_idx = rng.choice(len(MARKALAR), size=n, p=weights / weights.sum())
+    ids = rng.permutation(n)  # kodlar tekil olsun
+
+    brands = np.array([brand for brand, _, _ in MARKALAR], dtype=object)[brand_idx]
+    prefixes = np.array([prefix for _, prefix, _ in MARKALAR], dtype=object)[brand_idx]
+
+    codes = pd.Series('', index=range(n), dtype=object)
+    for brand, _, _ in MARKALAR:
+        mask = brands == brand
+        codes[mask] = brand_codes(brand, ids[mask]).to_numpy()
+
+    df = pd.DataFrame({
+        'URUNKODU': pd.Series(prefixes) + '-' + codes,
+        'ACIKLAMA': pd.Series(brands) + ' PARÇA ' + pd.Series(ids).astype(str),
+        'URETİCİKODU': codes,
+        'ORJİNAL': 'OE' + _zfill(rng.integers(0, 10**8, n), 8),
+        'ESKİKOD': np.where(rng.random(n) < 0.2, 'ESK' + _zfill(ids, 7), ''),
+        'CAT1': 'YEDEK PARÇA',
+        'CAT2': rng.choice(['FREN', 'DEBRIYAJ', 'FILTRE', 'SÜSPANSIYON', 'ELEKTRIK', 'MOTOR'], n),
+        'CAT3': rng.choice(['BİNEK', 'HAFİF TİCARİ', 'AĞIR VASITA'], n),
+        'CAT4': brands,
+        'CAT5': rng.choice(['A', 'B', 'C', 'D'], n),
+        'CAT6': rng.choice(['YERLİ', 'İTHAL'], n),
+        'CAT7': rng.choice(['', 'KAMPANYA', 'OUTLET'], n, p=[0.8, 0.15, 0.05]),
+    })
+
+    for prefix in DEPO_ONEKLERI:
+        for col_type in DEPO_TIPLERI:
+            values = rng.poisson(4, n)
+            values[rng.random(n) < 0.35] = 0
+            df[f'{prefix}{col_type}'] = values
+
+    df['TOPL.FAT.ADT'] = rng.poisson(12, n)
+    df['MÜŞT.SAY.'] = rng.poisson(3, n)
+    df['SATıŞ FIYATı'] = np.round(rng.gamma(2.0, 40.0, n), 2)
+    df['DÖVIZ CINSI (S)'] = rng.choice(['EUR', 'USD', 'TL'], n, p=[0.6, 0.25, 0.15])
+    return df
+
+
+def _branch_codes(rng, codes, m):
+    """Şube kodu gömülü PO numaraları (örn. 'PO-285/4821')"""
+    return 'PO-' + pd.Series(rng.choice(codes, m)) + '/' + _zfill(rng.integers(0, 10**4, m), 4)
+
+
+def _sample_codes(main_df, brands, m, rng, unknown_ratio=0.1):
+    """Ana dosyadaki marka kodlarından örnek; bir kısmı ana dosyada olmayan kod"""
+    pool = main_df.loc[main_df['CAT4'].isin(brands), 'URETİCİKODU'].to_numpy()
+    if len(pool) == 0:
+        pool = main_df['URETİCİKODU'].to_numpy()
+    sample = pd.Series(rng.choice(pool, m), dtype=object)
+    unknown = rng.random(m) < unknown_ratio
+    sample[unknown] = 'X' + _zfill(rng.integers(0, 10**7, unknown.sum()), 7).to_numpy()
+    return sample
+
+
+def _corrupt_last_char(codes, rng, ratio):
+    """Fuzzy eşleşme için kodların bir kısmında son karakteri boz"""
+    codes = codes.copy()
+    mask = rng.random(len(codes)) < ratio
+    codes[mask] = codes[mask].str[:-1] + 'Z'
+    return codes
+
+
+def generate_suppliers(main_df, rng, rows=None):
+    """7 tedarikçi dosyası: {excel anahtarı: DataFrame}"""
+    m = rows or max(100, len(main_df) // 25)
+    qty = lambda: rng.integers(1, 20, m)
+
+    luk = _sample_codes(main_df, ['SCHAEFFLER LUK', 'SCHAFLERR'], m, rng)
+    luk = luk.str[:3] + ' ' + luk.str[3:7] + ' ' + luk.str[7:]
+    luk = _corrupt_last_char(luk, rng, 0.03)
+
+    lem_trw = _sample_codes(main_df, ['LEMFÖRDER', 'TRW'], m, rng)
+    zf_material = np.where(
+        lem_trw.str.isdigit(),
+        'LF:' + lem_trw.str[:5] + ' ' + lem_trw.str[5:],
+        lem_trw + ' : BALATA'
+    )
+
+    valeo = _sample_codes(main_df, ['VALEO'], m, rng)
+    valeo = pd.Series(np.where(rng.random(m) < 0.5, 'VALE-' + valeo, valeo), dtype=object)
+    valeo = _corrupt_last_char(valeo, rng, 0.03)
+
+    mann_filtron = lambda brand: pd.DataFrame({
+        'Material Adı': _sample_codes(main_df, [brand], m, rng),
+        'Müşteri SatınAlma No': pd.Series(rng.choice(MANN_FILTRON_SUBE_KODLARI, m)) + _zfill(rng.integers(0, 10**5, m), 5),
+        'Açık Sipariş Adedi': qty(),
+    })
+
+    return {
+        'excel1': pd.DataFrame({
+            'PO Number(L)': _branch_codes(rng, PO_SUBE_KODLARI, m),
+            'Catalogue number': luk,
+            'Ordered quantity': qty(),
+        }),
+        'excel2': pd.DataFrame({
+            'Material': zf_material,
+            'Purchase order no.': _branch_codes(rng, ZF_SUBE_KODLARI, m),
+            'Qty.in Del.': rng.integers(0, 10, m),
+            'Open quantity': rng.integers(0, 10, m),
+        }),
+        'excel3': pd.DataFrame({
+            'Şube': rng.choice(DELPHI_SUBELERI, m),
+            'Material': _sample_codes(main_df, ['DELPHI'], m, rng) + ' ',
+            'Cum.qty': qty(),
+        }),
+        'excel4': pd.DataFrame({
+            'Basic No.': ' ' + _sample_codes(main_df, ['SACHS'], m, rng),
+            'Ship-to Name': _branch_codes(rng, ZF_SUBE_KODLARI, m),
+            'Outstanding Quantity': qty(),
+        }),
+        'excel5': pd.DataFrame({
+            'Müşteri P/O No.': _branch_codes(rng, PO_SUBE_KODLARI, m),
+            'Valeo Ref.': valeo,
+            'Sipariş Adeti': qty(),
+        }),
+        'excel6': mann_filtron('FILTRON'),
+        'excel7': mann_filtron('MANN'),
+    }
+
+
+def write_xlsx(df, path):
+    """Büyük dosyalar için xlsxwriter akış modunda (satır satır) yaz"""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, list(df.columns))
+        for row_idx, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
+
+
+def generate_dataset(directory, n, seed=0, supplier_rows=None):
+    """Ana dosya ve tedarikçi dosyalarını dizine yaz - dosya yollarını döndürür"""
+    rng = np.random.default_rng(seed)
+    supplier_dir = os.path.join(directory, 'tedarikci')
+    os.makedirs(supplier_dir, exist_ok=True)
+
+    main_df = generate_main(n, rng)
+    main_path = os.path.join(directory, 'ana.xlsx')
+    write_xlsx(main_df, main_path)
+
+    supplier_paths = {}
+    for key, df in generate_suppliers(main_df, rng, supplier_rows).items():
+        supplier_paths[key] = os.path.join(supplier_dir, TEDARIKCI_DOSYALARI[key])
+        write_xlsx(df, supplier_paths[key])
+
+    return main_path, supplier_paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sentetik ana ve tedarikçi Excel dosyaları üret.")
+    parser.add_argument('--boyut', nargs='+', choices=list(BOYUTLAR), default=['10k'],
+                        help="Ana dosya satır sayıları")
+    parser.add_argument('--dizin', default='benchmark_veri', help="Çıktı dizini")
+    parser.add_argument('--tedarikci-satir', type=int, help="Tedarikçi dosyası satır sayısı (varsayılan: ana/25)")
+    parser.add_argument('--tohum', type=int, default=0, help="Rastgele sayı tohumu")
+    args = parser.parse_args(argv)
+
+    for size in args.boyut:
+        main_path, supplier_paths = generate_dataset(
+            os.path.join(args.dizin, size), BOYUTLAR[size], args.tohum, args.tedarikci_satir
+        )
+        print(f"✅ {size}: {main_path} + {len(supplier_paths)} tedarikçi dosyası")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Delta modu için önceki tedarikçi satırları - (marka, ana tablo) başına yerel durum dosyası
+
+Her marka için son işlenen dosyanın (PO, ham kod) bazında toplanmış satırları; normalize
+kod, şube ve çözülmüş ana tablo anahtarıyla birlikte saklanır. Yanında bu satırların
+katkı matrisi ve hangi ana tablo için hesaplandığı (eşleştirme özeti) tutulur. Yeni dosya
+bu durumla karşılaştırılır, sadece eklenen/silinen/değişen satırlar işlenir.
+
+Durum ana tablo özeti başına ayrı tutulur - birden fazla şirketin ana dosyası aynı tedarikçi
+dosyalarıyla işlendiğinde (toplu_islem dizin modu) birbirinin durumunu ezmez. Ana tablo için
+kayıt yoksa markanın en son kullanılan durumu döner; satırların normalizasyonu yine kullanılır,
+ana tablo anahtarları yeniden çözülür.
+"""
+import os
+import glob
+import pickle
+import hashlib
+import tempfile
+
+import onbellek
+
+# Durum biçimi değişirse eski kayıtları geçersiz kılmak için artırılır
+DELTA_VERSION = '2'
+
+
+def _state_dir():
+    # Disk önbelleğinin altında - onbellek.CACHE_DIR sonradan değiştirilebilir (ölçüm, testler)
+    return os.path.join(onbellek.CACHE_DIR, 'delta')
+
+
+def _slug(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _state_path(brand, main_key):
+    return os.path.join(_state_dir(), f"{_slug(brand)}_{_slug(main_key)}.pkl")
+
+
+def _latest_state_path(brand):
+    """Markanın en son kullanılan durum dosyası (herhangi bir ana tablo için); yoksa None"""
+    paths = glob.glob(os.path.join(_state_dir(), f"{_slug(brand)}_*.pkl"))
+    try:
+        return max(paths, key=os.path.getmtime) if paths else None
+    except OSError:
+        return None
+
+
+def load_state(brand, main_key):
+    """Markanın bu ana tablo için kayıtlı durumu; yoksa markanın en son durumu
+
+    Dönen durumun 'ana_anahtar' değeri main_key'den farklı olabilir (artımlı güncelleme yapılamaz).
+    Hiç kayıt yoksa, okunamıyorsa veya sürüm farklıysa None.
+    """
+    path = _state_path(brand, main_key)
+    if not os.path.exists(path):
+        path = _latest_state_path(brand)
+        if path is None:
+            return None
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except Exception:
+        # Bozuk durum - tam hesaplamaya dönülür, sonraki kayıt üzerine yazar
+        return None
+    if state.get('surum') != DELTA_VERSION or state.get('marka') != brand:
+        return None
+    # Disk önbelleğinin LRU sınırı için son kullanım zamanı
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return state
+
+
+def save_state(brand, lines, contribution, branch_counts, main_key):
+    """Markanın durumunu atomik yaz - satırlar, katkı matrisi ve eşleştirme özeti tek dosyada"""
+    directory = _state_dir()
+    os.makedirs(directory, exist_ok=True)
+    state = {
+        'surum': DELTA_VERSION,
+        'marka': brand,
+        'ana_anahtar': main_key,
+        'satirlar': lines.reset_index(drop=True),
+        'katki': contribution,
+        'sube_eslesme': branch_counts,
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _state_path(brand, main_key))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def clear():
+    """Tüm delta durumlarını sil - sonraki çalıştırma tam hesaplama yapar"""
+    directory = _state_dir()
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
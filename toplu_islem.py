@@ -0,0 +1,344 @@
+"""Komut satırından toplu sipariş dosyası oluşturma (tarayıcısız)
+
+Ana ERP çıktısını dönüştürür, tedarikçi dizinindeki bakiye dosyalarıyla eşleştirir
+ve sonucu yazar. Ana dosya yerine bir dizin verilirse her dosya süreç havuzunda
+ayrı ayrı işlenir (örn. tüm şirketlerin gece sipariş listeleri için cron).
+
+Örnekler:
+    python toplu_islem.py ana.xlsx -t tedarikciler/ -o siparis.xlsx
+    python toplu_islem.py ana_dosyalar/ -t tedarikciler/ -o cikti/ --isci 4
+    python toplu_islem.py buyuk_ana.xlsx -t tedarikciler/ --parca 50000
+    python toplu_islem.py ana.xlsx -t tedarikciler/ --siparis-onerisi --paket-dosyasi paketler.xlsx
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from streamlit import config as st_config, logger as st_logger
+
+# Arayüz dışında Streamlit'in 'streamlit run' ve 'ScriptRunContext yok' uyarıları gereksiz.
+# set_option ayarları önce yükler; aksi halde ilk st çağrısı log seviyesini geri alır.
+st_config.set_option('global.showWarningOnDirectExecution', False)
+st_logger.set_log_level('error')
+
+import SiparişOluşturma as app  # noqa: E402
+
+# Tedarikçi dosyalarının excel anahtarlarına eşlenmesi - dosya adında aranan ifadeler
+# (dosya adı doğrudan anahtar da olabilir: excel3.xlsx)
+TEDARIKCI_DOSYA_DESENLERI = {
+    'excel1': ('schaeffler', 'luk'),
+    'excel2': ('zf ithal',),
+    'excel3': ('delphi',),
+    'excel4': ('zf yerli',),
+    'excel5': ('valeo',),
+    'excel6': ('filtron',),
+    'excel7': ('mann',),
+}
+
+EXCEL_UZANTILARI = ('.xlsx', '.xls')
+CIKTI_BICIMLERI = ('xlsx', 'csv', 'csv.gz', 'parquet')
+
+
+def _normalize_name(name):
+    return name.replace('İ', 'I').lower().replace('_', ' ').replace('-', ' ')
+
+
+def list_excel_files(directory):
+    """Dizindeki Excel dosyaları (Excel'in ~$ kilit dosyaları hariç), ada göre sıralı"""
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(EXCEL_UZANTILARI) and not name.startswith('~$')
+    ]
+
+
+def detect_supplier_files(directory, overrides=None):
+    """Tedarikçi dizinindeki dosyaları excel anahtarlarına eşle
+
+    overrides: ['excel3=yol.xlsx', ...] - otomatik eşlemenin üzerine yazar
+    """
+    supplier_files = {}
+    if directory:
+        for path in list_excel_files(directory):
+            stem = _normalize_name(os.path.splitext(os.path.basename(path))[0])
+            if stem in TEDARIKCI_DOSYA_DESENLERI:
+                keys = [stem]
+            else:
+                keys = [key for key, patterns in TEDARIKCI_DOSYA_DESENLERI.items()
+                        if any(pattern in stem for pattern in patterns)]
+            if len(keys) != 1:
+                print(f"⚠️ Tedarikçi dosyası eşlenemedi, atlanıyor: {path}", file=sys.stderr)
+                continue
+            if keys[0] in supplier_files:
+                raise ValueError(f"{keys[0]} için birden fazla dosya: {supplier_files[keys[0]]}, {path}")
+            supplier_files[keys[0]] = path
+
+    for override in overrides or []:
+        key, _, path = override.partition('=')
+        if key not in TEDARIKCI_DOSYA_DESENLERI or not path:
+            raise ValueError(f"Geçersiz tedarikçi ataması: {override} (örn. excel3=delphi.xlsx)")
+        supplier_files[key] = path
+
+    return supplier_files
+
+
+def write_output(data_key, df, output_path, output_format, formula_mode):
+    """Son DataFrame'i çıktı dosyasına yaz - data_key: tablonun parmak izi
+
+    CSV/Parquet doğrudan dosyaya yazılır (CSV dilimler halinde); yarım kalmış dosya bırakılmaz.
+    """
+    if output_format != 'xlsx':
+        app.write_fast_export(df, output_path, output_format)
+        return
+
+    data = app.format_excel_ultra_fast(data_key, df, formula_mode=formula_mode)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+
+
+def write_diagnostics(diagnostics, output_path, enabled):
+    """Eşleştirme tanılama detayını çıktının yanına yaz: <çıktı>_tanilama.csv"""
+    if not enabled or diagnostics.empty:
+        return
+    base = output_path
+    for output_format in sorted(CIKTI_BICIMLERI, key=len, reverse=True):
+        if base.endswith(f".{output_format}"):
+            base = base[:-len(output_format) - 1]
+            break
+    diagnostics.to_csv(f"{base}_tanilama.csv", index=False, encoding='utf-8-sig')
+
+
+def process_main_file(main_path, supplier_files, output_path, output_format='xlsx', formula_mode='formul',
+                      chunk_size=None, diagnostics_file=False, delta=False, order_config=None, forecast=None):
+    """Tek ana dosya: oku -> dönüştür -> eşleştir -> yaz
+
+    chunk_size verilirse dosya parçalı modda işlenir (bkz. process_main_file_chunked).
+    diagnostics_file: eşleştirme tanılamasını <çıktı>_tanilama.csv olarak yaz.
+    delta: tedarikçi dosyalarında sadece önceki çalıştırmaya göre değişen satırlar işlenir.
+    order_config: sipariş önerisi ayarları (bkz. load_order_config); None ise Sipariş kolonları 0 kalır.
+    forecast: ay kolonları için talep tahmini ayarları (bkz. app.apply_demand_forecast).
+    Dönüş: (ana dosya, çıktı dosyası, satır sayısı, süre)
+    """
+    if chunk_size:
+        return process_main_file_chunked(main_path, supplier_files, output_path, output_format, formula_mode,
+                                         chunk_size, diagnostics_file, delta, order_config, forecast)
+
+    started = time.perf_counter()
+
+    main_bytes = app.read_file_bytes(main_path)
+    main_key = app.stage_key(app.file_fingerprint(main_bytes), 'ana', app.TRANSFORM_INPUT_SCHEMA)
+    df = app.load_data_ultra_fast(main_key, main_bytes, columns=app.TRANSFORM_INPUT_SCHEMA)
+    if df is None or len(df) == 0:
+        raise RuntimeError(f"Ana dosya okunamadı: {main_path}")
+
+    result_df = app.transform_data_ultra_fast(main_key, df, forecast)
+    result_key = app.transform_key(main_key, forecast)
+    if result_df is None or len(result_df) == 0:
+        raise RuntimeError(f"Dönüştürülecek veri bulunamadı: {main_path}")
+
+    if supplier_files:
+        uploaded_files = {key: app.read_file_bytes(path) for key, path in supplier_files.items()}
+        files_key = app.supplier_files_key(uploaded_files)
+        result_df, diagnostics = app.match_brands_parallel(result_key, result_df, files_key, uploaded_files, delta)
+        write_diagnostics(diagnostics, output_path, diagnostics_file)
+        result_key = app.stage_key(result_key, 'eslestirme', files_key)
+
+    if order_config is not None:
+        result_key = app.stage_key(result_key, 'siparis', *app.order_settings_key(order_config))
+        result_df = app.order_suggestions(result_key, result_df, order_config)
+
+    write_output(result_key, result_df, output_path, output_format, formula_mode)
+
+    return main_path, output_path, len(result_df), time.perf_counter() - started
+
+
+def process_main_file_chunked(main_path, supplier_files, output_path, output_format, formula_mode, chunk_size,
+                              diagnostics_file=False, delta=False, order_config=None, forecast=None):
+    """Büyük ana dosya: parça parça dönüştür, katkıları eşleştirme kolonlarından hesapla, çıktıya akıt
+
+    Bellek kullanımı parça boyutuyla sınırlıdır; ara parça dosyaları iş bitince silinir.
+    """
+    started = time.perf_counter()
+
+    manifest = app.transform_to_parts(app.read_file_bytes(main_path), chunk_size, forecast)
+    try:
+        if manifest['satir'] == 0:
+            raise RuntimeError(f"Dönüştürülecek veri bulunamadı: {main_path}")
+
+        totals = None
+        if supplier_files:
+            uploaded_files = {key: app.read_file_bytes(path) for key, path in supplier_files.items()}
+            totals, diagnostics = app.match_parts(manifest, uploaded_files, delta)
+            write_diagnostics(diagnostics, output_path, diagnostics_file)
+
+        app.write_parts(manifest, output_path, output_format, formula_mode, totals, order_config)
+    finally:
+        shutil.rmtree(manifest['dizin'], ignore_errors=True)
+
+    return main_path, output_path, manifest['satir'], time.perf_counter() - started
+
+
+def warm_supplier_cache(supplier_files):
+    """Tedarikçi dosyalarını bir kez ayrıştır - işçiler disk önbelleğinden okur"""
+    supplier_bytes = {key: app.read_file_bytes(path) for key, path in supplier_files.items()}
+    app.load_brand_data_parallel(app.supplier_files_key(supplier_bytes), supplier_bytes)
+
+
+def run_batch(jobs, supplier_files, output_format, formula_mode, workers, chunk_size=None, diagnostics_file=False,
+              delta=False, order_config=None, forecast=None):
+    """Ana dosyaları işle; tek iş veya tek işçide havuz başlatılmaz
+
+    jobs: [(ana dosya, çıktı dosyası)] -> hata sayısı
+    """
+    failures = 0
+
+    def report(main_path, output_path, rows, elapsed):
+        print(f"✅ {main_path} -> {output_path} ({rows:,} satır, {elapsed:.1f} sn)")
+
+    if len(jobs) == 1 or workers <= 1:
+        for main_path, output_path in jobs:
+            try:
+                report(*process_main_file(main_path, supplier_files, output_path, output_format, formula_mode,
+                                          chunk_size, diagnostics_file, delta, order_config, forecast))
+            except Exception as e:
+                print(f"❌ {main_path}: {str(e)}", file=sys.stderr)
+                failures += 1
+        return failures
+
+    if supplier_files:
+        warm_supplier_cache(supplier_files)
+
+    # spawn: paralel_okuma ile aynı - fork edilen süreçte Streamlit durumu kopyalanmaz
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as pool:
+        futures = {
+            pool.submit(process_main_file, main_path, supplier_files, output_path, output_format, formula_mode,
+                        chunk_size, diagnostics_file, delta, order_config, forecast): main_path
+            for main_path, output_path in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                report(*future.result())
+            except Exception as e:
+                print(f"❌ {futures[future]}: {str(e)}", file=sys.stderr)
+                failures += 1
+    return failures
+
+
+def load_order_config(sales_months, cover_months, pack_path=None):
+    """Sipariş önerisi ayarları - paket dosyası (CSV/Excel) verilirse bir kez okunur"""
+    order_config = {'satis_ay': sales_months, 'kapsama_ay': cover_months, 'paket': None, 'paket_anahtari': None}
+    if pack_path:
+        order_config['paket'] = app.read_pack_file(pack_path, pack_path)
+        order_config['paket_anahtari'] = app.file_fingerprint(pack_path)
+    return order_config
+
+
+def plan_jobs(input_path, output, output_format):
+    """Girdi dosya/dizininden (ana dosya, çıktı dosyası) listesi"""
+    suffix = f"_eslestirilmis.{output_format}"
+
+    if os.path.isdir(input_path):
+        main_files = list_excel_files(input_path)
+        output_dir = output or input_path
+        os.makedirs(output_dir, exist_ok=True)
+        return [
+            (path, os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + suffix))
+            for path in main_files
+        ]
+
+    if output and os.path.isdir(output):
+        output = os.path.join(output, os.path.splitext(os.path.basename(input_path))[0] + suffix)
+    return [(input_path, output or os.path.splitext(input_path)[0] + suffix)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ana ERP çıktısını dönüştür, tedarikçi bakiyeleriyle eşleştir ve sipariş dosyasını yaz."
+    )
+    parser.add_argument('girdi', help="Ana Excel dosyası veya ana dosyaları içeren dizin")
+    parser.add_argument('-t', '--tedarikci-dizini', help="Tedarikçi bakiye dosyalarının dizini")
+    parser.add_argument('--tedarikci', action='append', default=[], metavar='ANAHTAR=DOSYA',
+                        help="Tedarikçi dosyasını elle ata (örn. excel3=delphi.xlsx), tekrar edilebilir")
+    parser.add_argument('-o', '--cikti', help="Çıktı dosyası (dizin girdisinde çıktı dizini)")
+    parser.add_argument('--bicim', choices=CIKTI_BICIMLERI, default='xlsx', help="Çıktı biçimi")
+    parser.add_argument('--toplam-depo', choices=['formul', 'deger'], default='formul',
+                        help="Toplam Depo Bakiye: =SUM formülü veya hesaplanmış değer")
+    parser.add_argument('--isci', type=int, default=os.cpu_count() or 1,
+                        help="Dizin girdisinde paralel işlenecek dosya sayısı")
+    parser.add_argument('--tanilama', action='store_true',
+                        help="Eşleştirme tanılamasını (kod başına eşleşme, fuzzy oranı) <çıktı>_tanilama.csv olarak yaz")
+    parser.add_argument('--parca', type=int, metavar='SATIR',
+                        help="Büyük dosyalar için parçalı mod: ana dosyayı bu kadar satırlık partilerle işle "
+                             "(bellek parça boyutuyla sınırlı, Parquet çıktısı yok)")
+    parser.add_argument('--tahmin', choices=list(app.TAHMIN_MODELLERI),
+                        help="Ay kolonlarını talep tahminiyle doldur: ortalama (dönem satışı) veya ustel "
+                             "(dönem satışı + TOPL.FAT.ADT ile üstel düzeltme)")
+    parser.add_argument('--fatura-ay', type=int, default=app.TAHMIN_FATURA_AY,
+                        help="TOPL.FAT.ADT kolonunun kapsadığı dönem (ay) - ustel model")
+    parser.add_argument('--tahmin-alfa', type=float, default=app.TAHMIN_ALFA,
+                        help="Üstel düzeltmede son dönemin ağırlığı (0-1]")
+    parser.add_argument('--siparis-onerisi', action='store_true',
+                        help="Sipariş kolonlarını hesapla: hedef stok (aylık satış × kapsama) - stok - tedarikçi bakiyesi")
+    parser.add_argument('--satis-ay', type=int, default=app.SIPARIS_SATIS_AY,
+                        help="STOK/SATIS kolonlarının kapsadığı dönem (ay) - sipariş önerisi ve tahmin")
+    parser.add_argument('--kapsama-ay', type=float, default=app.SIPARIS_KAPSAMA_AY,
+                        help="Hedef stok: kaç aylık satış")
+    parser.add_argument('--paket-dosyasi', metavar='DOSYA',
+                        help="Paket adetleri dosyası (URUNKODU, Paket Adedi; CSV/Excel) - öneriler paket katına yuvarlanır")
+    parser.add_argument('--delta', action='store_true',
+                        help="Tedarikçi dosyalarını önceki çalıştırmanın satırlarıyla (PO, kod) karşılaştır; "
+                             "sadece eklenen, silinen ve değişen satırları işle")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.parca is not None and (args.parca <= 0 or args.bicim not in app.PARCA_BICIMLERI):
+        print(f"❌ --parca pozitif olmalı ve biçim {', '.join(app.PARCA_BICIMLERI)} olmalı", file=sys.stderr)
+        return 2
+
+    if args.siparis_onerisi and (args.satis_ay <= 0 or args.kapsama_ay < 0):
+        print("❌ --satis-ay pozitif, --kapsama-ay negatif olmayan bir değer olmalı", file=sys.stderr)
+        return 2
+
+    forecast = None
+    if args.tahmin:
+        if args.satis_ay <= 0 or args.fatura_ay <= 0 or not 0 < args.tahmin_alfa <= 1:
+            print("❌ --satis-ay ve --fatura-ay pozitif, --tahmin-alfa (0, 1] aralığında olmalı", file=sys.stderr)
+            return 2
+        forecast = {'model': args.tahmin, 'satis_ay': args.satis_ay, 'fatura_ay': args.fatura_ay, 'alfa': args.tahmin_alfa}
+
+    try:
+        supplier_files = detect_supplier_files(args.tedarikci_dizini, args.tedarikci)
+        jobs = plan_jobs(args.girdi, args.cikti, args.bicim)
+        order_config = (
+            load_order_config(args.satis_ay, args.kapsama_ay, args.paket_dosyasi) if args.siparis_onerisi else None
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ {str(e)}", file=sys.stderr)
+        return 2
+
+    if not jobs:
+        print(f"⚠️ İşlenecek ana dosya bulunamadı: {args.girdi}", file=sys.stderr)
+        return 2
+
+    labels = {}
+    for adapter in app.BRAND_ADAPTERS.values():
+        labels.setdefault(adapter['excel_key'], adapter['label'])
+    for key, path in sorted(supplier_files.items()):
+        print(f"📂 {labels.get(key, key)}: {path}")
+
+    failures = run_batch(jobs, supplier_files, args.bicim, args.toplam_depo, args.isci, args.parca, args.tanilama,
+                         args.delta, order_config, forecast)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())